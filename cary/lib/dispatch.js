@@ -5,6 +5,7 @@
  */
 
 import { haversine } from './geo.js';
+import { coversPlace, walkingDistance } from './walking.js';
 
 /** Maximum radius to search for available Couriers, in meters. */
 const DISPATCH_RADIUS = 2000; // 2km — covers the full neighborhood
@@ -14,18 +15,25 @@ export const REQUEST_TTL = 300; // 5 minutes
 
 /**
  * Find Couriers within dispatch radius of a place, sorted by proximity.
- * @param {object} place - { lat, lon } of the request origin
+ * One metric per place, so couriers are always ranked against each other
+ * fairly: walking distances when a walk table covers the place (couriers
+ * who cannot reach it on foot are left out), straight-line otherwise.
+ * @param {object} place - { id, lat, lon } of the request origin
  * @param {Array} couriers - [{ id, lat, lon, status, vehicle_type }, ...]
+ * @param {object|null} walk - table from createWalkTable(), optional
  * @returns {Array} eligible couriers sorted nearest-first, with distance_meters
  */
-export function findNearbyCouriers(place, couriers) {
+export function findNearbyCouriers(place, couriers, walk = null) {
+  const walking = walk && coversPlace(walk, place.id);
   return couriers
     .filter((c) => c.status === 'available')
     .map((c) => ({
       ...c,
-      distance_meters: haversine(place.lat, place.lon, c.lat, c.lon),
+      distance_meters: walking
+        ? walkingDistance(walk, place.id, c.lat, c.lon)
+        : haversine(place.lat, place.lon, c.lat, c.lon),
     }))
-    .filter((c) => c.distance_meters <= DISPATCH_RADIUS)
+    .filter((c) => c.distance_meters !== null && c.distance_meters <= DISPATCH_RADIUS)
     .sort((a, b) => a.distance_meters - b.distance_meters);
 }
 
@@ -0,0 +1,131 @@
+/**
+ * Cary — Walking Distances
+ *
+ * Lookups into the pedestrian distance table built by
+ * scripts/26-build-walk-graph.py (public/walk/graph.json + distances.bin):
+ * for every building and landmark, the walking distance to every node of
+ * the street + footpath graph, as Uint16 meters.
+ */
+
+/** Grid cell for the nearest-node lookup, in meters. */
+const NODE_CELL = 50;
+
+/** WGS84 ellipsoid, as scripts/projection.py. */
+const WGS84_A = 6378137.0;
+const WGS84_F = 1 / 298.257223563;
+const WGS84_E2 = WGS84_F * (2 - WGS84_F);
+
+/**
+ * Build a lookup table from the manifest and the raw distances buffer.
+ * @param {object} manifest - parsed graph.json
+ * @param {ArrayBuffer} buffer - distances.bin (little-endian Uint16)
+ * @returns {object} table for walkingDistance()
+ */
+export function createWalkTable(manifest, buffer) {
+  const frame = projectionFrame(manifest.projection);
+  const cells = new Map();
+  manifest.nodes.forEach(([x, z], i) => {
+    const key = `${Math.floor(x / NODE_CELL)},${Math.floor(z / NODE_CELL)}`;
+    if (!cells.has(key)) cells.set(key, []);
+    cells.get(key).push(i);
+  });
+  return {
+    ...manifest,
+    frame,
+    cells,
+    distances: new Uint16Array(buffer),
+  };
+}
+
+/** Earth-centered [x, y, z] of a point on the ellipsoid surface. */
+function ecef(lat, lon) {
+  const phi = (lat * Math.PI) / 180;
+  const lam = (lon * Math.PI) / 180;
+  const n = WGS84_A / Math.sqrt(1 - WGS84_E2 * Math.sin(phi) ** 2);
+  return [
+    n * Math.cos(phi) * Math.cos(lam),
+    n * Math.cos(phi) * Math.sin(lam),
+    n * (1 - WGS84_E2) * Math.sin(phi),
+  ];
+}
+
+/**
+ * Precomputed frame for toLocal(). Manifests without a mode predate the
+ * 'tangent' projection and are equirectangular.
+ */
+function projectionFrame(p) {
+  const mode = p.mode || 'equirectangular';
+  if (mode === 'equirectangular') return { ...p, mode };
+  if (mode !== 'tangent') throw new Error(`unknown walk table projection '${mode}'`);
+  const phi = (p.center_lat * Math.PI) / 180;
+  const lam = (p.center_lon * Math.PI) / 180;
+  return {
+    ...p,
+    mode,
+    origin: ecef(p.center_lat, p.center_lon),
+    // East and south unit vectors in ECEF
+    east: [-Math.sin(lam), Math.cos(lam), 0],
+    south: [Math.sin(phi) * Math.cos(lam), Math.sin(phi) * Math.sin(lam), -Math.cos(phi)],
+  };
+}
+
+/** WGS84 → local meters, same projection as the pipeline (scripts/projection.py). */
+function toLocal(table, lat, lon) {
+  const p = table.frame;
+  if (p.mode === 'equirectangular') {
+    return [(lon - p.center_lon) * p.lon_to_meters, (p.center_lat - lat) * p.lat_to_meters];
+  }
+  const d = ecef(lat, lon).map((v, i) => v - p.origin[i]);
+  const dot = (u) => u[0] * d[0] + u[1] * d[1] + u[2] * d[2];
+  return [dot(p.east), dot(p.south)];
+}
+
+/** Nearest graph node and the straight-line gap to it, in meters. */
+function nearestNode(table, x, z) {
+  const cx = Math.floor(x / NODE_CELL);
+  const cz = Math.floor(z / NODE_CELL);
+  let best = -1;
+  let bestD = Infinity;
+  const visit = (i) => {
+    const [nx, nz] = table.nodes[i];
+    const d = Math.hypot(nx - x, nz - z);
+    if (d < bestD) { best = i; bestD = d; }
+  };
+  for (let dx = -1; dx <= 1; dx++) {
+    for (let dz = -1; dz <= 1; dz++) {
+      (table.cells.get(`${cx + dx},${cz + dz}`) || []).forEach(visit);
+    }
+  }
+  // Off the graph by more than a cell: exact scan
+  if (bestD > NODE_CELL) table.nodes.forEach((_, i) => visit(i));
+  return { node: best, gap: bestD };
+}
+
+/**
+ * Whether the table has a row for a place.
+ * @param {object} table - from createWalkTable()
+ * @param {string} placeId - building or landmark id
+ * @returns {boolean}
+ */
+export function coversPlace(table, placeId) {
+  return table.rows[placeId] !== undefined;
+}
+
+/**
+ * Walking distance from a point to a place, in meters.
+ * @param {object} table - from createWalkTable()
+ * @param {string} placeId - building or landmark id
+ * @param {number} lat
+ * @param {number} lon
+ * @returns {number|null} meters, or null if the place or route is unknown
+ */
+export function walkingDistance(table, placeId, lat, lon) {
+  const row = table.rows[placeId];
+  if (row === undefined) return null;
+  const [x, z] = toLocal(table, lat, lon);
+  const { node, gap } = nearestNode(table, x, z);
+  if (node < 0) return null;
+  const d = table.distances[row * table.table.cols + node];
+  if (d === table.table.unreachable) return null;
+  return d * table.table.quantum_m + gap;
+}
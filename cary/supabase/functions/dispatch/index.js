@@ -7,12 +7,32 @@
 
 import { createClient } from '@supabase/supabase-js';
 import { findNearbyCouriers, buildNotification } from '../../lib/dispatch.js';
+import { createWalkTable } from '../../lib/walking.js';
 
 const supabase = createClient(
   Deno.env.get('SUPABASE_URL'),
   Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')
 );
 
+// Walking-distance table (the site's public/walk/ directory); dispatch
+// uses straight-line distance when it is unset or doesn't cover the place
+const WALK_TABLE_URL = Deno.env.get('WALK_TABLE_URL');
+let walkTable = null;
+
+async function loadWalkTable() {
+  if (walkTable || !WALK_TABLE_URL) return walkTable;
+  try {
+    const [manifest, buffer] = await Promise.all([
+      fetch(`${WALK_TABLE_URL}/graph.json`).then((r) => r.json()),
+      fetch(`${WALK_TABLE_URL}/distances.bin`).then((r) => r.arrayBuffer()),
+    ]);
+    walkTable = createWalkTable(manifest, buffer);
+  } catch (err) {
+    console.error('walk table unavailable:', err);
+  }
+  return walkTable;
+}
+
 Deno.serve(async (req) => {
   const { request_id } = await req.json();
 
@@ -51,8 +71,9 @@ Deno.serve(async (req) => {
 
   // Find nearby couriers
   const nearby = findNearbyCouriers(
-    { lat: request.place_lat, lon: request.place_lon },
-    couriers
+    { id: request.place_id, lat: request.place_lat, lon: request.place_lon },
+    couriers,
+    await loadWalkTable()
   );
 
   // Build notification
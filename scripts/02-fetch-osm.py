@@ -5,37 +5,58 @@
 Fetch building enrichment data and POIs from OpenStreetMap's Overpass API
 for Lafayette Square, St. Louis, MO.
 
+Usage:
+  python scripts/02-fetch-osm.py           # full fetch
+  python scripts/02-fetch-osm.py --sync    # only elements changed since the last run
+
 Outputs:
   raw/osm_buildings.json  - Building footprints with tags (levels, material, heritage, etc.)
   raw/osm_pois.json       - Points of interest (amenity, shop, tourism, historic, etc.)
+  raw/osm_sync.json       - Overpass timestamp and element versions per store (osmsync.py)
 """
 
+import argparse
 import json
+import os
 import sys
 import time
 
 import requests
 
 from config import (
-    BBOX,
+    FETCH_BBOX,
     CENTER_LAT,
     CENTER_LON,
-    LAT_TO_METERS,
-    LON_TO_METERS,
+    OVERPASS_URL,
     RAW_DIR,
+    REGION,
     ensure_dirs,
+    lonlat_to_local,
     wgs84_to_local,
 )
+import osmsync
+from tracing import span, traced
 
-OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 TIMEOUT = 60
 
-# Overpass bbox format: (min_lat, min_lon, max_lat, max_lon)
-OVERPASS_BBOX = (
-    f"{BBOX['min_lat']},{BBOX['min_lon']},{BBOX['max_lat']},{BBOX['max_lon']}"
-)
-
-
+BUILDING_FILTERS = ['way["building"]']
+POI_FILTERS = [
+    'node["amenity"]',
+    'way["amenity"]',
+    'node["shop"]',
+    'way["shop"]',
+    'node["tourism"]',
+    'way["tourism"]',
+    'node["historic"]',
+    'way["historic"]',
+    'node["leisure"]',
+    'way["leisure"]',
+    'node["healthcare"]',
+    'way["healthcare"]',
+]
+
+
+@traced('fetch overpass')
 def overpass_query(query_body):
     """Send a query to the Overpass API and return the JSON response."""
     full_query = f"[out:json][timeout:{TIMEOUT}];{query_body}"
@@ -74,19 +95,17 @@ def compute_centroid(coords):
     return avg_lon, avg_lat
 
 
+@traced('osm buildings')
 def fetch_buildings():
-    """Fetch building ways from OSM with enrichment tags."""
+    """Fetch building ways from OSM. Returns (buildings, raw Overpass response)."""
     print("\n=== Fetching OSM buildings ===")
+    data = overpass_query(osmsync.full_query(BUILDING_FILTERS))
+    return parse_buildings(data.get("elements", [])), data
 
-    query = (
-        f"("
-        f'way["building"]({OVERPASS_BBOX});'
-        f");"
-        f"out body;>;out skel qt;"
-    )
-    data = overpass_query(query)
-    elements = data.get("elements", [])
 
+@traced('parse buildings')
+def parse_buildings(elements):
+    """Building records with enrichment tags from Overpass ways + nodes."""
     # Separate nodes from ways - we need the nodes to resolve way geometry
     nodes = {}
     ways = []
@@ -120,14 +139,14 @@ def fetch_buildings():
         node_ids = way.get("nodes", [])
 
         # Resolve footprint polygon coordinates
-        footprint = []
+        lonlat = []
         for nid in node_ids:
             if nid in nodes:
-                lon, lat = nodes[nid]
-                lx, lz = wgs84_to_local(lon, lat)
-                footprint.append({"lon": lon, "lat": lat, "x": round(lx, 2), "z": round(lz, 2)})
+                lonlat.append(nodes[nid])
             else:
                 print(f"  WARNING: Node {nid} not found for way {way['id']}", file=sys.stderr)
+        footprint = [{"lon": lon, "lat": lat, "x": round(lx, 2), "z": round(lz, 2)}
+                     for (lon, lat), (lx, lz) in zip(lonlat, lonlat_to_local(lonlat).tolist())]
 
         # Compute centroid from resolved coordinates
         if footprint:
@@ -170,32 +189,17 @@ def fetch_buildings():
     return buildings
 
 
+@traced('osm pois')
 def fetch_pois():
-    """Fetch points of interest from OSM."""
+    """Fetch points of interest from OSM. Returns (pois, raw Overpass response)."""
     print("\n=== Fetching OSM POIs ===")
+    data = overpass_query(osmsync.full_query(POI_FILTERS))
+    return parse_pois(data.get("elements", [])), data
 
-    # Query for multiple POI categories
-    poi_filters = [
-        'node["amenity"]',
-        'way["amenity"]',
-        'node["shop"]',
-        'way["shop"]',
-        'node["tourism"]',
-        'way["tourism"]',
-        'node["historic"]',
-        'way["historic"]',
-        'node["leisure"]',
-        'way["leisure"]',
-        'node["healthcare"]',
-        'way["healthcare"]',
-    ]
-
-    filter_str = "".join(f"{f}({OVERPASS_BBOX});" for f in poi_filters)
-    query = f"({filter_str});out body;>;out skel qt;"
-
-    data = overpass_query(query)
-    elements = data.get("elements", [])
 
+@traced('parse pois')
+def parse_pois(elements):
+    """POI records (tagged nodes, and ways at their centroid) from Overpass elements."""
     # Separate nodes from ways
     node_coords = {}
     raw_nodes = []
@@ -232,10 +236,10 @@ def fetch_pois():
     pois = []
 
     # Process POI nodes
-    for node in raw_nodes:
+    local = lonlat_to_local([(node["lon"], node["lat"]) for node in raw_nodes]).tolist()
+    for node, (lx, lz) in zip(raw_nodes, local):
         tags = node.get("tags", {})
         lon, lat = node["lon"], node["lat"]
-        lx, lz = wgs84_to_local(lon, lat)
 
         extracted_tags = {}
         for key in poi_tag_keys:
@@ -323,34 +327,90 @@ def fetch_pois():
     return pois
 
 
+def building_key(b):
+    return f"way/{b['osm_id']}"
+
+
+def poi_key(p):
+    return f"{p['type']}/{p['osm_id']}"
+
+
+def save_records(records, path, label):
+    with open(path, "w") as f:
+        json.dump(records, f, indent=2)
+    print(f"\nSaved {len(records)} {label} to {path}")
+
+
+def record_state(state, store, data):
+    """Remember a full fetch's timestamp and versions for the next --sync."""
+    try:
+        state[store] = osmsync.full_entry(data)
+    except osmsync.SyncError as e:
+        state.pop(store, None)
+        print(f"  WARNING: {store} sync state not recorded ({e})", file=sys.stderr)
+    osmsync.save_state(state)
+
+
+def sync_store(state, store, filters, path, parse, key):
+    """Patch a raw store with the elements changed since its last fetch or sync."""
+    entry = state[store]
+    since = entry["timestamp"]
+    print(f"\n=== Syncing OSM {store} changed since {since} ===")
+    changes = osmsync.fetch_changes(overpass_query, filters, entry)
+
+    with open(path) as f:
+        records = json.load(f)
+    records = osmsync.patch(records, parse(changes["elements"]), changes["deleted"], key)
+    save_records(records, path, store)
+
+    osmsync.apply_changes(entry, changes)
+    osmsync.save_state(state)
+    print(f"  {len(changes['created'])} created, {len(changes['modified'])} modified, "
+          f"{len(changes['deleted'])} deleted")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Fetch OSM buildings and POIs")
+    parser.add_argument("--sync", action="store_true",
+                        help="fetch only elements changed since the last run and patch the raw files")
+    args = parser.parse_args()
+
     print("=" * 60)
-    print("02-fetch-osm.py - OpenStreetMap data for Lafayette Square")
+    print(f"02-fetch-osm.py - OpenStreetMap data for {REGION['title']}")
     print("=" * 60)
     print(f"Center: {CENTER_LAT}, {CENTER_LON}")
-    print(f"BBOX: {BBOX['min_lat']},{BBOX['min_lon']} -> {BBOX['max_lat']},{BBOX['max_lon']}")
+    print(f"BBOX: {FETCH_BBOX['min_lat']},{FETCH_BBOX['min_lon']} -> "
+          f"{FETCH_BBOX['max_lat']},{FETCH_BBOX['max_lon']}")
 
     ensure_dirs()
 
-    # Fetch buildings
-    buildings = fetch_buildings()
-
     buildings_path = f"{RAW_DIR}/osm_buildings.json"
-    with open(buildings_path, "w") as f:
-        json.dump(buildings, f, indent=2)
-    print(f"\nSaved {len(buildings)} buildings to {buildings_path}")
-
-    # Brief pause to be polite to the Overpass API
-    print("\nWaiting 5 seconds before next query (Overpass rate limit)...")
-    time.sleep(5)
-
-    # Fetch POIs
-    pois = fetch_pois()
-
     pois_path = f"{RAW_DIR}/osm_pois.json"
-    with open(pois_path, "w") as f:
-        json.dump(pois, f, indent=2)
-    print(f"\nSaved {len(pois)} POIs to {pois_path}")
+    state = osmsync.load_state()
+
+    stores = [
+        ("buildings", BUILDING_FILTERS, buildings_path, parse_buildings, building_key, fetch_buildings),
+        ("pois", POI_FILTERS, pois_path, parse_pois, poi_key, fetch_pois),
+    ]
+    for i, (store, filters, path, parse, key, fetch) in enumerate(stores):
+        if i:
+            # Brief pause to be polite to the Overpass API
+            print("\nWaiting 5 seconds before next query (Overpass rate limit)...")
+            time.sleep(5)
+
+        if args.sync and store in state and os.path.exists(path):
+            try:
+                sync_store(state, store, filters, path, parse, key)
+            except osmsync.SyncError as e:
+                # Leave the raw file and state as they were; the next sync retries
+                print(f"  WARNING: {store} sync failed, nothing changed ({e})", file=sys.stderr)
+            continue
+        if args.sync:
+            print(f"\nNo sync state for {store}; fetching everything")
+
+        records, data = fetch()
+        save_records(records, path, store)
+        record_state(state, store, data)
 
     print("\n" + "=" * 60)
     print("Done!")
@@ -358,4 +418,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with span('02-fetch-osm', cat='stage'):
+        main()
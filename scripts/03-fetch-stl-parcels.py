@@ -6,12 +6,29 @@ Queries the City of St. Louis parcel layer, extracts property attributes
 (year built, stories, sqft, appraised value, land use), and converts
 polygon geometries to local coordinates.
 
-Usage: python scripts/03-fetch-stl-parcels.py
+Usage:
+  python scripts/03-fetch-stl-parcels.py              # full fetch
+  python scripts/03-fetch-stl-parcels.py --refresh    # only parcels changed since the last run
+
+--refresh first asks for attributes only: Handles edited since the last
+run when the layer has an edit-date field (editFieldsInfo), else every
+parcel's attributes (plus Shape area/length, when the layer has them) to
+compare against stored hashes. Geometry is then fetched only for the
+changed Handles and merged into stl_parcels.json; Handles no longer in
+the layer are dropped. Both modes report the bytes transferred.
+
+Both modes read the layer metadata first (retried, then fatal). --refresh
+falls back to a full fetch when the layer's change fields no longer match
+the ones stl_parcels_sync.json was saved with.
 
 Output: scripts/raw/stl_parcels.json
+        scripts/raw/stl_parcels_sync.json  (change-detection state for --refresh)
 """
 
+import argparse
+import hashlib
 import json
+import os
 import sys
 import time
 
@@ -22,14 +39,14 @@ except ImportError:
     sys.exit(1)
 
 from config import (
-    CENTER_LAT, CENTER_LON, BBOX,
-    LON_TO_METERS, LAT_TO_METERS,
-    wgs84_to_local, ensure_dirs, RAW_DIR,
+    CENTER_LAT, CENTER_LON, FETCH_BBOX,
+    lonlat_to_local, wgs84_to_local, ensure_dirs, RAW_DIR, REGION, PARCELS_URL,
 )
+from tracing import span, traced
 
 # ArcGIS REST endpoints to try (in order of preference)
 PARCEL_ENDPOINTS = [
-    "https://maps8.stlouis-mo.gov/arcgis/rest/services/ASSESSOR/Assessor_Public_Parcels/MapServer/11/query",
+    PARCELS_URL,
 ]
 
 # Fields to request from the parcel layer
@@ -57,38 +74,49 @@ OUT_FIELDS = ",".join([
 ])
 
 PAGE_SIZE = 2000
+HANDLE_BATCH = 100  # Handles per geometry request in --refresh
+LAYER_INFO_ATTEMPTS = 4
+LAYER_INFO_RETRY_DELAY = 1.0  # seconds, times the attempt number
+
+SYNC_PATH = os.path.join(RAW_DIR, "stl_parcels_sync.json")
 
+# Response bytes and requests this run, for the transfer summary
+transfer = {"bytes": 0, "requests": 0}
 
-def build_query_params(offset=0):
+
+def build_query_params(offset=0, where="1=1", out_fields=OUT_FIELDS, return_geometry=True):
     """Build the ArcGIS REST query parameters."""
     geometry = json.dumps({
-        "xmin": BBOX["min_lon"],
-        "ymin": BBOX["min_lat"],
-        "xmax": BBOX["max_lon"],
-        "ymax": BBOX["max_lat"],
+        "xmin": FETCH_BBOX["min_lon"],
+        "ymin": FETCH_BBOX["min_lat"],
+        "xmax": FETCH_BBOX["max_lon"],
+        "ymax": FETCH_BBOX["max_lat"],
     })
 
     return {
-        "where": "1=1",
+        "where": where,
         "geometry": geometry,
         "geometryType": "esriGeometryEnvelope",
         "inSR": "4326",
         "outSR": "4326",
         "spatialRel": "esriSpatialRelIntersects",
-        "outFields": OUT_FIELDS,
-        "returnGeometry": "true",
+        "outFields": out_fields,
+        "returnGeometry": "true" if return_geometry else "false",
         "f": "json",
         "resultRecordCount": PAGE_SIZE,
         "resultOffset": offset,
     }
 
 
-def fetch_page(endpoint, offset=0):
+@traced('fetch parcel page')
+def fetch_page(endpoint, offset=0, **query):
     """Fetch a single page of results from the ArcGIS endpoint."""
-    params = build_query_params(offset)
+    params = build_query_params(offset, **query)
 
     resp = requests.get(endpoint, params=params, timeout=60)
     resp.raise_for_status()
+    transfer["bytes"] += len(resp.content)
+    transfer["requests"] += 1
     data = resp.json()
 
     # Check for ArcGIS-level errors
@@ -101,49 +129,211 @@ def fetch_page(endpoint, offset=0):
     return data
 
 
+def fetch_features(endpoint, **query):
+    """Every page of one query (build_query_params keywords)."""
+    all_features = []
+    offset = 0
+
+    while True:
+        print(f"  Fetching offset {offset}...")
+        data = fetch_page(endpoint, offset, **query)
+
+        features = data.get("features", [])
+        if not features:
+            break
+
+        all_features.extend(features)
+        print(f"  Got {len(features)} features (total: {len(all_features)})")
+
+        # Check if there are more results
+        # ArcGIS signals "more pages" via exceededTransferLimit
+        exceeded = data.get("exceededTransferLimit", False)
+        if not exceeded and len(features) < PAGE_SIZE:
+            break
+
+        offset += len(features)
+
+        # Brief pause to be polite to the server
+        time.sleep(0.5)
+
+    return all_features
+
+
+@traced('fetch parcels')
 def fetch_all_parcels():
     """
     Fetch all parcel features, trying each endpoint and handling pagination.
 
-    Returns list of raw ArcGIS feature dicts, or empty list on failure.
+    Returns (endpoint, raw ArcGIS feature dicts, layer info), or
+    (None, [], {}) on failure, including when the layer metadata can't be
+    read.
     """
     for endpoint in PARCEL_ENDPOINTS:
         print(f"Trying endpoint: {endpoint}")
         try:
-            all_features = []
-            offset = 0
+            info = layer_info(endpoint)
+            edit_field, shape_fields = change_fields(info)
+            out_fields = ",".join([OUT_FIELDS] + ([edit_field] if edit_field else []) + shape_fields)
+            all_features = fetch_features(endpoint, out_fields=out_fields)
+            print(f"Fetched {len(all_features)} total parcels from {endpoint}")
+            return endpoint, all_features, info
 
-            while True:
-                print(f"  Fetching offset {offset}...")
-                data = fetch_page(endpoint, offset)
+        except Exception as e:
+            print(f"  Failed: {e}")
+            continue
 
-                features = data.get("features", [])
-                if not features:
-                    break
+    print("All endpoints failed. No parcel data fetched.")
+    return None, [], {}
 
-                all_features.extend(features)
-                print(f"  Got {len(features)} features (total: {len(all_features)})")
 
-                # Check if there are more results
-                # ArcGIS signals "more pages" via exceededTransferLimit
-                exceeded = data.get("exceededTransferLimit", False)
-                if not exceeded and len(features) < PAGE_SIZE:
-                    break
+# ---------------------------------------------------------------------------
+# Change detection for --refresh
+# ---------------------------------------------------------------------------
 
-                offset += len(features)
+def layer_info(endpoint):
+    """
+    Layer metadata (fields, editFieldsInfo) for a query endpoint. Retried
+    LAYER_INFO_ATTEMPTS times, then raises RuntimeError: the change fields
+    decide what --refresh can detect, so a fetch never proceeds without them.
+    """
+    url = endpoint.rsplit("/query", 1)[0]
+    for attempt in range(1, LAYER_INFO_ATTEMPTS + 1):
+        try:
+            resp = requests.get(url, params={"f": "json"}, timeout=30)
+            resp.raise_for_status()
+            transfer["bytes"] += len(resp.content)
+            transfer["requests"] += 1
+            info = resp.json()
+            if "error" in info:
+                err = info["error"]
+                raise RuntimeError(f"ArcGIS error {err.get('code', '?')}: {err.get('message', 'Unknown')}")
+            return info
+        except (requests.exceptions.RequestException, ValueError, RuntimeError) as e:
+            print(f"  Layer metadata unavailable ({e}), attempt {attempt}/{LAYER_INFO_ATTEMPTS}")
+            if attempt < LAYER_INFO_ATTEMPTS:
+                time.sleep(LAYER_INFO_RETRY_DELAY * attempt)
+    raise RuntimeError(f"no layer metadata from {url}")
+
+
+def change_fields(info):
+    """(edit-date field or None, Shape area/length fields) from layer metadata."""
+    edit_field = (info.get("editFieldsInfo") or {}).get("editDateField")
+    shape_fields = [
+        f["name"] for f in info.get("fields", [])
+        if f["name"].lower().startswith("shape") and f.get("type") == "esriFieldTypeDouble"
+    ]
+    return edit_field, shape_fields
+
+
+def attribute_hash(attrs, fields):
+    blob = json.dumps([attrs.get(k) for k in fields], separators=(",", ":"))
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def hash_fields(state):
+    return OUT_FIELDS.split(",") + state["shape_fields"]
+
+
+def update_sync_state(state, features):
+    """Record hashes (and the newest edit date) for fetched features."""
+    fields = hash_fields(state)
+    for feature in features:
+        attrs = feature.get("attributes", {})
+        state["hashes"][attrs.get("Handle")] = attribute_hash(attrs, fields)
+        edited = attrs.get(state["edit_field"]) if state["edit_field"] else None
+        if edited is not None and (state["last_edit"] is None or edited > state["last_edit"]):
+            state["last_edit"] = edited
+
+
+@traced('detect parcel changes')
+def changed_handles(state):
+    """
+    Attribute-only pass: (changed or new Handles, deleted Handles).
 
-                # Brief pause to be polite to the server
-                time.sleep(0.5)
+    Uses the edit-date field when the layer has one, else attribute hashes.
+    """
+    endpoint = state["endpoint"]
+    if state["edit_field"] and state["last_edit"] is not None:
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(state["last_edit"] / 1000))
+        print(f"  Parcels edited since {since} UTC ({state['edit_field']})")
+        edited = fetch_features(endpoint, where=f"{state['edit_field']} > TIMESTAMP '{since}'",
+                                out_fields=f"Handle,{state['edit_field']}", return_geometry=False)
+        print("  Current Handles")
+        current = fetch_features(endpoint, out_fields="Handle", return_geometry=False)
+        handles = {f["attributes"]["Handle"] for f in current}
+        changed = {f["attributes"]["Handle"] for f in edited}
+        changed |= handles - set(state["hashes"])
+    else:
+        print("  Attribute hashes (layer has no edit-date field)")
+        fields = hash_fields(state)
+        current = fetch_features(endpoint, out_fields=",".join(fields), return_geometry=False)
+        handles = {f["attributes"]["Handle"] for f in current}
+        changed = {
+            f["attributes"]["Handle"] for f in current
+            if state["hashes"].get(f["attributes"]["Handle"]) != attribute_hash(f["attributes"], fields)
+        }
+    return changed & handles, set(state["hashes"]) - handles
+
+
+def fetch_by_handle(endpoint, handles, out_fields):
+    """Features (with geometry) for specific Handles, in batches."""
+    handles = sorted(handles)
+    features = []
+    for i in range(0, len(handles), HANDLE_BATCH):
+        quoted = ",".join("'" + h.replace("'", "''") + "'" for h in handles[i:i + HANDLE_BATCH])
+        features.extend(fetch_features(endpoint, where=f"Handle IN ({quoted})", out_fields=out_fields))
+    return features
+
+
+def refresh(output_path):
+    """
+    Merge parcels changed since the last run into stl_parcels.json.
 
-            print(f"Fetched {len(all_features)} total parcels from {endpoint}")
-            return all_features
+    Returns False, changing nothing, when the layer's change fields differ
+    from the ones the state was recorded with (a schema change, or state
+    saved without them); the caller then fetches everything.
+    """
+    with open(SYNC_PATH) as f:
+        state = json.load(f)
+
+    edit_field, shape_fields = change_fields(layer_info(state["endpoint"]))
+    if edit_field != state["edit_field"] or shape_fields != state["shape_fields"]:
+        print("Layer change fields differ from the refresh state; fetching everything")
+        return False
+
+    changed, deleted = changed_handles(state)
+    print(f"\n{len(changed)} changed or new parcels, {len(deleted)} removed")
+    if not changed and not deleted:
+        print("Parcels are up to date.")
+        return True
+
+    out_fields = ",".join([OUT_FIELDS] + ([state["edit_field"]] if state["edit_field"] else [])
+                          + state["shape_fields"])
+    features = fetch_by_handle(state["endpoint"], changed, out_fields) if changed else []
+
+    with open(output_path) as f:
+        output = json.load(f)
+    fresh = {}
+    for feature in features:
+        parcel = extract_parcel(feature)
+        if parcel:
+            fresh[parcel["handle"]] = parcel
+    drop = changed | deleted
+    parcels = [fresh.pop(p["handle"], None) if p["handle"] in drop else p for p in output["parcels"]]
+    parcels = [p for p in parcels if p] + list(fresh.values())
 
-        except Exception as e:
-            print(f"  Failed: {e}")
-            continue
+    output["parcels"] = parcels
+    output["count"] = len(parcels)
+    with span("write stl_parcels.json"), open(output_path, "w") as f:
+        json.dump(output, f, indent=2)
 
-    print("All endpoints failed. No parcel data fetched.")
-    return []
+    for handle in deleted:
+        state["hashes"].pop(handle, None)
+    update_sync_state(state, features)
+    with open(SYNC_PATH, "w") as f:
+        json.dump(state, f)
+    print(f"Merged {len(features)} parcels into {output_path} ({len(parcels)} total)")
+    return True
 
 
 def polygon_centroid(rings):
@@ -175,13 +365,13 @@ def convert_rings_to_local(rings):
 
     Returns list of rings, each ring a list of [x, z] pairs (rounded).
     """
+    # All rings in one call, then split back at the ring boundaries
+    local = lonlat_to_local([pt[:2] for ring in rings for pt in ring]).tolist()
     local_rings = []
+    start = 0
     for ring in rings:
-        local_ring = []
-        for pt in ring:
-            x, z = wgs84_to_local(pt[0], pt[1])
-            local_ring.append([round(x, 2), round(z, 2)])
-        local_rings.append(local_ring)
+        local_rings.append([[round(x, 2), round(z, 2)] for x, z in local[start:start + len(ring)]])
+        start += len(ring)
     return local_rings
 
 
@@ -241,15 +431,33 @@ def extract_parcel(feature):
     }
 
 
+def print_transfer():
+    print(f"Transferred {transfer['bytes'] / 1024:.1f} KB in {transfer['requests']} requests")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Fetch St. Louis parcel data")
+    parser.add_argument("--refresh", action="store_true",
+                        help="fetch geometry only for parcels changed since the last run")
+    args = parser.parse_args()
+
     ensure_dirs()
+    output_path = os.path.join(RAW_DIR, "stl_parcels.json")
 
     print("=" * 60)
-    print("Fetching St. Louis parcel data for Lafayette Square")
-    print(f"Bounding box: {BBOX}")
+    print(f"Fetching St. Louis parcel data for {REGION['title']}")
+    print(f"Bounding box: {FETCH_BBOX}")
     print("=" * 60)
 
-    raw_features = fetch_all_parcels()
+    if args.refresh:
+        if os.path.exists(SYNC_PATH) and os.path.exists(output_path):
+            if refresh(output_path):
+                print_transfer()
+                return
+        else:
+            print("No refresh state yet; fetching everything")
+
+    endpoint, raw_features, info = fetch_all_parcels()
     if not raw_features:
         print("No features fetched. Exiting.")
         sys.exit(1)
@@ -294,18 +502,27 @@ def main():
         print(f"  {z}: {count}")
 
     # Save
-    import os
-    output_path = os.path.join(RAW_DIR, "stl_parcels.json")
     with open(output_path, "w") as f:
         json.dump({
             "parcels": parcels,
             "count": len(parcels),
-            "bbox": BBOX,
+            "bbox": FETCH_BBOX,
             "source": "St. Louis Open Data ArcGIS REST API",
         }, f, indent=2)
 
     print(f"\nSaved {len(parcels)} parcels to {output_path}")
 
+    edit_field, shape_fields = change_fields(info)
+    state = {"endpoint": endpoint, "edit_field": edit_field, "shape_fields": shape_fields,
+             "last_edit": None, "hashes": {}}
+    update_sync_state(state, raw_features)
+    with open(SYNC_PATH, "w") as f:
+        json.dump(state, f)
+    mode = f"edit dates ({edit_field})" if edit_field else "attribute hashes"
+    print(f"Refresh state ({mode}) saved to {SYNC_PATH}")
+    print_transfer()
+
 
 if __name__ == "__main__":
-    main()
+    with span('03-fetch-stl-parcels', cat='stage'):
+        main()
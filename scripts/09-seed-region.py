@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Seed a region's base buildings and landmarks from the region it is cut from.
+
+buildings.json and landmarks.json are maintained by hand for the default
+region (Overture footprints, curated landmarks); nothing fetches them. A
+region registered with 'seed_from' (regions.py) gets them by clipping that
+region's files to its own bbox: buildings whose position lies inside it,
+and the landmarks on those buildings. Both regions must share a projection
+frame, so local coordinates carry over unchanged. The clip is skipped when
+neither source file nor the bbox changed since the last seed, which keeps
+11-merge-all's incremental state valid. Regions without 'seed_from' have
+nothing to do here.
+
+Usage: LSQ_REGION=lafayette-park python scripts/09-seed-region.py
+
+Inputs:
+  <seed region DATA_DIR>/buildings.json
+  <seed region DATA_DIR>/landmarks.json   (optional)
+
+Outputs:
+  src/data/regions/<namespace>/buildings.json
+  src/data/regions/<namespace>/landmarks.json
+  <REGION_RAW_DIR>/seed_state.json        (source digests of the last seed)
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from config import BBOX, DATA_DIR, PROJECT_DIR, REGION, REGION_RAW_DIR, SCRIPTS_DIR, ensure_dirs, \
+    wgs84_to_local
+from regions import frame, get_region, region_paths
+from tracing import span
+
+SEED_STATE_PATH = os.path.join(REGION_RAW_DIR, 'seed_state.json')
+
+
+def read_digest(path):
+    """(parsed JSON, sha1 of the bytes), or (None, None) if missing."""
+    if not os.path.isfile(path):
+        return None, None
+    with open(path, 'rb') as f:
+        text = f.read()
+    return json.loads(text), hashlib.sha1(text).hexdigest()
+
+
+def write_json(path, data):
+    """Write via a temporary file and os.replace (2-space indent, as 11-merge-all writes)."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def clip(buildings, landmarks, bbox):
+    """Buildings positioned inside bbox, and the landmarks on them."""
+    x0, z1 = wgs84_to_local(bbox['min_lon'], bbox['min_lat'])
+    x1, z0 = wgs84_to_local(bbox['max_lon'], bbox['max_lat'])
+    kept = [b for b in buildings
+            if b.get('position') and x0 <= b['position'][0] <= x1 and z0 <= b['position'][2] <= z1]
+    ids = {b['id'] for b in kept}
+    return kept, [lm for lm in landmarks if lm.get('building_id') in ids]
+
+
+def main():
+    parent_name = REGION.get('seed_from')
+    if not parent_name:
+        print(f"{REGION['title']} has no seed_from region; nothing to seed")
+        return
+
+    parent = get_region(parent_name)
+    if frame(parent) != frame(REGION):
+        print(f"ERROR: {REGION['name']} and its seed region {parent_name} have different "
+              "projection frames")
+        sys.exit(1)
+
+    ensure_dirs()
+    parent_dir = region_paths(parent_name, SCRIPTS_DIR, PROJECT_DIR)['data']
+    with span('load seed region'):
+        buildings_data, buildings_digest = read_digest(os.path.join(parent_dir, 'buildings.json'))
+        landmarks_data, landmarks_digest = read_digest(os.path.join(parent_dir, 'landmarks.json'))
+    if buildings_data is None:
+        print(f"ERROR: {parent_name} has no buildings.json in {parent_dir}")
+        sys.exit(1)
+
+    state = {'seed_from': parent_name, 'bbox': BBOX,
+             'buildings': buildings_digest, 'landmarks': landmarks_digest}
+    buildings_path = os.path.join(DATA_DIR, 'buildings.json')
+    landmarks_path = os.path.join(DATA_DIR, 'landmarks.json')
+    previous, _ = read_digest(SEED_STATE_PATH)
+    if previous == state and os.path.isfile(buildings_path) and os.path.isfile(landmarks_path):
+        print(f"{REGION['title']}: {parent_name} unchanged since the last seed; keeping "
+              f"{os.path.relpath(buildings_path, PROJECT_DIR)}")
+        return
+
+    # Handle both {"buildings": [...]} and [...] formats, as 11-merge-all does
+    buildings, landmarks = buildings_data, landmarks_data or []
+    if isinstance(buildings, dict):
+        buildings = buildings.get('buildings', [])
+    if isinstance(landmarks, dict):
+        landmarks = landmarks.get('landmarks', [])
+    with span('clip'):
+        buildings, landmarks = clip(buildings, landmarks, BBOX)
+
+    with span('write seed'):
+        write_json(buildings_path, {'buildings': buildings})
+        write_json(landmarks_path, {'landmarks': landmarks})
+        write_json(SEED_STATE_PATH, state)
+    print(f"{REGION['title']}: seeded {len(buildings)} buildings and {len(landmarks)} landmarks "
+          f"from {parent_name} into {os.path.relpath(DATA_DIR, PROJECT_DIR)}")
+
+
+if __name__ == '__main__':
+    with span('09-seed-region', cat='stage'):
+        main()
@@ -5,22 +5,50 @@ Fetch street-level facade imagery from Mapillary API v4 for Lafayette Square bui
 Queries the Mapillary image search endpoint for all street-level photos within the
 Lafayette Square bounding box, then matches each building to its nearest facade image.
 
-Usage: python scripts/10-fetch-mapillary.py
+With --occlusion, matching targets each building's street-facing edge instead of its
+centroid: sight lines from the camera to points along the facade are cast against
+every footprint edge (grid-indexed), occluded candidates are rejected, and images that
+see the facade head-on are preferred.
+
+With --incremental, only images captured since the newest captured_at in
+raw/mapillary_images.json are requested and appended, and only buildings within
+MAX_MATCH_DISTANCE of a new image (found through a grid index over the new cameras)
+are re-matched; every other building keeps its match. A change of matching mode or of
+building geometry since the last run falls back to matching every building.
+
+With --sharded, matching runs over tiles in a process pool (sharding.py): each
+building is matched by the tile owning its centroid (front edge midpoint with
+--occlusion), with the images and occluding footprints within reach of the tile
+copied in. The matches are identical to a single-process run.
+
+Usage: python scripts/10-fetch-mapillary.py [--occlusion] [--incremental]
+                                            [--sharded [--workers N] [--tile-size M]]
 
 Requires:
   - MAPILLARY_ACCESS_TOKEN environment variable
   - src/data/buildings.json (from earlier pipeline steps)
+  - --occlusion: src/data/front_edges.json (match_facades.py), or
+    src/data/streets.json to compute front edges here
 
-Outputs:
+Outputs (REGION_RAW_DIR: scripts/raw for the default region, see regions.py):
   scripts/raw/mapillary_images.json   (all images with local coords)
   scripts/raw/mapillary_matches.json  (building-to-image matches)
+
+Both depend on the region (its bbox and buildings), so they are kept per region
+even when the fetch cache is shared.
 """
 
+import argparse
+import datetime
+import hashlib
 import json
 import math
+import os
 import sys
 import time
 
+import numpy as np
+
 try:
     import requests
 except ImportError:
@@ -32,24 +60,36 @@ from config import (
     CENTER_LAT,
     CENTER_LON,
     BBOX,
-    LON_TO_METERS,
-    LAT_TO_METERS,
-    wgs84_to_local,
+    lonlat_to_local,
     ensure_dirs,
-    RAW_DIR,
+    REGION_RAW_DIR,
     DATA_DIR,
     MAPILLARY_TOKEN,
+    MAPILLARY_URL,
 )
+from sharding import TILE_SIZE, run, shard
+from spatial import polyline_segments, query_boxes, segment_index, segments_cross
+from tracing import span, traced
 
-MAPILLARY_API_URL = "https://graph.mapillary.com/images"
+MAPILLARY_API_URL = MAPILLARY_URL
 IMAGE_FIELDS = "id,captured_at,compass_angle,geometry,thumb_256_url,thumb_1024_url,thumb_2048_url"
 MAX_MATCH_DISTANCE = 30.0  # meters
 PAGE_DELAY = 0.5  # seconds between paginated requests
 
+# --occlusion mode
+OCCLUSION_CELL = 10.0          # meters — grid cell of the footprint edge index
+FACADE_SAMPLES = (0.2, 0.5, 0.8)  # sight-line targets along the front edge
+SIGHT_OFFSET = 0.05            # meters — targets sit just outside the facade
+MIN_VISIBLE = 2 / 3            # fraction of sight lines that must be clear
+HEAD_ON_WEIGHT = 10.0          # score penalty for a fully grazing view
+RAY_CHUNK = 50000              # sight lines tested per batch
+
 
-def fetch_mapillary_images():
+@traced('fetch images')
+def fetch_mapillary_images(start_captured_at=None):
     """
-    Fetch all Mapillary images within the BBOX.
+    Fetch all Mapillary images within the BBOX, or only those captured at or
+    after start_captured_at (ISO 8601) when given.
     Handles pagination automatically.
     Returns a list of image dicts from the API.
     """
@@ -60,6 +100,8 @@ def fetch_mapillary_images():
         "bbox": bbox_str,
         "limit": 2000,
     }
+    if start_captured_at:
+        params["start_captured_at"] = start_captured_at
 
     all_images = []
     page = 1
@@ -99,20 +141,18 @@ def fetch_mapillary_images():
     return all_images
 
 
+@traced('parse images')
 def enrich_images_with_local_coords(images):
     """
     Convert each image's WGS84 geometry to local coordinates and add to dict.
     Returns a list of enriched image dicts.
     """
-    enriched = []
-    for img in images:
-        geom = img.get("geometry", {})
-        coords = geom.get("coordinates", [])
-        if len(coords) < 2:
-            continue
+    located = [img for img in images if len(img.get("geometry", {}).get("coordinates", [])) >= 2]
+    local = lonlat_to_local([img["geometry"]["coordinates"][:2] for img in located]).tolist()
 
-        lon, lat = coords[0], coords[1]
-        x, z = wgs84_to_local(lon, lat)
+    enriched = []
+    for img, (x, z) in zip(located, local):
+        lon, lat = img["geometry"]["coordinates"][:2]
 
         enriched.append({
             "image_id": str(img["id"]),
@@ -153,6 +193,7 @@ def angle_diff(a, b):
     return diff
 
 
+@traced('match images')
 def match_buildings_to_images(buildings, images):
     """
     For each building, find the closest Mapillary image within MAX_MATCH_DISTANCE.
@@ -214,7 +255,249 @@ def match_buildings_to_images(buildings, images):
     return matches
 
 
+def load_front_edges(buildings):
+    """Street-facing edge per building id (front_edges.json, else computed)."""
+    path = f"{DATA_DIR}/front_edges.json"
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    from match_facades import compute_front_edges, index_streets
+    with open(f"{DATA_DIR}/streets.json", "r") as f:
+        streets = json.load(f)["streets"]
+    print(f"  {path} not found; computing front edges from street geometry...")
+    return compute_front_edges(buildings, index_streets(streets))
+
+
+def footprint_edge_index(buildings):
+    """Grid index over the closed footprint rings of all buildings."""
+    rings = [fp + fp[:1] for fp in (b.get("footprint") or [] for b in buildings) if len(fp) >= 3]
+    a, b, _ = polyline_segments(rings)
+    return segment_index(a, b, OCCLUSION_CELL)
+
+
+def blocked_sight_lines(index, p, q):
+    """True where segment p[i] -> q[i] properly crosses any indexed edge."""
+    blocked = np.zeros(len(p), dtype=bool)
+    for s in range(0, len(p), RAY_CHUNK):
+        p1, p2 = p[s:s + RAY_CHUNK], q[s:s + RAY_CHUNK]
+        ray, seg = query_boxes(index, np.minimum(p1, p2), np.maximum(p1, p2))
+        hit = segments_cross(p1[ray], p2[ray], index["a"][seg], index["b"][seg])
+        blocked[s + ray[hit]] = True
+    return blocked
+
+
+@traced('match images (occlusion)')
+def match_buildings_occlusion(buildings, images, front_edges):
+    """
+    For each building, the best unoccluded image of its street-facing edge.
+
+    Candidates are images within MAX_MATCH_DISTANCE of the front edge midpoint
+    and in front of it. Sight lines to FACADE_SAMPLES points along the edge
+    are tested against all footprint edges; candidates with fewer than
+    MIN_VISIBLE clear lines are rejected. Score (lower is better) adds the
+    compass-facing term of the centroid mode and a head-on term to distance.
+
+    Returns a list of match dicts.
+    """
+    bldgs = [b for b in buildings if b["id"] in front_edges]
+    if not bldgs or not images:
+        return []
+    edges = [front_edges[b["id"]] for b in bldgs]
+    mid = np.array([[e["mid_x"], e["mid_z"]] for e in edges], dtype=np.float64)
+    normal = np.array([[e["nx"], e["nz"]] for e in edges], dtype=np.float64)
+    normal /= np.maximum(np.hypot(normal[:, 0], normal[:, 1]), 1e-9)[:, None]
+    tangent = np.column_stack([-normal[:, 1], normal[:, 0]])
+    width = np.array([e["width"] for e in edges], dtype=np.float64)
+
+    cams = np.array([[img["local_x"], img["local_z"]] for img in images], dtype=np.float64)
+    compass = np.array([np.nan if img.get("compass_angle") is None else img["compass_angle"]
+                        for img in images], dtype=np.float64)
+
+    # Candidate (building, image) pairs: images indexed as zero-length segments
+    image_index = segment_index(cams, cams, MAX_MATCH_DISTANCE)
+    bi, ii = query_boxes(image_index, mid - MAX_MATCH_DISTANCE, mid + MAX_MATCH_DISTANCE)
+    view = cams[ii] - mid[bi]
+    dist = np.hypot(view[:, 0], view[:, 1])
+    ahead = (view * normal[bi]).sum(axis=1)
+    keep = (dist <= MAX_MATCH_DISTANCE) & (ahead > 0)
+    bi, ii, view, dist, ahead = bi[keep], ii[keep], view[keep], dist[keep], ahead[keep]
+
+    # Sight lines from the camera to points along the facade
+    index = footprint_edge_index(buildings)
+    clear = np.zeros(len(bi))
+    for t in FACADE_SAMPLES:
+        target = (mid[bi] + tangent[bi] * ((t - 0.5) * width[bi])[:, None]
+                  + normal[bi] * SIGHT_OFFSET)
+        clear += ~blocked_sight_lines(index, cams[ii], target)
+    visible = clear / len(FACADE_SAMPLES)
+
+    # Compass angle vs bearing from image to facade (no compass: 90° off)
+    bearing = np.degrees(np.arctan2(-view[:, 0], view[:, 1])) % 360
+    facing_diff = np.abs(compass[ii] - bearing) % 360
+    facing_diff = np.where(facing_diff > 180, 360 - facing_diff, facing_diff)
+    facing_diff = np.where(np.isnan(facing_diff), 90.0, facing_diff)
+    head_on = ahead / np.maximum(dist, 1e-9)
+
+    score = (dist + (facing_diff / 180.0) * 10.0
+             + (1 - head_on) * HEAD_ON_WEIGHT + (1 - visible) * 10.0)
+    score[visible < MIN_VISIBLE] = np.inf
+
+    # Best candidate per building (lowest score, then image order)
+    order = np.lexsort((ii, score, bi))
+    first = order[np.r_[True, bi[order][1:] != bi[order][:-1]]] if len(order) else order
+
+    matches = []
+    for k in first:
+        if not np.isfinite(score[k]):
+            continue
+        img = images[ii[k]]
+        matches.append({
+            "building_id": bldgs[bi[k]]["id"],
+            "image_id": img["image_id"],
+            "thumb_256_url": img["thumb_256_url"],
+            "thumb_1024_url": img["thumb_1024_url"],
+            "thumb_2048_url": img["thumb_2048_url"],
+            "captured_at": img["captured_at"],
+            "compass_angle": img.get("compass_angle"),
+            "distance": round(float(dist[k]), 1),
+            "head_on": round(float(head_on[k]), 3),
+            "visible": round(float(visible[k]), 2),
+        })
+
+    rejected = int((visible < MIN_VISIBLE).sum())
+    print(f"  {len(bi)} facade/image candidates, {rejected} rejected as occluded")
+    return matches
+
+
+def _match_tile(buildings, images, front_edges):
+    if front_edges is None:
+        return match_buildings_to_images(buildings, images)
+    return match_buildings_occlusion(buildings, images, front_edges)
+
+
+@traced('match images (sharded)')
+def match_sharded(buildings, images, front_edges=None, workers=None, tile_size=TILE_SIZE):
+    """
+    match_buildings_to_images(), or match_buildings_occlusion() when
+    front_edges is given, over tiles in a process pool; identical matches.
+
+    Images within MAX_MATCH_DISTANCE of a tile are copied into it. With
+    front_edges, so is every footprint that can cross a sight line from
+    such an image to a facade owned by the tile.
+    """
+    cams = np.array([[img["local_x"], img["local_z"]] for img in images],
+                    dtype=np.float64).reshape(-1, 2)
+    if front_edges is None:
+        owned_ids = [b["id"] for b in buildings]
+        anchors = [[b["position"][0], b["position"][2]] for b in buildings]
+        sources = [(cams, cams, MAX_MATCH_DISTANCE)]
+    else:
+        owned_ids = [b["id"] for b in buildings if b["id"] in front_edges]
+        anchors = [[front_edges[bid]["mid_x"], front_edges[bid]["mid_z"]] for bid in owned_ids]
+        # Sight lines run from a camera to a point on the facade
+        reach = max([MAX_MATCH_DISTANCE] + [front_edges[bid]["width"] / 2 + SIGHT_OFFSET
+                                             for bid in owned_ids])
+        lo = np.full((len(buildings), 2), np.nan)
+        hi = np.full((len(buildings), 2), np.nan)
+        for i, b in enumerate(buildings):
+            if len(b.get("footprint") or []) >= 3:
+                fp = np.asarray(b["footprint"], dtype=np.float64)
+                lo[i], hi[i] = fp.min(axis=0), fp.max(axis=0)
+        sources = [(cams, cams, MAX_MATCH_DISTANCE), (lo, hi, reach)]
+
+    position = {b["id"]: i for i, b in enumerate(buildings)}
+    jobs = []
+    for owned, picked in shard(anchors, sources, tile_size):
+        tile_images = [images[k] for k in picked[0]]
+        if front_edges is None:
+            jobs.append(([buildings[i] for i in owned], tile_images, None))
+        else:
+            ids = [owned_ids[i] for i in owned]
+            # Owned buildings always take part, footprint or not
+            near = sorted(set(picked[1].tolist()) | {position[bid] for bid in ids})
+            jobs.append(([buildings[i] for i in near], tile_images,
+                         {bid: front_edges[bid] for bid in ids}))
+    print(f"  {len(owned_ids)} buildings in {len(jobs)} tiles of {tile_size:.0f} m")
+
+    matches = [m for tile in run(_match_tile, jobs, workers) for m in tile]
+    matches.sort(key=lambda m: position[m["building_id"]])
+    return matches
+
+
+def newest_capture(images):
+    """ISO 8601 time of the newest captured_at (epoch ms) among images, or None."""
+    times = [img["captured_at"] for img in images if img.get("captured_at") is not None]
+    if not times:
+        return None
+    when = datetime.datetime.fromtimestamp(max(times) / 1000, tz=datetime.timezone.utc)
+    return when.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def geometry_digest(buildings, mode):
+    """Hash of what matching reads from buildings (ids, positions, footprints) and the mode."""
+    h = hashlib.sha1(mode.encode())
+    for b in buildings:
+        h.update(json.dumps([b["id"], b.get("position"), b.get("footprint")]).encode())
+    return h.hexdigest()
+
+
+@traced('index new images')
+def buildings_near_images(buildings, images, front_edges=None):
+    """
+    Ids of buildings within MAX_MATCH_DISTANCE of any of the given images:
+    the only buildings whose match those images can change. Distance is to
+    the centroid, or to the front edge midpoint when front_edges is given
+    (the candidate test of each matching mode).
+    """
+    if front_edges is None:
+        bldgs = buildings
+        anchor = [[b["position"][0], b["position"][2]] for b in bldgs]
+    else:
+        bldgs = [b for b in buildings if b["id"] in front_edges]
+        anchor = [[front_edges[b["id"]]["mid_x"], front_edges[b["id"]]["mid_z"]] for b in bldgs]
+    if not bldgs or not images:
+        return set()
+    anchor = np.array(anchor, dtype=np.float64)
+    cams = np.array([[img["local_x"], img["local_z"]] for img in images], dtype=np.float64)
+
+    index = segment_index(cams, cams, MAX_MATCH_DISTANCE)
+    bi, ii = query_boxes(index, anchor - MAX_MATCH_DISTANCE, anchor + MAX_MATCH_DISTANCE)
+    near = np.hypot(*(cams[ii] - anchor[bi]).T) <= MAX_MATCH_DISTANCE
+    return {bldgs[i]["id"] for i in np.unique(bi[near])}
+
+
+def merge_matches(old, new, affected, buildings):
+    """Old matches with the affected buildings' replaced by new, in building order."""
+    merged = {m["building_id"]: m for m in old if m["building_id"] not in affected}
+    merged.update((m["building_id"], m) for m in new)
+    return [merged[b["id"]] for b in buildings if b["id"] in merged]
+
+
+def load_previous_run(images_path, matches_path):
+    """(images, matches file) from the last run, or (None, None) if either is missing."""
+    if not (os.path.exists(images_path) and os.path.exists(matches_path)):
+        return None, None
+    with open(images_path, "r") as f:
+        images = json.load(f)["images"]
+    with open(matches_path, "r") as f:
+        return images, json.load(f)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Fetch and match Mapillary facade imagery")
+    parser.add_argument("--occlusion", action="store_true",
+                        help="match front edges with sight-line occlusion tests")
+    parser.add_argument("--incremental", action="store_true",
+                        help="fetch only images newer than the last run and re-match nearby buildings")
+    parser.add_argument("--sharded", action="store_true",
+                        help="match tile by tile in a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="--sharded pool size (default: all cores)")
+    parser.add_argument("--tile-size", type=float, default=TILE_SIZE, help="--sharded tile edge (meters)")
+    args = parser.parse_args()
+    mode = "occlusion" if args.occlusion else "centroid"
+    raw_images_path = f"{REGION_RAW_DIR}/mapillary_images.json"
+    matches_path = f"{REGION_RAW_DIR}/mapillary_matches.json"
+
     # 1. Check for Mapillary token
     if not MAPILLARY_TOKEN:
         print("Error: MAPILLARY_ACCESS_TOKEN environment variable is not set.")
@@ -241,36 +524,77 @@ def main():
     buildings = buildings_data.get("buildings", [])
     print(f"  Loaded {len(buildings)} buildings.")
 
-    # 3. Fetch Mapillary images
+    # 3. Fetch Mapillary images (incremental: only those since the last run)
+    old_images, old_run = None, None
+    if args.incremental:
+        old_images, old_run = load_previous_run(raw_images_path, matches_path)
+        if old_images is None:
+            print("\nNo previous run in raw/; fetching every image.")
+    since = newest_capture(old_images) if old_images else None
+
     print(f"\nFetching Mapillary images for BBOX "
-          f"[{BBOX['min_lon']}, {BBOX['min_lat']}, {BBOX['max_lon']}, {BBOX['max_lat']}]...")
-    raw_images = fetch_mapillary_images()
+          f"[{BBOX['min_lon']}, {BBOX['min_lat']}, {BBOX['max_lon']}, {BBOX['max_lat']}]"
+          + (f" captured since {since}..." if since else "..."))
+    raw_images = fetch_mapillary_images(since)
     print(f"\nTotal images fetched: {len(raw_images)}")
 
-    if not raw_images:
+    if not raw_images and old_images is None:
         print("No images found in the area. Check your BBOX or token.")
         sys.exit(0)
 
     # 4. Enrich with local coordinates
     print("\nConverting image coordinates to local space...")
-    enriched_images = enrich_images_with_local_coords(raw_images)
-    print(f"  {len(enriched_images)} images with valid coordinates.")
+    fetched_images = enrich_images_with_local_coords(raw_images)
+    print(f"  {len(fetched_images)} images with valid coordinates.")
+
+    # start_captured_at is inclusive: the newest known image comes back again
+    known = {img["image_id"] for img in old_images or []}
+    new_images = [img for img in fetched_images if img["image_id"] not in known]
+    enriched_images = (old_images or []) + new_images
+    if old_images is not None:
+        print(f"  {len(new_images)} new since the last run ({len(enriched_images)} in total).")
 
     # 5. Save raw images
-    raw_images_path = f"{RAW_DIR}/mapillary_images.json"
     print(f"\nSaving all images to {raw_images_path}...")
-    with open(raw_images_path, "w") as f:
+    with span('write mapillary_images.json'), open(raw_images_path, "w") as f:
         json.dump({"images": enriched_images, "count": len(enriched_images)}, f, indent=2)
     print(f"  Saved {len(enriched_images)} images.")
 
-    # 6. Match buildings to images
-    print("\nMatching buildings to nearest facade images...")
-    matches = match_buildings_to_images(buildings, enriched_images)
+    # 6. Match buildings to images (incremental: only those near a new image)
+    digest = geometry_digest(buildings, mode)
+    front_edges = load_front_edges(buildings) if args.occlusion else None
+    affected = None
+    if old_run is not None:
+        if old_run.get("digest") == digest:
+            affected = buildings_near_images(buildings, new_images, front_edges)
+            print(f"\n{len(affected)} buildings within {MAX_MATCH_DISTANCE}m of a new image.")
+        else:
+            print("\nMatching mode or building geometry changed since the last run; "
+                  "re-matching every building.")
+    targets = buildings if affected is None else [b for b in buildings if b["id"] in affected]
+
+    if args.occlusion:
+        print("\nMatching front edges to unoccluded facade images...")
+        t0 = time.perf_counter()
+        # Every footprint still occludes; only the targets' front edges are matched
+        edges = {bid: e for bid, e in front_edges.items() if affected is None or bid in affected}
+        if args.sharded:
+            matches = match_sharded(buildings, enriched_images, edges, args.workers, args.tile_size)
+        else:
+            matches = match_buildings_occlusion(buildings, enriched_images, edges)
+        print(f"  Matched in {time.perf_counter() - t0:.2f}s")
+    else:
+        print("\nMatching buildings to nearest facade images...")
+        if args.sharded:
+            matches = match_sharded(targets, enriched_images, None, args.workers, args.tile_size)
+        else:
+            matches = match_buildings_to_images(targets, enriched_images)
+    if affected is not None:
+        matches = merge_matches(old_run["matches"], matches, affected, buildings)
 
-    matches_path = f"{RAW_DIR}/mapillary_matches.json"
     print(f"Saving matches to {matches_path}...")
-    with open(matches_path, "w") as f:
-        json.dump({"matches": matches}, f, indent=2)
+    with span('write mapillary_matches.json'), open(matches_path, "w") as f:
+        json.dump({"matches": matches, "mode": mode, "digest": digest}, f, indent=2)
 
     # 7. Summary
     total_buildings = len(buildings)
@@ -285,8 +609,13 @@ def main():
     print(f"  Buildings matched:       {matched_buildings}")
     print(f"  Coverage:                {coverage:.1f}%")
     print(f"  Max match distance:      {MAX_MATCH_DISTANCE}m")
+    print(f"  Matching mode:           {mode}")
+    if affected is not None:
+        print(f"  Images added:            {len(new_images)}")
+        print(f"  Buildings re-matched:    {len(affected)}")
     print("=" * 50)
 
 
 if __name__ == "__main__":
-    main()
+    with span('10-fetch-mapillary', cat='stage'):
+        main()
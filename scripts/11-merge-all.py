@@ -6,7 +6,21 @@ Combines Overture building footprints (primary geometry) with enrichment data
 from OSM buildings, OSM POIs, STL Assessor parcels, and Mapillary street-view
 imagery. Also enriches landmarks with POI metadata and building associations.
 
-Usage: python scripts/11-merge-all.py
+Runs are incremental: raw/merge_state.json records a digest of every
+enrichment record (with its position) and, per building, a digest of the
+records it matched. The next run re-enriches only buildings within match
+range of a record that was added, removed, moved or edited (or whose
+Mapillary match changed), and skips landmark enrichment when its inputs are
+unchanged. Outputs are written to a temporary file and swapped in with
+os.replace. New, removed or reshaped base buildings (a change to any
+building's id, position, footprint or size), or --full, re-enrich
+everything; fields other stages add afterwards (classify_materials.py)
+don't count.
+
+With --sharded, building matching runs over HALO-padded tiles in a process
+pool (sharding.py), for citywide extents; the output is identical.
+
+Usage: python scripts/11-merge-all.py [--full] [--sharded [--workers N] [--tile-size M]]
 
 Inputs (base):
   src/data/buildings.json   — Overture building footprints (primary)
@@ -16,19 +30,45 @@ Inputs (enrichment, from scripts/raw/):
   osm_buildings.json        — OSM building tags
   osm_pois.json             — OSM POI metadata
   stl_parcels.json          — STL City Assessor parcel data
-  mapillary_matches.json    — Mapillary street-view image matches
+  mapillary_matches.json    — Mapillary street-view image matches (per region: REGION_RAW_DIR)
 
 Outputs:
   src/data/buildings.json   — enriched building data
   src/data/landmarks.json   — enriched landmarks with building refs
+  scripts/raw/merge_state.json — record digests for the next incremental run
 """
 
+import argparse
+import functools
+import hashlib
 import json
 import math
 import os
 import sys
 
-from config import CENTER_LAT, CENTER_LON, BBOX, wgs84_to_local, ensure_dirs, RAW_DIR, DATA_DIR, BUILDING_COLORS
+import numpy as np
+
+from config import CENTER_LAT, CENTER_LON, BBOX, wgs84_to_local, ensure_dirs, RAW_DIR, REGION_RAW_DIR, DATA_DIR, \
+    BUILDING_COLORS
+from sharding import HALO, TILE_SIZE, run, shard
+from spatial import query_boxes, segment_index
+from textindex import build_trigram_index, normalize_name, search
+from tracing import span, traced
+
+# Fuzzy landmark name matching
+MIN_NAME_SIMILARITY = 0.6     # trigram similarity to accept a fuzzy POI name match (located landmarks)
+MIN_OWNER_SIMILARITY = 0.75   # stricter for parcel owner names (locating only)
+NAME_MATCH_RADIUS = 200       # meters — located name matches farther than this are rejected
+DISTANCE_WEIGHT = 0.5         # score lost by a match at NAME_MATCH_RADIUS
+
+# Building match radii, shared by enrich_buildings and the dirty-building search
+OSM_MATCH_RADIUS = 25         # meters — OSM buildings and POIs
+PARCEL_MATCH_RADIUS = 30      # meters — parcel centroids
+
+MERGE_STATE_PATH = os.path.join(REGION_RAW_DIR, 'merge_state.json')
+BASE_KEYS = ('id', 'position', 'footprint', 'size')   # base fields in the merge state digest
+STAT_KEYS = ('year_built', 'address', 'facade_image', 'material',
+             'stories_enriched', 'architect', 'historic', 'assessed')
 
 
 # ---------------------------------------------------------------------------
@@ -44,6 +84,15 @@ def centroid_of_footprint(footprint):
     return sum(xs) / len(xs), sum(zs) / len(zs)
 
 
+def building_centroid(bldg):
+    """Footprint centroid of a building, else its position, as (x, z)."""
+    bx, bz = centroid_of_footprint(bldg.get('footprint', []))
+    if bx is None:
+        pos = bldg.get('position', [0, 0, 0])
+        bx, bz = pos[0], pos[2]
+    return bx, bz
+
+
 def distance_2d(x1, z1, x2, z2):
     """Euclidean distance in the XZ plane (meters)."""
     return math.sqrt((x1 - x2) ** 2 + (z1 - z2) ** 2)
@@ -58,18 +107,34 @@ def load_json(path, label):
     if not os.path.isfile(path):
         print(f"  [{label}] not found — skipping: {os.path.basename(path)}")
         return None
-    with open(path, 'r') as f:
+    with span(f'load {os.path.basename(path)}'), open(path, 'r') as f:
         data = json.load(f)
     count = len(data) if isinstance(data, list) else len(data.get(next(iter(data)), [])) if isinstance(data, dict) and data else 0
     print(f"  [{label}] loaded {count} records from {os.path.basename(path)}")
     return data
 
 
-def write_json(path, data, label):
-    """Write data to a JSON file with 2-space indent."""
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=2)
+def write_json(path, data, label, indent=2):
+    """
+    Write data to a JSON file (2-space indent) via a temporary file and
+    os.replace, so readers never see a partial file. Returns the digest of
+    the bytes written.
+    """
+    text = json.dumps(data, indent=indent).encode()
+    tmp = f'{path}.tmp'
+    with span(f'write {os.path.basename(path)}'):
+        with open(tmp, 'wb') as f:
+            f.write(text)
+        os.replace(tmp, path)
     print(f"  [{label}] written to {os.path.basename(path)}")
+    return hashlib.sha1(text).hexdigest()
+
+
+def load_base(path):
+    """(parsed JSON, digest of its bytes) for a base data file."""
+    with span(f'load {os.path.basename(path)}'), open(path, 'rb') as f:
+        text = f.read()
+    return json.loads(text), hashlib.sha1(text).hexdigest()
 
 
 # ---------------------------------------------------------------------------
@@ -194,8 +259,24 @@ def normalize_material(raw):
 # Enrichment logic
 # ---------------------------------------------------------------------------
 
-def enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary):
-    """Apply enrichment data to base building list. Returns enriched list."""
+def record_digest(rec):
+    """Content digest of one enrichment record."""
+    return hashlib.sha1(json.dumps(rec, sort_keys=True, separators=(',', ':')).encode()).hexdigest()[:16]
+
+
+def matched_digest(*records):
+    """Digest of the records a building matched (None where it matched nothing)."""
+    return hashlib.sha1('|'.join(record_digest(r) if r else '-' for r in records).encode()).hexdigest()[:16]
+
+
+@traced('match buildings')
+def enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary, record=None):
+    """
+    Apply enrichment data to base building list. Returns enriched list.
+
+    If record is a dict, record[building id] is set to the digest of the
+    records the building matched and the stats keys it counted toward.
+    """
 
     # Build spatial indices for each enrichment source
     osm_bldg_idx = build_centroid_index(osm_bldgs) if osm_bldgs else []
@@ -214,31 +295,19 @@ def enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary):
           f"osm_poi={len(osm_poi_idx)}, parcel={len(parcel_idx)}, "
           f"mapillary_by_id={len(mapillary_by_id)}")
 
-    stats = {
-        'year_built': 0,
-        'address': 0,
-        'facade_image': 0,
-        'material': 0,
-        'stories_enriched': 0,
-        'architect': 0,
-        'historic': 0,
-        'assessed': 0,
-    }
+    stats = dict.fromkeys(STAT_KEYS, 0)
 
     for i, bldg in enumerate(buildings):
         if i % 200 == 0:
             print(f"  Enriching building {i}/{len(buildings)}...")
 
-        # Building centroid from footprint or position
-        bx, bz = centroid_of_footprint(bldg.get('footprint', []))
-        if bx is None:
-            pos = bldg.get('position', [0, 0, 0])
-            bx, bz = pos[0], pos[2]
+        bx, bz = building_centroid(bldg)
+        counted = dict(stats)
 
         # --- Find nearest matches ---
-        osm_match = find_nearest(bx, bz, osm_bldg_idx, 25) if osm_bldg_idx else None
-        poi_match = find_nearest(bx, bz, osm_poi_idx, 25) if osm_poi_idx else None
-        parcel_match = find_nearest(bx, bz, parcel_idx, 30) if parcel_idx else None
+        osm_match = find_nearest(bx, bz, osm_bldg_idx, OSM_MATCH_RADIUS) if osm_bldg_idx else None
+        poi_match = find_nearest(bx, bz, osm_poi_idx, OSM_MATCH_RADIUS) if osm_poi_idx else None
+        parcel_match = find_nearest(bx, bz, parcel_idx, PARCEL_MATCH_RADIUS) if parcel_idx else None
         mapillary_match = mapillary_by_id.get(bldg.get('id')) if mapillary_by_id else None
 
         # --- year_built: STL parcel > OSM start_date > None ---
@@ -419,41 +488,236 @@ def enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary):
             if poi_name and str(poi_name).strip():
                 bldg['name'] = str(poi_name).strip()
 
+        if record is not None:
+            record[bldg.get('id')] = {
+                'matched': matched_digest(osm_match, poi_match, parcel_match, mapillary_match),
+                'counted': [k for k in stats if stats[k] > counted[k]],
+            }
+
     return buildings, stats
 
 
+def record_coords(records):
+    """(N, 2) local coords of each record as build_centroid_index places it (NaN if unlocated)."""
+    coords = np.full((len(records or []), 2), np.nan)
+    for i, rec in enumerate(records or []):
+        located = build_centroid_index([rec])
+        if located:
+            coords[i] = located[0][:2]
+    return coords
+
+
+def _enrich_tile(buildings, osm_bldgs, osm_pois, parcels, mapillary):
+    record = {}
+    buildings, stats = enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary, record)
+    return buildings, stats, record
+
+
+@traced('match buildings (sharded)')
+def enrich_buildings_sharded(buildings, osm_bldgs, osm_pois, parcels, mapillary, record=None,
+                             workers=None, tile_size=TILE_SIZE):
+    """
+    enrich_buildings() over tiles in a process pool, with identical results.
+
+    Each building is enriched by the tile owning its centroid. OSM buildings,
+    POIs and parcels within HALO (>= every match radius) of a tile are copied
+    into it; Mapillary matches go with their building. Enriched fields are
+    written back into the caller's building dicts, as enrich_buildings does.
+    """
+    assert HALO >= max(OSM_MATCH_RADIUS, PARCEL_MATCH_RADIUS)
+    anchors = np.array([building_centroid(b) for b in buildings], dtype=np.float64).reshape(-1, 2)
+    sources = [osm_bldgs or [], osm_pois or [], parcels or []]
+    with span('shard'):
+        coords = [record_coords(records) for records in sources]
+        tiles = shard(anchors, [(c, c, HALO) for c in coords], tile_size)
+        by_building = {}
+        for m in mapillary or []:
+            by_building.setdefault(m.get('building_id'), []).append(m)
+
+        jobs = []
+        for owned, picked in tiles:
+            tile = [buildings[i] for i in owned]
+            jobs.append((tile, *([records[k] for k in idx] for records, idx in zip(sources, picked)),
+                         [m for b in tile for m in by_building.get(b.get('id'), [])]))
+    print(f"  {len(buildings)} buildings in {len(jobs)} tiles of {tile_size:.0f} m "
+          f"(halo {HALO:.0f} m)")
+
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    for (owned, _), (enriched, tile_stats, tile_record) in zip(tiles, run(_enrich_tile, jobs, workers)):
+        for i, bldg in zip(owned, enriched):
+            buildings[i].update(bldg)
+        for key in STAT_KEYS:
+            stats[key] += tile_stats[key]
+        if record is not None:
+            record.update(tile_record)
+    return buildings, stats
+
+
+# ---------------------------------------------------------------------------
+# Incremental runs: which buildings can a source change affect?
+# ---------------------------------------------------------------------------
+
+def located_digests(records):
+    """{record digest: [x, z]} for the records build_centroid_index can place."""
+    return {record_digest(rec): [round(x, 3), round(z, 3)]
+            for x, z, rec in build_centroid_index(records or [])}
+
+
+def mapillary_digests(matches):
+    """{building id: match digest}; the last match per building wins, as in enrich_buildings."""
+    return {m['building_id']: record_digest(m) for m in matches or [] if m.get('building_id')}
+
+
+def changed_points(old, new):
+    """Positions of records added or removed between two located_digests() maps."""
+    return [pos for d, pos in new.items() if d not in old] + [pos for d, pos in old.items() if d not in new]
+
+
+def buildings_near(centroids, points, radius):
+    """Indices of the buildings (centroids (N, 2)) within radius of any point."""
+    if not len(points) or not len(centroids):
+        return set()
+    points = np.asarray(points, dtype=np.float64)
+    index = segment_index(points, points, radius)
+    bi, pi = query_boxes(index, centroids - radius, centroids + radius)
+    near = np.hypot(*(points[pi] - centroids[bi]).T) <= radius
+    return set(np.unique(bi[near]).tolist())
+
+
+@traced('find dirty buildings')
+def dirty_buildings(buildings, state, sources):
+    """
+    Ids of the buildings whose match can differ from the last run: those
+    within match range of an added, removed, moved or edited record (an
+    edit is a removal plus an addition), those whose Mapillary match
+    changed, and any the state has no entry for.
+    """
+    centroids = np.array([building_centroid(b) for b in buildings], dtype=np.float64).reshape(-1, 2)
+    old = state['sources']
+    near = set()
+    for name, radius in (('osm_buildings', OSM_MATCH_RADIUS), ('osm_pois', OSM_MATCH_RADIUS),
+                         ('parcels', PARCEL_MATCH_RADIUS)):
+        near |= buildings_near(centroids, changed_points(old[name], sources[name]), radius)
+    dirty = {buildings[i].get('id') for i in near}
+
+    before, after = old['mapillary'], sources['mapillary']
+    dirty |= {bid for bid in before.keys() | after.keys() if before.get(bid) != after.get(bid)}
+    dirty |= {b.get('id') for b in buildings if b.get('id') not in state['buildings']}
+    return dirty
+
+
+def base_digest(buildings):
+    """Digest of the base fields enrichment reads and never writes."""
+    h = hashlib.sha1()
+    for b in buildings:
+        h.update(json.dumps([b.get(k) for k in BASE_KEYS], separators=(',', ':')).encode())
+    return h.hexdigest()
+
+
+def landmark_inputs_digest(landmarks_digest, buildings, osm_pois, parcels):
+    """Digest of everything enrich_landmarks reads."""
+    h = hashlib.sha1((landmarks_digest or '').encode())
+    h.update(json.dumps([[b.get('id'), *building_centroid(b)] for b in buildings]).encode())
+    for records in (osm_pois, parcels):
+        h.update(json.dumps([record_digest(r) for r in records or []]).encode())
+    return h.hexdigest()
+
+
+def load_state():
+    if not os.path.isfile(MERGE_STATE_PATH):
+        return None
+    with open(MERGE_STATE_PATH) as f:
+        return json.load(f)
+
+
 # ---------------------------------------------------------------------------
 # Landmark enrichment
 # ---------------------------------------------------------------------------
 
-def enrich_landmarks(landmarks, buildings, osm_pois):
+@traced('index names')
+def name_index(records, name_key):
+    """
+    Trigram index over the named records, with their local coords.
+
+    Returns (index, named_records, coords (N, 2) with NaN where unknown).
+    """
+    named = [r for r in records or [] if str(r.get(name_key) or '').strip()]
+    return build_trigram_index([r[name_key] for r in named]), named, record_coords(named)
+
+
+def exact_name_index(named, name_key):
+    """{normalize_name(name): [ids]} over the records from name_index."""
+    exact = {}
+    for i, rec in enumerate(named):
+        key = normalize_name(rec[name_key])
+        if key:
+            exact.setdefault(key, []).append(i)
+    return exact
+
+
+def rank_exact_matches(exact, coords, name, x, z):
+    """
+    Ids whose normalised name equals name's, nearest first. With x known,
+    located ones beyond NAME_MATCH_RADIUS are dropped and unlocated ones
+    come last; otherwise in record order.
+    """
+    ids = np.array(exact.get(normalize_name(name), []), dtype=np.int64)
+    if not len(ids) or x is None:
+        return ids
+    d = np.hypot(coords[ids, 0] - x, coords[ids, 1] - z)
+    keep = ~(d > NAME_MATCH_RADIUS)
+    ids, d = ids[keep], d[keep]
+    return ids[np.lexsort((ids, np.where(np.isnan(d), np.inf, d)))]
+
+
+def rank_name_matches(index, coords, name, x, z, min_similarity):
+    """
+    Candidates for name ranked by similarity discounted by distance.
+
+    score = similarity * (1 - DISTANCE_WEIGHT * d / NAME_MATCH_RADIUS); with
+    either location unknown the distance term is taken at half weight.
+    Returns (ids, scores) best first.
+    """
+    ids, sim = search(index, name, min_similarity)
+    if not len(ids):
+        return ids, sim
+    if x is None:
+        frac = np.full(len(ids), 0.5)
+    else:
+        d = np.hypot(coords[ids, 0] - x, coords[ids, 1] - z)
+        frac = np.where(np.isnan(d), 0.5, d / NAME_MATCH_RADIUS)
+        keep = ~(frac > 1)
+        ids, sim, frac = ids[keep], sim[keep], frac[keep]
+    score = sim * (1 - DISTANCE_WEIGHT * frac)
+    order = np.lexsort((ids, -score))
+    return ids[order], score[order]
+
+
+@traced('match landmarks')
+def enrich_landmarks(landmarks, buildings, osm_pois, parcels=None):
     """
     Enrich landmarks with OSM POI data and associate each with its nearest
-    building. Returns (enriched_landmarks, matched_count).
+    building. POIs are matched by exact normalised name first (nearest
+    wins), then, for landmarks with a location, by fuzzy name (trigram
+    index, ranked with distance), falling back to proximity. Landmarks with
+    no location are placed at the parcel whose owner name matches.
+    Returns (enriched_landmarks, matched_count).
     """
     # Build centroid lookup for buildings by id -> (x, z)
-    bldg_centroids = {}
-    for bldg in buildings:
-        bx, bz = centroid_of_footprint(bldg.get('footprint', []))
-        if bx is None:
-            pos = bldg.get('position', [0, 0, 0])
-            bx, bz = pos[0], pos[2]
-        bldg_centroids[bldg['id']] = (bx, bz)
+    bldg_centroids = {bldg['id']: building_centroid(bldg) for bldg in buildings}
 
     # Build a simple list of (x, z, bldg_id) for nearest-building search
     bldg_spatial = [(cx, cz, bid) for bid, (cx, cz) in bldg_centroids.items()]
 
-    # Build POI index for name-matching
-    poi_by_name = {}
-    if osm_pois:
-        for poi in osm_pois:
-            name = (poi.get('name') or '').strip().lower()
-            if name:
-                poi_by_name.setdefault(name, []).append(poi)
+    # Trigram indices for name matching
+    poi_names, named_pois, poi_coords = name_index(osm_pois, 'name')
+    poi_exact = exact_name_index(named_pois, 'name')
+    owner_names, owned_parcels, parcel_coords = name_index(parcels, 'owner')
 
     poi_idx = build_centroid_index(osm_pois) if osm_pois else []
 
     matched_count = 0
+    name_matches = exact_matches = owner_matches = 0
 
     for lm in landmarks:
         # If the landmark already has a building id, use that centroid
@@ -463,14 +727,31 @@ def enrich_landmarks(landmarks, buildings, osm_pois):
         if existing_id and existing_id in bldg_centroids:
             lm_x, lm_z = bldg_centroids[existing_id]
 
-        # Try to enrich from OSM POIs by name match
-        lm_name = (lm.get('name') or '').strip().lower()
-        poi_match = None
+        lm_name = (lm.get('name') or '').strip()
+
+        # Unlocated landmark: use the parcel its business owns
+        if lm_x is None and lm_name and owned_parcels:
+            ids, _ = rank_name_matches(owner_names, parcel_coords, lm_name,
+                                       None, None, MIN_OWNER_SIMILARITY)
+            located = [i for i in ids if not np.isnan(parcel_coords[i, 0])]
+            if located:
+                lm_x, lm_z = parcel_coords[located[0]]
+                owner_matches += 1
 
-        if lm_name and lm_name in poi_by_name:
-            # Exact name match
-            poi_match = poi_by_name[lm_name][0]
-        elif lm_x is not None and poi_idx:
+        # Try to enrich from OSM POIs by name: exact, then fuzzy
+        poi_match = None
+        if lm_name and named_pois:
+            ids = rank_exact_matches(poi_exact, poi_coords, lm_name, lm_x, lm_z)
+            exact_matches += bool(len(ids))
+            if not len(ids) and lm_x is not None:
+                # Fuzzy matches only with a location to check them against
+                ids, _ = rank_name_matches(poi_names, poi_coords, lm_name,
+                                           lm_x, lm_z, MIN_NAME_SIMILARITY)
+            if len(ids):
+                poi_match = named_pois[ids[0]]
+                name_matches += 1
+
+        if poi_match is None and lm_x is not None and poi_idx:
             # Proximity-based match
             poi_match = find_nearest(lm_x, lm_z, poi_idx, 25)
 
@@ -502,6 +783,8 @@ def enrich_landmarks(landmarks, buildings, osm_pois):
             lm['building_id'] = existing_id
             matched_count += 1
 
+    print(f"  POI name matches: {name_matches} ({exact_matches} exact), "
+          f"located by parcel owner: {owner_matches}")
     return landmarks, matched_count
 
 
@@ -542,6 +825,18 @@ def print_summary(buildings, landmarks, stats, landmark_matched):
 # ---------------------------------------------------------------------------
 
 def main():
+    parser = argparse.ArgumentParser(description='Merge enrichment sources into buildings and landmarks')
+    parser.add_argument('--full', action='store_true',
+                        help='re-enrich every building, ignoring raw/merge_state.json')
+    parser.add_argument('--sharded', action='store_true',
+                        help='match buildings tile by tile in a process pool')
+    parser.add_argument('--workers', type=int, default=None, help='--sharded pool size (default: all cores)')
+    parser.add_argument('--tile-size', type=float, default=TILE_SIZE, help='--sharded tile edge (meters)')
+    args = parser.parse_args()
+    enrich = enrich_buildings
+    if args.sharded:
+        enrich = functools.partial(enrich_buildings_sharded, workers=args.workers, tile_size=args.tile_size)
+
     print("=" * 60)
     print("  11-merge-all: Merging pipeline data sources")
     print("=" * 60)
@@ -561,8 +856,7 @@ def main():
         print("  Run the Overture fetch pipeline first.")
         sys.exit(1)
 
-    with open(buildings_path, 'r') as f:
-        buildings_data = json.load(f)
+    buildings_data, _ = load_base(buildings_path)
 
     # Handle both {"buildings": [...]} and [...] formats
     if isinstance(buildings_data, dict) and 'buildings' in buildings_data:
@@ -576,9 +870,9 @@ def main():
     print(f"  Loaded {len(buildings)} base buildings")
 
     landmarks = []
+    landmarks_digest = None
     if os.path.isfile(landmarks_path):
-        with open(landmarks_path, 'r') as f:
-            landmarks_data = json.load(f)
+        landmarks_data, landmarks_digest = load_base(landmarks_path)
         if isinstance(landmarks_data, dict) and 'landmarks' in landmarks_data:
             landmarks = landmarks_data['landmarks']
         elif isinstance(landmarks_data, list):
@@ -595,7 +889,7 @@ def main():
     osm_bldgs_raw = load_json(os.path.join(RAW_DIR, 'osm_buildings.json'), 'OSM Buildings')
     osm_pois_raw = load_json(os.path.join(RAW_DIR, 'osm_pois.json'), 'OSM POIs')
     parcels_raw = load_json(os.path.join(RAW_DIR, 'stl_parcels.json'), 'STL Parcels')
-    mapillary_raw = load_json(os.path.join(RAW_DIR, 'mapillary_matches.json'), 'Mapillary')
+    mapillary_raw = load_json(os.path.join(REGION_RAW_DIR, 'mapillary_matches.json'), 'Mapillary')
 
     # Normalize: enrichment files may be {"items": [...]} or [...]
     def unwrap(data):
@@ -623,32 +917,81 @@ def main():
     if not has_any:
         print("\n  No enrichment sources found. Output will contain base data only.")
 
+    with span('digest sources'):
+        sources = {
+            'osm_buildings': located_digests(osm_bldgs),
+            'osm_pois': located_digests(osm_pois),
+            'parcels': located_digests(parcels),
+            'mapillary': mapillary_digests(mapillary),
+        }
+
     # ------------------------------------------------------------------
-    # 3. Enrich buildings
+    # 3. Enrich buildings (only those whose matches can have changed)
     # ------------------------------------------------------------------
     print("\n[3] Enriching buildings...")
-    buildings, stats = enrich_buildings(buildings, osm_bldgs, osm_pois, parcels, mapillary)
+    state = None if args.full else load_state()
+    buildings_base = base_digest(buildings)
+    if state and state.get('buildings_base') != buildings_base:
+        print("  Base buildings changed since the last merge — re-enriching every building")
+        state = None
+
+    record, dirty = {}, None
+    if state is None:
+        buildings, _ = enrich(buildings, osm_bldgs, osm_pois, parcels, mapillary, record)
+    else:
+        dirty = dirty_buildings(buildings, state, sources)
+        print(f"  {len(dirty)}/{len(buildings)} buildings near changed records — re-enriching those")
+        if dirty:
+            enrich([b for b in buildings if b.get('id') in dirty],
+                   osm_bldgs, osm_pois, parcels, mapillary, record)
+            changed = sum(state['buildings'].get(bid, {}).get('matched') != r['matched']
+                          for bid, r in record.items())
+            print(f"  {changed} of them matched different records")
+        record = {bid: record.get(bid) or state['buildings'][bid]
+                  for bid in (b.get('id') for b in buildings)}
+
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    for r in record.values():
+        for key in r['counted']:
+            stats[key] += 1
 
     # ------------------------------------------------------------------
-    # 4. Enrich landmarks
+    # 4. Enrich landmarks (skipped when nothing they read has changed)
     # ------------------------------------------------------------------
     print("\n[4] Enriching landmarks...")
     landmark_matched = 0
-    if landmarks:
-        landmarks, landmark_matched = enrich_landmarks(landmarks, buildings, osm_pois)
+    landmark_inputs = landmark_inputs_digest(landmarks_digest, buildings, osm_pois, parcels)
+    landmarks_stale = not state or state.get('landmark_inputs') != landmark_inputs
+    if landmarks and landmarks_stale:
+        landmarks, landmark_matched = enrich_landmarks(landmarks, buildings, osm_pois, parcels)
         print(f"  Matched {landmark_matched}/{len(landmarks)} landmarks to buildings")
+    elif landmarks:
+        landmark_matched = state['landmark_matched']
+        print(f"  Inputs unchanged — keeping {landmark_matched}/{len(landmarks)} matched landmarks")
     else:
         print("  No landmarks to enrich")
 
     # ------------------------------------------------------------------
-    # 5. Write output files
+    # 5. Write output files (atomically; unchanged files are left alone)
     # ------------------------------------------------------------------
     print("\n[5] Writing output files...")
 
-    write_json(buildings_path, {"buildings": buildings}, 'buildings.json')
+    if state is None or dirty:
+        write_json(buildings_path, {"buildings": buildings}, 'buildings.json')
+    else:
+        print("  [buildings.json] unchanged")
+
+    if landmarks and landmarks_stale:
+        landmarks_digest = write_json(landmarks_path, {"landmarks": landmarks}, 'landmarks.json')
+        landmark_inputs = landmark_inputs_digest(landmarks_digest, buildings, osm_pois, parcels)
 
-    if landmarks:
-        write_json(landmarks_path, {"landmarks": landmarks}, 'landmarks.json')
+    write_json(MERGE_STATE_PATH, {
+        'buildings_base': buildings_base,
+        'landmark_inputs': landmark_inputs,
+        'landmark_matched': landmark_matched,
+        'sources': sources,
+        'buildings': record,
+    }, 'merge_state.json', indent=None)
 
     # ------------------------------------------------------------------
     # 6. Summary
@@ -659,4 +1002,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with span('11-merge-all', cat='stage'):
+        main()
@@ -9,12 +9,11 @@ The LafayettePark.jsx group rotation handles alignment with the scene.
 """
 
 import json
+import os
 import sys
 
-CENTER_LON = -90.2161
-CENTER_LAT = 38.6160
-LON_TO_METERS = 86774
-LAT_TO_METERS = 111000
+from config import CENTER_LAT, CENTER_LON, DATA_DIR, RAW_DIR, ensure_dirs, wgs84_to_local
+from tracing import span
 
 # Shape archetypes for rendering
 SHAPE_MAP = {
@@ -90,7 +89,8 @@ def get_shape(common_name):
 
 
 def main():
-    with open('scripts/raw/lafayette_park_trees.json') as f:
+    ensure_dirs()
+    with open(os.path.join(RAW_DIR, 'lafayette_park_trees.json')) as f:
         data = json.load(f)
 
     trees = []
@@ -111,8 +111,7 @@ def main():
 
         lon = geom['x']
         lat = geom['y']
-        x = (lon - CENTER_LON) * LON_TO_METERS
-        z = (CENTER_LAT - lat) * LAT_TO_METERS
+        x, z = wgs84_to_local(lon, lat)
 
         # Skip trees outside park bounds (street trees along perimeter)
         if abs(x) > 175 or abs(z) > 175:
@@ -150,11 +149,13 @@ def main():
         'trees': trees,
     }
 
-    with open('src/data/park_trees.json', 'w') as f:
+    out_path = os.path.join(DATA_DIR, 'park_trees.json')
+    with open(out_path, 'w') as f:
         json.dump(output, f, separators=(',', ':'))
 
-    print(f"Wrote src/data/park_trees.json ({len(trees)} trees)")
+    print(f"Wrote {out_path} ({len(trees)} trees)")
 
 
 if __name__ == '__main__':
-    main()
+    with span('12-process-park-trees', cat='stage'):
+        main()
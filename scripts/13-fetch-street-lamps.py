@@ -8,7 +8,8 @@ Converts GPS coordinates to local meters.
 """
 
 import json
-from config import wgs84_to_local, DATA_DIR, RAW_DIR, ensure_dirs
+from config import lonlat_to_local, DATA_DIR, RAW_DIR, ensure_dirs
+from tracing import span
 
 
 def main():
@@ -20,17 +21,11 @@ def main():
     elements = data.get('elements', [])
     print(f'Got {len(elements)} raw street lamp nodes')
 
-    lamps = []
-    for el in elements:
-        if el.get('type') != 'node':
-            continue
-        lon = el['lon']
-        lat = el['lat']
-        x, z = wgs84_to_local(lon, lat)
-        lamps.append({
-            'x': round(x, 1),
-            'z': round(z, 1),
-        })
+    lonlat = [(el['lon'], el['lat']) for el in elements if el.get('type') == 'node']
+    lamps = [{
+        'x': round(x, 1),
+        'z': round(z, 1),
+    } for x, z in lonlat_to_local(lonlat).tolist()]
 
     output = {
         'meta': {
@@ -49,4 +44,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with span('13-fetch-street-lamps', cat='stage'):
+        main()
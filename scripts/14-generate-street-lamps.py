@@ -12,12 +12,12 @@ import json
 import math
 import os
 
-SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
-DATA_DIR = os.path.join(PROJECT_DIR, 'src', 'data')
+from config import DATA_DIR
+from tracing import span, traced
 
 GRID_ROTATION = 9.2 * math.pi / 180
 PARK_HALF = 162  # right at park edge path (OSM lamps extend to ~159m)
+LAMP_MIN_SPACING = 12  # meters — perimeter lamps closer than this to an OSM lamp are dropped
 
 def is_inside_park(x, z):
     c = math.cos(GRID_ROTATION)
@@ -27,6 +27,7 @@ def is_inside_park(x, z):
     return abs(rx) < 160 and abs(rz) < 160
 
 
+@traced('generate lamps')
 def generate_perimeter_lamps(spacing=25):
     """Place lamps evenly around the rotated park perimeter rectangle.
     spacing: meters between lamps along each side."""
@@ -56,6 +57,21 @@ def generate_perimeter_lamps(spacing=25):
     return lamps
 
 
+@traced('match lamps')
+def dedup_lamps(candidates, existing, min_spacing=LAMP_MIN_SPACING):
+    """Candidates farther than min_spacing from every existing lamp."""
+    kept = []
+    for p in candidates:
+        too_close = False
+        for i in existing:
+            if math.hypot(p['x'] - i['x'], p['z'] - i['z']) < min_spacing:
+                too_close = True
+                break
+        if not too_close:
+            kept.append(p)
+    return kept
+
+
 def main():
     with open(os.path.join(DATA_DIR, 'street_lamps.json')) as f:
         existing = json.load(f)
@@ -68,16 +84,7 @@ def main():
 
     perimeter_lamps = generate_perimeter_lamps(spacing=25)
 
-    # Dedup: remove perimeter lamps too close to an interior lamp
-    filtered_perimeter = []
-    for p in perimeter_lamps:
-        too_close = False
-        for i in interior_lamps:
-            if math.hypot(p['x'] - i['x'], p['z'] - i['z']) < 12:
-                too_close = True
-                break
-        if not too_close:
-            filtered_perimeter.append(p)
+    filtered_perimeter = dedup_lamps(perimeter_lamps, interior_lamps)
 
     all_lamps = interior_lamps + filtered_perimeter
 
@@ -103,4 +110,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with span('14-generate-street-lamps', cat='stage'):
+        main()
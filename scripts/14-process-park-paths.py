@@ -4,11 +4,12 @@
 Input:  scripts/raw/osm_park_paths.json (Overpass API export)
 Output: src/data/park_paths.json
 
-Converts GPS coordinates to local meters via wgs84_to_local.
+Converts GPS coordinates to local meters via lonlat_to_local, a path at a time.
 """
 
 import json
-from config import wgs84_to_local, DATA_DIR, RAW_DIR, ensure_dirs
+from config import lonlat_to_local, DATA_DIR, RAW_DIR, ensure_dirs
+from tracing import span
 
 
 def main():
@@ -35,12 +36,8 @@ def main():
         highway = tags.get('highway', 'path')
         node_ids = el.get('nodes', [])
 
-        points = []
-        for nid in node_ids:
-            if nid in nodes:
-                lon, lat = nodes[nid]
-                x, z = wgs84_to_local(lon, lat)
-                points.append([round(x, 2), round(z, 2)])
+        lonlat = [nodes[nid] for nid in node_ids if nid in nodes]
+        points = [[round(x, 2), round(z, 2)] for x, z in lonlat_to_local(lonlat).tolist()]
 
         if len(points) >= 2:
             paths.append({
@@ -68,4 +65,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with span('14-process-park-paths', cat='stage'):
+        main()
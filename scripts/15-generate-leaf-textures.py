@@ -13,6 +13,7 @@ import math
 import os
 import random
 from PIL import Image, ImageDraw, ImageFilter
+from tracing import span, traced
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
@@ -378,6 +379,7 @@ def apply_radial_fade(img):
     return img
 
 
+@traced('render texture')
 def generate_texture(leaf_type, colors):
     """Generate a leaf cluster texture for the given type."""
     random.seed(hash(leaf_type) + 42)  # Deterministic per type
@@ -565,4 +567,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with span('15-generate-leaf-textures', cat='stage'):
+        main()
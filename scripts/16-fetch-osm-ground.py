@@ -13,24 +13,52 @@ Fetch all ground-plane vector features from OSM for Lafayette Square:
 
 All geometry is output as WGS84 + local XZ coords, with full OSM tags preserved.
 
+Usage:
+  python scripts/16-fetch-osm-ground.py           # full fetch
+  python scripts/16-fetch-osm-ground.py --sync    # only ways changed since the last run
+
 Outputs:
   raw/osm_ground.json
+  raw/osm_sync.json  (store "ground"; see 02-fetch-osm.py)
 """
 
+import argparse
 import json
+import os
 import subprocess
 import sys
 
-from config import BBOX, RAW_DIR, ensure_dirs, wgs84_to_local
+import osmsync
+from config import FETCH_BBOX, OVERPASS_URL, RAW_DIR, ensure_dirs, lonlat_to_local
+from tracing import span, traced
 
-OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 TIMEOUT = 120
 
 OVERPASS_BBOX = (
-    f"{BBOX['min_lat']},{BBOX['min_lon']},{BBOX['max_lat']},{BBOX['max_lon']}"
+    f"{FETCH_BBOX['min_lat']},{FETCH_BBOX['min_lon']},{FETCH_BBOX['max_lat']},{FETCH_BBOX['max_lon']}"
 )
 
-
+# All ways with relevant tags (+ their nodes)
+GROUND_FILTERS = [
+    'way["highway"]',
+    'way["landuse"]',
+    'way["leisure"]',
+    'way["natural"]',
+    'way["amenity"="parking"]',
+    'way["amenity"="swimming_pool"]',
+    'way["barrier"]',
+    'way["man_made"]',
+    'way["waterway"]',
+    'way["surface"]',
+    'way["area:highway"]',
+]
+TAG_PRIORITY = [
+    "highway", "landuse", "leisure", "natural", "amenity",
+    "barrier", "man_made", "waterway", "area:highway", "surface",
+]
+
+
+@traced('fetch overpass')
 def overpass_query_curl(query_body):
     """Send a query to Overpass via curl (bypasses Python SSL issues)."""
     full_query = f"[out:json][timeout:{TIMEOUT}];{query_body}"
@@ -65,6 +93,7 @@ def overpass_query_curl(query_body):
         return {"elements": []}
 
 
+@traced('parse geometry')
 def resolve_geometry(elements):
     """Separate nodes from ways/relations, resolve way coords."""
     nodes = {}
@@ -87,17 +116,13 @@ def way_to_feature(way, nodes):
     tags = way.get("tags", {})
     node_ids = way.get("nodes", [])
 
-    coords = []
-    for nid in node_ids:
-        if nid in nodes:
-            lon, lat = nodes[nid]
-            x, z = wgs84_to_local(lon, lat)
-            coords.append({
-                "lon": round(lon, 7),
-                "lat": round(lat, 7),
-                "x": round(x, 2),
-                "z": round(z, 2),
-            })
+    lonlat = [nodes[nid] for nid in node_ids if nid in nodes]
+    coords = [{
+        "lon": round(lon, 7),
+        "lat": round(lat, 7),
+        "x": round(x, 2),
+        "z": round(z, 2),
+    } for (lon, lat), (x, z) in zip(lonlat, lonlat_to_local(lonlat).tolist())]
 
     if len(coords) < 2:
         return None
@@ -113,43 +138,9 @@ def way_to_feature(way, nodes):
     }
 
 
-def main():
-    print("=" * 60)
-    print("16-fetch-osm-ground.py — All ground-plane features from OSM")
-    print("=" * 60)
-    print(f"BBOX: {OVERPASS_BBOX}")
-
-    ensure_dirs()
-
-    # Single comprehensive query: all ways with relevant tags + their nodes
-    query = f"""(
-  way["highway"]({OVERPASS_BBOX});
-  way["landuse"]({OVERPASS_BBOX});
-  way["leisure"]({OVERPASS_BBOX});
-  way["natural"]({OVERPASS_BBOX});
-  way["amenity"="parking"]({OVERPASS_BBOX});
-  way["amenity"="swimming_pool"]({OVERPASS_BBOX});
-  way["barrier"]({OVERPASS_BBOX});
-  way["man_made"]({OVERPASS_BBOX});
-  way["waterway"]({OVERPASS_BBOX});
-  way["surface"]({OVERPASS_BBOX});
-  way["area:highway"]({OVERPASS_BBOX});
-);
-out body;>;out skel qt;"""
-
-    data = overpass_query_curl(query)
-    elements = data.get("elements", [])
-
-    nodes, ways, _ = resolve_geometry(elements)
-    print(f"  {len(nodes)} nodes, {len(ways)} ways")
-
-    # Convert to features grouped by primary tag
+def group_features(ways, nodes):
+    """Features from tagged ways, grouped by primary tag."""
     features = {}
-    tag_priority = [
-        "highway", "landuse", "leisure", "natural", "amenity",
-        "barrier", "man_made", "waterway", "area:highway", "surface",
-    ]
-
     for way in ways:
         tags = way.get("tags", {})
         if not tags:
@@ -161,7 +152,7 @@ out body;>;out skel qt;"""
 
         # Categorize by primary tag
         category = "other"
-        for tag in tag_priority:
+        for tag in TAG_PRIORITY:
             if tag in tags:
                 category = tag
                 break
@@ -169,6 +160,74 @@ out body;>;out skel qt;"""
         if category not in features:
             features[category] = []
         features[category].append(feat)
+    return features
+
+
+def sync_ground(state, out_path):
+    """Patch osm_ground.json with the ways changed since the last fetch or sync."""
+    entry = state["ground"]
+    since = entry["timestamp"]
+    print(f"  Syncing ways changed since {since}")
+    changes = osmsync.fetch_changes(overpass_query_curl, GROUND_FILTERS, entry)
+    nodes, ways, _ = resolve_geometry(changes["elements"])
+    changed = group_features(ways, nodes)
+
+    with open(out_path) as f:
+        output = json.load(f)
+    drop = set(changes["deleted"]) | {f"way/{w['id']}" for w in ways}
+    features = {
+        cat: [f for f in feats if f"way/{f['osm_id']}" not in drop]
+        for cat, feats in output["features"].items()
+    }
+    for cat, feats in changed.items():
+        features.setdefault(cat, []).extend(feats)
+    output["features"] = {cat: feats for cat, feats in features.items() if feats}
+    osmsync.apply_changes(entry, changes)
+    output["way_count"] = len(entry["versions"])
+
+    with open(out_path, "w") as f:
+        json.dump(output, f, indent=2)
+    osmsync.save_state(state)
+    print(f"  {len(changes['created'])} created, {len(changes['modified'])} modified, "
+          f"{len(changes['deleted'])} deleted")
+    print(f"\n  Saved {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch OSM ground-plane features")
+    parser.add_argument("--sync", action="store_true",
+                        help="fetch only ways changed since the last run and patch osm_ground.json")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("16-fetch-osm-ground.py — All ground-plane features from OSM")
+    print("=" * 60)
+    print(f"BBOX: {OVERPASS_BBOX}")
+
+    ensure_dirs()
+    out_path = f"{RAW_DIR}/osm_ground.json"
+    state = osmsync.load_state()
+
+    if args.sync and "ground" in state and os.path.exists(out_path):
+        try:
+            sync_ground(state, out_path)
+        except osmsync.SyncError as e:
+            # Leave the raw file and state as they were; the next sync retries
+            print(f"  WARNING: sync failed, nothing changed ({e})", file=sys.stderr)
+        print("=" * 60)
+        return
+    if args.sync:
+        print("  No sync state for ground features; fetching everything")
+
+    # Single comprehensive query: all ways with relevant tags + their nodes
+    data = overpass_query_curl(osmsync.full_query(GROUND_FILTERS))
+    elements = data.get("elements", [])
+
+    nodes, ways, _ = resolve_geometry(elements)
+    print(f"  {len(nodes)} nodes, {len(ways)} ways")
+
+    # Convert to features grouped by primary tag
+    features = group_features(ways, nodes)
 
     # Print summary
     print("\n  Features by category:")
@@ -188,13 +247,12 @@ out body;>;out skel qt;"""
     print(f"  Total: {total} features")
 
     # Save
-    out_path = f"{RAW_DIR}/osm_ground.json"
     output = {
         "bbox": {
-            "min_lat": BBOX["min_lat"],
-            "max_lat": BBOX["max_lat"],
-            "min_lon": BBOX["min_lon"],
-            "max_lon": BBOX["max_lon"],
+            "min_lat": FETCH_BBOX["min_lat"],
+            "max_lat": FETCH_BBOX["max_lat"],
+            "min_lon": FETCH_BBOX["min_lon"],
+            "max_lon": FETCH_BBOX["max_lon"],
         },
         "features": features,
         "node_count": len(nodes),
@@ -206,8 +264,16 @@ out body;>;out skel qt;"""
 
     size_kb = len(json.dumps(output)) / 1024
     print(f"\n  Saved {out_path} ({size_kb:.0f} KB)")
+
+    try:
+        state["ground"] = osmsync.full_entry(data)
+    except osmsync.SyncError as e:
+        state.pop("ground", None)
+        print(f"  WARNING: sync state not recorded ({e})", file=sys.stderr)
+    osmsync.save_state(state)
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
+    with span('16-fetch-osm-ground', cat='stage'):
+        main()
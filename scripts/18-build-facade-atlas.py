@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Build facade texture atlases from the matched wikimedia photos.
+
+Each building in facade_mapping.json is rectified to its facade's aspect
+ratio (front_edge.width x wall_height) and packed into a handful of
+power-of-two atlas pages, so every facade billboard can render from a few
+shared textures instead of one texture per building.
+
+Rectification uses a perspective (quad) warp. Entries may carry an
+`image_quad` with the facade corners in normalized photo coordinates
+([[x, y], ...] in TL, TR, BR, BL order); without one, the warp falls back to
+the same center crop FacadeBillboards.jsx applies at runtime.
+
+Usage: python scripts/18-build-facade-atlas.py
+
+Inputs:
+  src/data/facade_mapping.json
+  public/photos/lafayette-square/**  (photos referenced by the mapping)
+
+Outputs:
+  public/textures/facades/facades-<n>.jpg
+  src/data/facade_atlas.json
+"""
+
+import json
+import os
+import sys
+
+from PIL import Image
+
+from atlas import build_pages
+from config import DATA_DIR, PROJECT_DIR, PUBLIC_DIR, ensure_dirs
+from tracing import span, traced
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'textures', 'facades')
+PX_PER_METER = 24
+MAX_TILE = 512           # px, longest side of a rectified facade
+MIN_TILE = 32            # px, shortest side
+MAX_FACADE_WIDTH = 18    # meters, same clamp as FacadeBillboards.jsx
+JPEG_QUALITY = 85
+
+
+def resolve_image_path(image):
+    """Mapping paths look like /public/photos/...; resolve against the project."""
+    return os.path.join(PROJECT_DIR, image.lstrip('/'))
+
+
+def facade_tile_size(width_m, height_m):
+    """Pixel size for a facade, preserving its aspect ratio."""
+    w = width_m * PX_PER_METER
+    h = height_m * PX_PER_METER
+    scale = min(1.0, MAX_TILE / max(w, h))
+    w, h = w * scale, h * scale
+    return max(MIN_TILE, round(w)), max(MIN_TILE, round(h))
+
+
+def cover_quad(img_w, img_h, aspect):
+    """Center crop of the photo that covers a facade of the given aspect."""
+    img_aspect = img_w / img_h
+    if aspect < img_aspect:
+        cw, ch = img_h * aspect, img_h
+    else:
+        cw, ch = img_w, img_w / aspect
+    x0, y0 = (img_w - cw) / 2, (img_h - ch) / 2
+    x1, y1 = x0 + cw, y0 + ch
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def rectify(img, quad, size):
+    """Warp the facade quad (TL, TR, BR, BL in pixels) onto a size rectangle."""
+    (tlx, tly), (trx, try_), (brx, bry), (blx, bly) = quad
+    # PIL's QUAD data is upper-left, lower-left, lower-right, upper-right
+    data = (tlx, tly, blx, bly, brx, bry, trx, try_)
+    return img.transform(size, Image.QUAD, data, resample=Image.BICUBIC)
+
+
+@traced('rectify facade')
+def rectify_facade(bid, entry):
+    """Load, rectify and return the facade tile for one mapping entry."""
+    edge = entry.get('front_edge')
+    height = entry.get('wall_height') or 0
+    if not edge or not edge.get('width') or height <= 0:
+        return None
+
+    path = resolve_image_path(entry['image'])
+    if not os.path.exists(path):
+        print(f"  WARNING: {bid}: missing photo {entry['image']}", file=sys.stderr)
+        return None
+
+    width = min(edge['width'], MAX_FACADE_WIDTH)
+    size = facade_tile_size(width, height)
+
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        quad = entry.get('image_quad')
+        if quad and len(quad) == 4:
+            quad = [(x * img.width, y * img.height) for x, y in quad]
+        else:
+            quad = cover_quad(img.width, img.height, width / height)
+        return rectify(img, quad, size)
+
+
+def main():
+    ensure_dirs()
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    mapping_path = os.path.join(DATA_DIR, 'facade_mapping.json')
+    with open(mapping_path) as f:
+        mapping = json.load(f)
+    print(f"Loaded {len(mapping)} facade mappings")
+
+    ids, tiles = [], []
+    for bid, entry in mapping.items():
+        tile = rectify_facade(bid, entry)
+        if tile is not None:
+            ids.append(bid)
+            tiles.append(tile)
+    print(f"Rectified {len(tiles)} facades ({len(mapping) - len(tiles)} skipped)")
+
+    if not tiles:
+        print("Nothing to pack. Exiting.")
+        sys.exit(1)
+
+    pages, rects = build_pages(tiles, mode='RGB')
+
+    page_meta = []
+    for i, page in enumerate(pages):
+        name = f'facades-{i}.jpg'
+        page.save(os.path.join(OUT_DIR, name), 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        page_meta.append({
+            'file': f'textures/facades/{name}',
+            'width': page.width,
+            'height': page.height,
+        })
+        print(f"  Page {i}: {page.width}x{page.height}")
+
+    facades = {}
+    for bid, rect in zip(ids, rects):
+        facades[bid] = {
+            'page': rect['page'],
+            'uv': rect['uv'],
+            'px': rect['px'],
+        }
+
+    output = {
+        'meta': {
+            'source': 'facade_mapping.json',
+            'px_per_meter': PX_PER_METER,
+            'max_facade_width': MAX_FACADE_WIDTH,
+            'uv_origin': 'bottom-left',
+        },
+        'pages': page_meta,
+        'facades': facades,
+    }
+
+    out_path = os.path.join(DATA_DIR, 'facade_atlas.json')
+    with open(out_path, 'w') as f:
+        json.dump(output, f, separators=(',', ':'))
+
+    print(f"\nWrote {out_path} ({len(facades)} facades on {len(pages)} pages)")
+
+
+if __name__ == '__main__':
+    with span('18-build-facade-atlas', cat='stage'):
+        main()
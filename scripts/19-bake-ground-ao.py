@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Bake ground-plane ambient occlusion from building footprints.
+
+Rasterizes every buildings.json footprint (with its height, size[1]) onto a
+grid covering the ground extent, computes a truncated distance field to the
+nearest building, and turns distance + occluder height into a contact-shadow
+term. The result is one grayscale texture the ground shader can multiply in
+at zero runtime cost.
+
+Usage: python scripts/19-bake-ground-ao.py
+
+Input:  src/data/buildings.json
+Output: public/textures/ground/ao.png
+        src/data/ground_ao.json   (world-space bounds + grid metadata)
+"""
+
+import json
+import math
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+from config import DATA_DIR, PUBLIC_DIR, ensure_dirs
+from raster import rasterize_polygons, world_to_px
+from tracing import span, traced
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'textures', 'ground')
+CELL_SIZE = 0.5       # meters per texel
+AO_RADIUS = 12.0      # meters — occlusion fades to zero at this distance
+AO_STRENGTH = 0.85    # 1.0 = fully black at a wall's base
+INTERIOR_AO = 0.35    # value under footprints (never visible, keeps edges soft)
+
+
+def ground_bounds(buildings, margin):
+    """Footprint extent of all buildings, padded by margin meters."""
+    xs, zs = [], []
+    for b in buildings:
+        for x, z in b.get('footprint') or []:
+            xs.append(x)
+            zs.append(z)
+    if not xs:
+        return None
+    return {
+        'min_x': math.floor(min(xs) - margin),
+        'max_x': math.ceil(max(xs) + margin),
+        'min_z': math.floor(min(zs) - margin),
+        'max_z': math.ceil(max(zs) + margin),
+    }
+
+
+@traced('rasterize heights')
+def rasterize_heights(buildings, bounds, width, height):
+    """Max building height per cell (0 = open ground)."""
+    heights = np.zeros((height, width), dtype=np.float32)
+    for b in buildings:
+        fp = b.get('footprint')
+        h = (b.get('size') or [0, 0, 0])[1]
+        if not fp or len(fp) < 3 or h <= 0:
+            continue
+        px = world_to_px(fp, bounds['min_x'], bounds['min_z'], CELL_SIZE)
+        c0 = max(0, int(px[:, 0].min()))
+        r0 = max(0, int(px[:, 1].min()))
+        c1 = min(width, int(math.ceil(px[:, 0].max())) + 1)
+        r1 = min(height, int(math.ceil(px[:, 1].max())) + 1)
+        if c1 <= c0 or r1 <= r0:
+            continue
+        local = px - [c0, r0]
+        mask = rasterize_polygons([local], c1 - c0, r1 - r0)
+        window = heights[r0:r1, c0:c1]
+        np.maximum(window, np.where(mask, h, 0), out=window)
+    return heights
+
+
+def nearest_in_rows(heights):
+    """
+    Row pass of the distance transform.
+
+    Returns (dist, occluder_height): per cell, the distance in cells to the
+    nearest occupied cell on the same row, and that cell's height.
+    """
+    rows, cols = heights.shape
+    occupied = heights > 0
+    idx = np.broadcast_to(np.arange(cols), (rows, cols))
+
+    left = np.where(occupied, idx, -1)
+    np.maximum.accumulate(left, axis=1, out=left)
+    right = np.where(occupied, idx, cols * 4)
+    right = np.minimum.accumulate(right[:, ::-1], axis=1)[:, ::-1]
+
+    dl = np.where(left >= 0, idx - left, np.inf)
+    dr = np.where(right < cols, right - idx, np.inf)
+    use_left = dl <= dr
+    dist = np.where(use_left, dl, dr).astype(np.float32)
+
+    r = np.arange(rows)[:, None]
+    h_left = heights[r, np.clip(left, 0, cols - 1)]
+    h_right = heights[r, np.clip(right, 0, cols - 1)]
+    occ_h = np.where(use_left, h_left, h_right).astype(np.float32)
+    return dist, occ_h
+
+
+def occlusion_term(dist_m, height_m):
+    """
+    Occlusion (0..1) of an occluder of height_m at dist_m, faded to zero at
+    AO_RADIUS. A wall at distance d blocks the sky up to elevation atan(h / d).
+    """
+    angle = np.arctan2(height_m, np.maximum(dist_m, 1e-3))
+    falloff = np.clip(1.0 - dist_m / AO_RADIUS, 0.0, 1.0) ** 2
+    return (angle / (math.pi / 2)) * falloff
+
+
+@traced('bake ao')
+def bake_ao(heights):
+    """Ambient-occlusion factor per cell (1 = unoccluded)."""
+    row_dist, row_h = nearest_in_rows(heights)
+    radius = int(math.ceil(AO_RADIUS / CELL_SIZE))
+    rows = heights.shape[0]
+
+    occlusion = np.zeros_like(row_dist)
+    for dy in range(-radius, radius + 1):
+        # Source row r + dy contributes to row r
+        src0, src1 = max(0, dy), min(rows, rows + dy)
+        dst0, dst1 = src0 - dy, src1 - dy
+        if src1 <= src0:
+            continue
+        g = row_dist[src0:src1]
+        dist_m = np.sqrt(g * g + dy * dy) * CELL_SIZE
+        term = occlusion_term(dist_m, row_h[src0:src1])
+        np.maximum(occlusion[dst0:dst1], term, out=occlusion[dst0:dst1])
+
+    ao = 1.0 - AO_STRENGTH * occlusion
+    ao[heights > 0] = INTERIOR_AO
+    return ao
+
+
+def main():
+    ensure_dirs()
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    with open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    print(f"Loaded {len(buildings)} buildings")
+
+    bounds = ground_bounds(buildings, AO_RADIUS)
+    if not bounds:
+        print("No footprints found. Exiting.")
+        sys.exit(1)
+
+    width = int(round((bounds['max_x'] - bounds['min_x']) / CELL_SIZE))
+    height = int(round((bounds['max_z'] - bounds['min_z']) / CELL_SIZE))
+    print(f"Grid: {width}x{height} @ {CELL_SIZE} m  bounds={bounds}")
+
+    heights = rasterize_heights(buildings, bounds, width, height)
+    print(f"  Occupied cells: {int((heights > 0).sum())}")
+
+    ao = bake_ao(heights)
+    print(f"  AO range: {ao.min():.2f} - {ao.max():.2f}, "
+          f"{100 * (ao < 0.99).mean():.1f}% of cells darkened")
+
+    img = Image.fromarray(np.round(ao * 255).astype(np.uint8), 'L')
+    tex_path = os.path.join(OUT_DIR, 'ao.png')
+    img.save(tex_path, 'PNG', optimize=True)
+    print(f"Wrote {tex_path} ({os.path.getsize(tex_path) / 1024:.0f} KB)")
+
+    output = {
+        'meta': {
+            'source': 'buildings.json footprints',
+            'cell_size': CELL_SIZE,
+            'ao_radius': AO_RADIUS,
+            'ao_strength': AO_STRENGTH,
+            'row_origin': 'min_z',  # image row 0 is the northern (min_z) edge
+        },
+        'texture': 'textures/ground/ao.png',
+        'width': width,
+        'height': height,
+        'bounds': bounds,
+    }
+    out_path = os.path.join(DATA_DIR, 'ground_ao.json')
+    with open(out_path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"Wrote {out_path}")
+
+
+if __name__ == '__main__':
+    with span('19-bake-ground-ao', cat='stage'):
+        main()
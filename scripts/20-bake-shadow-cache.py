@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Precompute ground shadow masks for sun positions over the year.
+
+Samples the sun's path at our latitude every few minutes for a full year,
+groups the daylight samples into azimuth/elevation buckets, and for each
+bucket projects every building footprint's shadow onto the ground (the
+footprint swept along the shadow vector by height / tan(elevation)). Each
+bucket is rasterized to a mask; masks are packed three to a texel (R, G, B)
+into atlas pages, with a manifest the client uses to pick and blend the
+buckets nearest to the live sun instead of rendering shadow maps.
+
+Usage: python scripts/20-bake-shadow-cache.py
+
+Input:  src/data/buildings.json
+Output: public/textures/shadows/shadows-<n>.png
+        src/data/shadow_cache.json
+"""
+
+import datetime
+import json
+import math
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+from atlas import build_pages
+from config import CENTER_LAT, CENTER_LON, DATA_DIR, PUBLIC_DIR, ensure_dirs
+from raster import rasterize_polygons, world_to_px
+from tracing import span, traced
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'textures', 'shadows')
+CELL_SIZE = 2.0                  # meters per texel
+GROUND_MARGIN = 40.0             # meters of ground around the building extent
+SAMPLE_MINUTES = 10              # sun sampling interval through each day
+SAMPLE_YEAR = 2026
+AZIMUTH_STEP = 15.0              # degrees per azimuth bucket
+ELEVATION_EDGES = [5, 10, 15, 20, 30, 45, 60, 90]  # degrees; below 5° is skipped
+MAX_SHADOW_LENGTH = 200.0        # meters — clamps the lowest-sun shadows
+CHANNELS = 'RGB'
+
+
+# ---------------------------------------------------------------------------
+# Sun position
+# ---------------------------------------------------------------------------
+
+def solar_position(unix_seconds, lat, lon):
+    """
+    Approximate solar azimuth/elevation (degrees) for arrays of UTC times.
+
+    Low-precision almanac formulas (good to ~0.1°), azimuth clockwise from
+    north.
+    """
+    n = np.asarray(unix_seconds, dtype=np.float64) / 86400.0 + 2440587.5 - 2451545.0
+    mean_lon = np.radians((280.460 + 0.9856474 * n) % 360)
+    anomaly = np.radians((357.528 + 0.9856003 * n) % 360)
+    ecl_lon = mean_lon + np.radians(1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly))
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+
+    ra = np.arctan2(np.cos(obliquity) * np.sin(ecl_lon), np.cos(ecl_lon))
+    dec = np.arcsin(np.sin(obliquity) * np.sin(ecl_lon))
+    gmst_hours = (18.697374558 + 24.06570982441908 * n) % 24
+    hour_angle = np.radians(gmst_hours * 15 + lon) - ra
+
+    phi = math.radians(lat)
+    sin_el = np.sin(phi) * np.sin(dec) + np.cos(phi) * np.cos(dec) * np.cos(hour_angle)
+    elevation = np.degrees(np.arcsin(np.clip(sin_el, -1, 1)))
+    azimuth = np.degrees(np.arctan2(
+        -np.cos(dec) * np.sin(hour_angle),
+        np.sin(dec) * np.cos(phi) - np.cos(dec) * np.cos(hour_angle) * np.sin(phi),
+    )) % 360
+    return azimuth, elevation
+
+
+def year_samples():
+    """Sun azimuth/elevation every SAMPLE_MINUTES through SAMPLE_YEAR."""
+    start = datetime.datetime(SAMPLE_YEAR, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    end = datetime.datetime(SAMPLE_YEAR + 1, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    times = np.arange(start, end, SAMPLE_MINUTES * 60)
+    return solar_position(times, CENTER_LAT, CENTER_LON)
+
+
+def bucket_samples(azimuth, elevation):
+    """
+    Group daylight samples into buckets.
+
+    Returns a list of bucket dicts (bins + sample-weighted mean sun angles)
+    and the lookup table lookup[elevation_bin][azimuth_bin] -> bucket index.
+    """
+    n_az = int(round(360 / AZIMUTH_STEP))
+    n_el = len(ELEVATION_EDGES) - 1
+
+    day = elevation >= ELEVATION_EDGES[0]
+    az, el = azimuth[day], elevation[day]
+    az_bin = np.minimum((az // AZIMUTH_STEP).astype(int), n_az - 1)
+    el_bin = np.clip(np.searchsorted(ELEVATION_EDGES, el, side='right') - 1, 0, n_el - 1)
+
+    buckets = []
+    lookup = [[-1] * n_az for _ in range(n_el)]
+    for eb in range(n_el):
+        for ab in range(n_az):
+            sel = (el_bin == eb) & (az_bin == ab)
+            count = int(sel.sum())
+            if count == 0:
+                continue
+            # Circular mean keeps buckets straddling north well-defined
+            a = np.radians(az[sel])
+            mean_az = math.degrees(math.atan2(np.sin(a).mean(), np.cos(a).mean())) % 360
+            lookup[eb][ab] = len(buckets)
+            buckets.append({
+                'azimuth_bin': ab,
+                'elevation_bin': eb,
+                'azimuth': round(mean_az, 2),
+                'elevation': round(float(el[sel].mean()), 2),
+                'weight': round(count / len(az), 5),
+            })
+    return buckets, lookup
+
+
+# ---------------------------------------------------------------------------
+# Shadow projection
+# ---------------------------------------------------------------------------
+
+def shadow_offset(azimuth, elevation):
+    """Ground offset per meter of height, pointing away from the sun (X=E, Z=S)."""
+    a, e = math.radians(azimuth), math.radians(elevation)
+    length = 1.0 / math.tan(e)
+    return -math.sin(a) * length, math.cos(a) * length
+
+
+def shadow_polygons(footprints_px, heights_m, offset_px):
+    """
+    Polygons whose union is the ground shadow of a batch of extruded
+    footprints (K, N, 2): the footprints, their translated copies, and the
+    quads swept by every edge.
+    """
+    shift = np.outer(heights_m, offset_px)
+    length = np.hypot(shift[:, 0], shift[:, 1])
+    max_len = MAX_SHADOW_LENGTH / CELL_SIZE
+    shift *= np.minimum(1.0, max_len / np.maximum(length, 1e-9))[:, None]
+    shift = shift[:, None, :]
+
+    base = footprints_px
+    nxt = np.roll(base, -1, axis=1)
+    quads = np.stack([base, nxt, nxt + shift, base + shift], axis=2)
+    return [base, base + shift, quads.reshape(-1, 4, 2)]
+
+
+@traced('load prisms')
+def load_prisms(buildings, bounds):
+    """
+    Footprints grouped by vertex count so each group projects in one batch.
+
+    Returns a list of (footprints_px (K, N, 2), heights (K,)).
+    """
+    groups = {}
+    for b in buildings:
+        fp = b.get('footprint')
+        h = (b.get('size') or [0, 0, 0])[1]
+        if not fp or len(fp) < 3 or h <= 0:
+            continue
+        px = world_to_px(fp, bounds['min_x'], bounds['min_z'], CELL_SIZE)
+        groups.setdefault(len(fp), []).append((px, h))
+    return [
+        (np.stack([px for px, _ in group]), np.array([h for _, h in group]))
+        for group in groups.values()
+    ]
+
+
+@traced('render bucket')
+def render_bucket(prisms, bucket, width, height):
+    """Shadow mask for one bucket's representative sun direction."""
+    ox, oz = shadow_offset(bucket['azimuth'], bucket['elevation'])
+    offset_px = (ox / CELL_SIZE, oz / CELL_SIZE)
+    polys = []
+    for footprints_px, heights in prisms:
+        polys.extend(shadow_polygons(footprints_px, heights, offset_px))
+    return rasterize_polygons(polys, width, height)
+
+
+def ground_bounds(buildings):
+    xs = [p[0] for b in buildings for p in (b.get('footprint') or [])]
+    zs = [p[1] for b in buildings for p in (b.get('footprint') or [])]
+    if not xs:
+        return None
+    return {
+        'min_x': math.floor(min(xs) - GROUND_MARGIN),
+        'max_x': math.ceil(max(xs) + GROUND_MARGIN),
+        'min_z': math.floor(min(zs) - GROUND_MARGIN),
+        'max_z': math.ceil(max(zs) + GROUND_MARGIN),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    ensure_dirs()
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    with open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    print(f"Loaded {len(buildings)} buildings")
+
+    bounds = ground_bounds(buildings)
+    if not bounds:
+        print("No footprints found. Exiting.")
+        sys.exit(1)
+    width = int(round((bounds['max_x'] - bounds['min_x']) / CELL_SIZE))
+    height = int(round((bounds['max_z'] - bounds['min_z']) / CELL_SIZE))
+    print(f"Grid: {width}x{height} @ {CELL_SIZE} m  bounds={bounds}")
+
+    print(f"\nSampling sun path for {SAMPLE_YEAR} every {SAMPLE_MINUTES} min...")
+    azimuth, elevation = year_samples()
+    buckets, lookup = bucket_samples(azimuth, elevation)
+    print(f"  {len(buckets)} occupied buckets "
+          f"({360 / AZIMUTH_STEP:.0f} azimuth x {len(ELEVATION_EDGES) - 1} elevation bins)")
+
+    prisms = load_prisms(buildings, bounds)
+    n_prisms = sum(len(h) for _, h in prisms)
+    print(f"\nRendering shadow masks for {n_prisms} buildings...")
+    masks = []
+    for i, bucket in enumerate(buckets):
+        masks.append(render_bucket(prisms, bucket, width, height))
+        if i % 20 == 0:
+            print(f"  Bucket {i}/{len(buckets)} "
+                  f"(az={bucket['azimuth']:.0f} el={bucket['elevation']:.0f}): "
+                  f"{100 * masks[-1].mean():.1f}% shadowed")
+
+    # Pack three masks per tile, one per color channel
+    n_ch = len(CHANNELS)
+    tiles = []
+    for start in range(0, len(masks), n_ch):
+        channels = [m.astype(np.uint8) * 255 for m in masks[start:start + n_ch]]
+        while len(channels) < n_ch:
+            channels.append(np.zeros((height, width), dtype=np.uint8))
+        tiles.append(Image.fromarray(np.stack(channels, axis=-1), CHANNELS))
+
+    pages, rects = build_pages(tiles, mode=CHANNELS)
+
+    page_meta = []
+    for i, page in enumerate(pages):
+        name = f'shadows-{i}.png'
+        path = os.path.join(OUT_DIR, name)
+        page.save(path, 'PNG', optimize=True)
+        page_meta.append({
+            'file': f'textures/shadows/{name}',
+            'width': page.width,
+            'height': page.height,
+        })
+        print(f"  Page {i}: {page.width}x{page.height} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+    for i, bucket in enumerate(buckets):
+        rect = rects[i // n_ch]
+        bucket['page'] = rect['page']
+        bucket['uv'] = rect['uv']
+        bucket['channel'] = i % n_ch
+
+    output = {
+        'meta': {
+            'source': 'buildings.json footprints',
+            'latitude': CENTER_LAT,
+            'longitude': CENTER_LON,
+            'cell_size': CELL_SIZE,
+            'azimuth_step': AZIMUTH_STEP,
+            'elevation_edges': ELEVATION_EDGES,
+            'sample_minutes': SAMPLE_MINUTES,
+            'row_origin': 'min_z',
+            'uv_origin': 'bottom-left',
+        },
+        'bounds': bounds,
+        'width': width,
+        'height': height,
+        'pages': page_meta,
+        'buckets': buckets,
+        'lookup': lookup,
+    }
+    out_path = os.path.join(DATA_DIR, 'shadow_cache.json')
+    with open(out_path, 'w') as f:
+        json.dump(output, f, separators=(',', ':'))
+    print(f"\nWrote {out_path} ({len(buckets)} buckets on {len(pages)} pages)")
+
+
+if __name__ == '__main__':
+    with span('20-bake-shadow-cache', cat='stage'):
+        main()
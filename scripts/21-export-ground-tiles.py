@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Rasterize the ground vector layers into a z/x/y tile pyramid.
+
+Renders ground_layers.json (the SVG-derived street map) and block_shapes.json
+(generated lots, sidewalks and alley fills) into antialiased RGBA tiles, so
+distant ground can be drawn as a few textured quads instead of thousands of
+vector triangles. Polygons and stroked polylines are scan-converted in NumPy
+with supersampled coverage and composited in document order.
+
+The pyramid is local to the scene: zoom 0 is one tile covering the square
+extent of all geometry, each zoom halves the tile size, x grows east and
+y grows south (row 0 at min_z).
+
+Usage: python scripts/21-export-ground-tiles.py
+
+Inputs:
+  src/data/ground_layers.json
+  src/data/block_shapes.json
+
+Outputs:
+  public/tiles/<layer>/<z>/<x>/<y>.png
+  src/data/ground_tiles.json   (extent, zoom range, tile index per layer)
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+from config import DATA_DIR, PUBLIC_DIR, ensure_dirs
+from raster import rasterize_coverage, stroke_polyline
+from tracing import span, traced
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'tiles')
+TILE_SIZE = 256
+MAX_ZOOM = 4
+SUPERSAMPLE = 4
+
+# block_shapes.json palette (matches export-ground-composite.mjs)
+LOT_COLOR = '#2e2e38'
+PARK_LOT = '#1a3a1a'
+SIDEWALK_CLR = '#8a8a82'
+
+
+def hex_to_rgb(h):
+    h = h.lstrip('#')
+    if len(h) == 3:
+        h = ''.join(c * 2 for c in h)
+    return tuple(int(h[i:i + 2], 16) for i in (0, 2, 4))
+
+
+# ---------------------------------------------------------------------------
+# Feature loading
+# ---------------------------------------------------------------------------
+
+def polygon_feature(points, color):
+    pts = np.asarray(points, dtype=np.float64)
+    return {'kind': 'polygon', 'points': pts, 'color': color, 'half_width': 0.0,
+            'bbox': (*pts.min(axis=0), *pts.max(axis=0))}
+
+
+def line_feature(points, width, color):
+    pts = np.asarray(points, dtype=np.float64)
+    hw = width / 2
+    lo, hi = pts.min(axis=0) - hw, pts.max(axis=0) + hw
+    return {'kind': 'line', 'points': pts, 'color': color, 'half_width': hw,
+            'bbox': (*lo, *hi)}
+
+
+def load_ground_layers(data):
+    """SVG-derived layers, drawn in their own colors: fills first, then lines."""
+    features = []
+    for blk in data.get('blocks', []):
+        if len(blk.get('polygon') or []) >= 3:
+            features.append(polygon_feature(blk['polygon'], blk.get('color', '#333')))
+    for key in ('service', 'sidewalks', 'paths', 'streets'):
+        for line in data.get(key, []):
+            if len(line.get('points') or []) >= 2:
+                features.append(line_feature(line['points'], line.get('width', 2),
+                                             line.get('color', '#000')))
+    return features
+
+
+def load_block_shapes(data):
+    """Generated blocks: sidewalk rings under lots, then alley fills."""
+    features = []
+    for blk in data.get('blocks', []):
+        if blk.get('sidewalk') and len(blk['sidewalk']) >= 3:
+            features.append(polygon_feature(blk['sidewalk'], SIDEWALK_CLR))
+    for blk in data.get('blocks', []):
+        if blk.get('lot') and len(blk['lot']) >= 3:
+            features.append(polygon_feature(blk['lot'], PARK_LOT if blk.get('isPark') else LOT_COLOR))
+    for af in data.get('alleyFills', []):
+        if len(af.get('polygon') or []) >= 3:
+            features.append(polygon_feature(af['polygon'], SIDEWALK_CLR))
+    return features
+
+
+def extent_of(layers):
+    """Square extent (min_x, min_z, size) enclosing every feature."""
+    boxes = np.array([f['bbox'] for feats in layers.values() for f in feats])
+    min_x, min_z = boxes[:, 0].min(), boxes[:, 1].min()
+    max_x, max_z = boxes[:, 2].max(), boxes[:, 3].max()
+    size = math.ceil(max(max_x - min_x, max_z - min_z))
+    return math.floor(min_x), math.floor(min_z), size
+
+
+# ---------------------------------------------------------------------------
+# Tile rendering
+# ---------------------------------------------------------------------------
+
+def feature_polys(feat, ox, oz, res):
+    """Feature geometry as pixel-space polygons for a tile at (ox, oz)."""
+    pts = (feat['points'] - [ox, oz]) / res
+    if feat['kind'] == 'polygon':
+        return [pts]
+    # Keep hairlines visible at coarse zooms
+    return stroke_polyline(pts, max(feat['half_width'] / res, 0.35))
+
+
+def color_runs(features):
+    """Split features into consecutive same-color runs (painter's order kept)."""
+    runs = []
+    for f in features:
+        if runs and runs[-1][0] == f['color']:
+            runs[-1][1].append(f)
+        else:
+            runs.append((f['color'], [f]))
+    return runs
+
+
+def render_tile(features, ox, oz, res):
+    """Composite features over a transparent tile. Returns RGBA uint8 or None."""
+    rgb = np.zeros((TILE_SIZE, TILE_SIZE, 3), dtype=np.float32)
+    alpha = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.float32)
+
+    # rgb is premultiplied by alpha while compositing
+    for color, run in color_runs(features):
+        polys = []
+        for f in run:
+            polys.extend(feature_polys(f, ox, oz, res))
+        cov = rasterize_coverage(polys, TILE_SIZE, TILE_SIZE, SUPERSAMPLE)
+        if not cov.any():
+            continue
+        c = np.array(hex_to_rgb(color), dtype=np.float32)
+        rgb = rgb * (1 - cov[..., None]) + c * cov[..., None]
+        alpha = alpha + cov * (1 - alpha)
+
+    if not alpha.any():
+        return None
+    # PNG stores straight alpha: un-premultiply
+    rgb = np.where(alpha[..., None] > 0, rgb / np.maximum(alpha[..., None], 1e-6), 0)
+    out = np.dstack([rgb, alpha * 255])
+    return np.clip(np.round(out), 0, 255).astype(np.uint8)
+
+
+def tiles_for_zoom(features, extent, z):
+    """Yield (x, y, ox, oz, res, features_in_tile) for every non-empty tile."""
+    min_x, min_z, size = extent
+    n = 2 ** z
+    span = size / n
+    res = span / TILE_SIZE
+    boxes = np.array([f['bbox'] for f in features])
+
+    for ty in range(n):
+        oz = min_z + ty * span
+        for tx in range(n):
+            ox = min_x + tx * span
+            hit = ((boxes[:, 0] < ox + span) & (boxes[:, 2] > ox)
+                   & (boxes[:, 1] < oz + span) & (boxes[:, 3] > oz))
+            if hit.any():
+                yield tx, ty, ox, oz, res, [f for f, h in zip(features, hit) if h]
+
+
+@traced('export layer')
+def export_layer(name, features, extent):
+    """Render one layer's pyramid. Returns {z: [[x, y], ...]} of written tiles."""
+    written = {}
+    for z in range(MAX_ZOOM + 1):
+        written[z] = []
+        for tx, ty, ox, oz, res, feats in tiles_for_zoom(features, extent, z):
+            pixels = render_tile(feats, ox, oz, res)
+            if pixels is None:
+                continue
+            tile_dir = os.path.join(OUT_DIR, name, str(z), str(tx))
+            os.makedirs(tile_dir, exist_ok=True)
+            Image.fromarray(pixels, 'RGBA').save(
+                os.path.join(tile_dir, f'{ty}.png'), 'PNG', optimize=True)
+            written[z].append([tx, ty])
+        print(f"  {name} z{z}: {len(written[z])}/{4 ** z} tiles "
+              f"({extent[2] / 2 ** z / TILE_SIZE:.2f} m/px)")
+    return written
+
+
+def main():
+    ensure_dirs()
+
+    with open(os.path.join(DATA_DIR, 'ground_layers.json')) as f:
+        ground_layers = json.load(f)
+    with open(os.path.join(DATA_DIR, 'block_shapes.json')) as f:
+        block_shapes = json.load(f)
+
+    layers = {
+        'ground': load_ground_layers(ground_layers),
+        'blocks': load_block_shapes(block_shapes),
+    }
+    layers = {k: v for k, v in layers.items() if v}
+    for name, feats in layers.items():
+        print(f"Loaded {len(feats)} '{name}' features")
+
+    extent = extent_of(layers)
+    print(f"Extent: origin=({extent[0]}, {extent[1]}) size={extent[2]} m, "
+          f"zoom 0-{MAX_ZOOM}, {TILE_SIZE}px tiles")
+
+    tile_index = {}
+    for name, feats in layers.items():
+        tile_index[name] = export_layer(name, feats, extent)
+
+    output = {
+        'meta': {
+            'sources': ['ground_layers.json', 'block_shapes.json'],
+            'tile_size': TILE_SIZE,
+            'min_zoom': 0,
+            'max_zoom': MAX_ZOOM,
+            'row_origin': 'min_z',
+        },
+        'origin': [extent[0], extent[1]],
+        'size': extent[2],
+        'url': 'tiles/{layer}/{z}/{x}/{y}.png',
+        'layers': tile_index,
+    }
+    out_path = os.path.join(DATA_DIR, 'ground_tiles.json')
+    with open(out_path, 'w') as f:
+        json.dump(output, f, separators=(',', ':'))
+    total = sum(len(t) for idx in tile_index.values() for t in idx.values())
+    print(f"\nWrote {total} tiles and {out_path}")
+
+
+if __name__ == '__main__':
+    with span('21-export-ground-tiles', cat='stage'):
+        main()
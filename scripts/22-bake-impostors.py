@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Bake far-LOD impostor sprites for every building.
+
+Each building is rendered from its footprint, wall height (plus the
+year-based foundation) and wall/roof tint into a ring of orthographic views
+(VIEW_COUNT azimuths at a fixed overview elevation) by a small NumPy
+software rasterizer: back-face culled, z-buffered, flat-shaded walls and a
+flat roof cap. The views of a building sit side by side in one strip, and
+all strips are packed into RGBA atlas pages so distant buildings can be
+swapped for camera-facing billboards.
+
+View geometry (per building, local to the footprint center at ground level):
+for view k the camera sits at azimuth k * 360 / VIEW_COUNT (0 = south, +z,
+increasing toward east) and ELEVATION degrees above the horizon. Each sprite
+covers u in [-radius, radius] and v in [v_min, v_max] of that view plane.
+
+Usage: python scripts/22-bake-impostors.py
+
+Input:  src/data/buildings.json
+Output: public/textures/impostors/impostors-<n>.png
+        src/data/impostors.json
+"""
+
+import colorsys
+import json
+import math
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+from atlas import build_pages
+from config import DATA_DIR, PUBLIC_DIR, ensure_dirs
+from raster import rasterize_polygons, signed_area
+from tracing import span, traced
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'textures', 'impostors')
+VIEW_COUNT = 8
+ELEVATION = 35.0          # degrees — matches the overview camera pitch
+PX_PER_METER = 1.5
+MIN_VIEW_PX = 8
+MAX_VIEW_PX = 64
+SUPERSAMPLE = 2
+LIGHT_DIR = (-0.45, 0.75, 0.48)  # toward the light: high sun from the south-west
+AMBIENT = 0.45
+FOUNDATION_COLOR = '#B8A88A'
+ROOF_LUMINANCE = {'slate': 0.15, 'metal': 0.28}  # others 0.20, as in LafayetteScene
+
+
+# ---------------------------------------------------------------------------
+# Building appearance (mirrors LafayetteScene.jsx)
+# ---------------------------------------------------------------------------
+
+def hex_to_rgb01(h):
+    h = h.lstrip('#')
+    if len(h) == 3:
+        h = ''.join(c * 2 for c in h)
+    try:
+        return np.array([int(h[i:i + 2], 16) / 255 for i in (0, 2, 4)])
+    except ValueError:
+        return np.array([0.55, 0.27, 0.07])  # named colors: fall back to brick
+
+
+def foundation_height(b):
+    if b.get('render'):
+        return b['render']['foundation_height']  # baked by classify_materials.py
+    year = b.get('year_built')
+    if not year:
+        return 0.0
+    if year < 1900:
+        return 1.2
+    if year < 1920:
+        return 0.8
+    return 0.0
+
+
+def roof_tint(wall_rgb, roof_material):
+    """Desaturated, darkened wall hue keyed by roof material."""
+    h, _, s = colorsys.rgb_to_hls(*wall_rgb)
+    lum = ROOF_LUMINANCE.get(roof_material, 0.20)
+    return np.array(colorsys.hls_to_rgb(h, lum, s * 0.3))
+
+
+# ---------------------------------------------------------------------------
+# Software rasterizer
+# ---------------------------------------------------------------------------
+
+def view_basis(k):
+    """(right, up, toward_camera) unit vectors for view k, in (x, y, z)."""
+    theta = 2 * math.pi * k / VIEW_COUNT
+    phi = math.radians(ELEVATION)
+    cam = np.array([math.sin(theta) * math.cos(phi), math.sin(phi),
+                    math.cos(theta) * math.cos(phi)])
+    right = np.array([math.cos(theta), 0.0, -math.sin(theta)])
+    up = np.cross(cam, right)
+    return right, up, cam
+
+
+def shade(color, normal):
+    light = np.array(LIGHT_DIR) / np.linalg.norm(LIGHT_DIR)
+    return color * (AMBIENT + (1 - AMBIENT) * max(0.0, float(np.dot(normal, light))))
+
+
+def wall_quads(pts, y0, y1):
+    """Wall quads (K, 4, 3) between heights y0..y1 with outward normals (K, 3)."""
+    nxt = np.roll(pts, -1, axis=0)
+    d = nxt - pts
+    length = np.hypot(d[:, 0], d[:, 1])
+    keep = length > 1e-6
+    pts, nxt, d, length = pts[keep], nxt[keep], d[keep], length[keep]
+    sign = 1.0 if signed_area(pts) > 0 else -1.0
+    normals = np.column_stack([d[:, 1], np.zeros(len(d)), -d[:, 0]]) * (sign / length)[:, None]
+
+    def lift(p, y):
+        return np.column_stack([p[:, 0], np.full(len(p), y), p[:, 1]])
+
+    quads = np.stack([lift(pts, y0), lift(nxt, y0), lift(nxt, y1), lift(pts, y1)], axis=1)
+    return quads, normals
+
+
+def render_view(walls, roof, basis, v_min, size, scale):
+    """
+    Rasterize one view. walls is a list of (quads, normals, rgb); roof is
+    (points (N, 3), rgb). Returns an RGBA float image at size.
+    """
+    right, up, cam = basis
+    w, h = size
+    ss = SUPERSAMPLE
+    W, H = w * ss, h * ss
+    px_scale = scale * ss
+    half_w = w / 2 / scale
+
+    def to_px(p):
+        u = p @ right
+        v = p @ up
+        return np.column_stack([(u + half_w) * px_scale, (v_min + h / scale - v) * px_scale])
+
+    color = np.zeros((H, W, 3))
+    depth = np.full((H, W), -np.inf)
+    yy, xx = np.mgrid[0:H, 0:W] + 0.5
+
+    for quads, normals, rgb in walls:
+        facing = normals @ cam
+        for quad, normal, f in zip(quads, normals, facing):
+            if f <= 1e-3:
+                continue  # back-facing or edge-on
+            poly = to_px(quad)
+            mask = rasterize_polygons([poly], W, H)
+            if not mask.any():
+                continue
+            # Depth is affine over the planar quad: solve d = a*x + b*y + c
+            d = quad @ cam
+            A = np.column_stack([poly[:3], np.ones(3)])
+            try:
+                a, b, c = np.linalg.solve(A, d[:3])
+            except np.linalg.LinAlgError:
+                continue
+            z = a * xx + b * yy + c
+            win = mask & (z > depth)
+            depth[win] = z[win]
+            color[win] = shade(rgb, normal)
+
+    # Roof cap is the highest surface, so nothing of this building hides it
+    roof_pts, roof_rgb = roof
+    mask = rasterize_polygons([to_px(roof_pts)], W, H)
+    color[mask] = shade(roof_rgb, np.array([0.0, 1.0, 0.0]))
+    depth[mask] = 0.0
+
+    covered = np.isfinite(depth)
+    rgba = np.dstack([color, covered.astype(np.float64)])
+    # Box-filter the supersampled image (premultiplied) down to size
+    rgba = rgba.reshape(h, ss, w, ss, 4).mean(axis=(1, 3))
+    alpha = rgba[..., 3:4]
+    rgba[..., :3] = np.where(alpha > 0, rgba[..., :3] / np.maximum(alpha, 1e-6), 0)
+    return rgba
+
+
+@traced('render building')
+def render_building(b):
+    """Render all views of a building. Returns (strip image, metadata) or None."""
+    fp = b.get('footprint')
+    size3 = b.get('size') or [0, 0, 0]
+    if not fp or len(fp) < 3 or size3[1] <= 0:
+        return None
+
+    pos = b.get('position', [0, 0, 0])
+    pts = np.array([[x - pos[0], z - pos[2]] for x, z in fp], dtype=np.float64)
+    fh = foundation_height(b)
+    top = fh + size3[1]
+
+    wall_rgb = hex_to_rgb01(b.get('color') or '#8B4513')
+    walls = []
+    if fh > 0:
+        walls.append((*wall_quads(pts, 0.0, fh), hex_to_rgb01(FOUNDATION_COLOR)))
+    walls.append((*wall_quads(pts, fh, top), wall_rgb))
+    roof_pts = np.column_stack([pts[:, 0], np.full(len(pts), top), pts[:, 1]])
+    roof = (roof_pts, roof_tint(wall_rgb, b.get('roof_material')))
+
+    # Same sprite extent in every view: bounding cylinder of the building
+    radius = float(np.hypot(pts[:, 0], pts[:, 1]).max())
+    phi = math.radians(ELEVATION)
+    v_min = -radius * math.sin(phi)
+    v_max = top * math.cos(phi) + radius * math.sin(phi)
+    extent = max(2 * radius, v_max - v_min)
+    scale = min(PX_PER_METER, MAX_VIEW_PX / extent)
+    w = max(MIN_VIEW_PX, int(math.ceil(2 * radius * scale)))
+    h = max(MIN_VIEW_PX, int(math.ceil((v_max - v_min) * scale)))
+    # Re-fit the extent to whole pixels so the sprite has no stretching
+    radius = w / scale / 2
+    v_max = v_min + h / scale
+
+    views = [render_view(walls, roof, view_basis(k), v_min, (w, h), scale)
+             for k in range(VIEW_COUNT)]
+    strip = np.concatenate(views, axis=1)
+    img = Image.fromarray(np.clip(np.round(strip * 255), 0, 255).astype(np.uint8), 'RGBA')
+
+    meta = {
+        'view_px': [w, h],
+        'radius': round(radius, 2),
+        'v_min': round(v_min, 2),
+        'v_max': round(v_max, 2),
+    }
+    return img, meta
+
+
+def main():
+    ensure_dirs()
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    with open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    print(f"Loaded {len(buildings)} buildings")
+
+    ids, strips, metas = [], [], []
+    for i, b in enumerate(buildings):
+        if i % 200 == 0:
+            print(f"  Rendering building {i}/{len(buildings)}...")
+        result = render_building(b)
+        if result is None:
+            continue
+        ids.append(b['id'])
+        strips.append(result[0])
+        metas.append(result[1])
+    print(f"Rendered {len(strips)} buildings x {VIEW_COUNT} views")
+
+    if not strips:
+        print("Nothing to pack. Exiting.")
+        sys.exit(1)
+
+    pages, rects = build_pages(strips, mode='RGBA', padding=1)
+
+    page_meta = []
+    for i, page in enumerate(pages):
+        name = f'impostors-{i}.png'
+        path = os.path.join(OUT_DIR, name)
+        page.save(path, 'PNG', optimize=True)
+        page_meta.append({'file': f'textures/impostors/{name}',
+                          'width': page.width, 'height': page.height})
+        print(f"  Page {i}: {page.width}x{page.height} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+    impostors = {}
+    for bid, rect, meta in zip(ids, rects, metas):
+        impostors[bid] = {'page': rect['page'], 'uv': rect['uv'], **meta}
+
+    output = {
+        'meta': {
+            'source': 'buildings.json',
+            'view_count': VIEW_COUNT,
+            'elevation': ELEVATION,
+            'azimuth_origin': 'south (+z), increasing toward east',
+            'uv_origin': 'bottom-left',
+        },
+        'pages': page_meta,
+        'impostors': impostors,
+    }
+    out_path = os.path.join(DATA_DIR, 'impostors.json')
+    with open(out_path, 'w') as f:
+        json.dump(output, f, separators=(',', ':'))
+    print(f"\nWrote {out_path} ({len(impostors)} buildings on {len(pages)} pages)")
+
+
+if __name__ == '__main__':
+    with span('22-bake-impostors', cat='stage'):
+        main()
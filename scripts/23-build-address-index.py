@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Build the normalised address index and reverse-geocode grid.
+
+Every building address (parcel form), landmark address (free text) and OSM
+POI address (addr:housenumber + addr:street) is reduced to one canonical
+key by addresses.py, so '1901 Park Avenue, Suite 1R' and '1901   PARK AV'
+hit the same entry. OSM POIs are tied to a building by reverse geocoding
+their position against the grid.
+
+Usage: python scripts/23-build-address-index.py
+
+Inputs:
+  src/data/buildings.json
+  src/data/landmarks.json     (optional)
+  scripts/raw/osm_pois.json   (optional)
+
+Outputs:
+  src/data/address_index.json   (addresses, streets and grid cells -> building ids)
+"""
+
+import json
+import os
+
+from addresses import build_address_index, osm_address, reverse_geocode
+from config import DATA_DIR, RAW_DIR, ensure_dirs, wgs84_to_local
+from tracing import span
+
+POI_MAX_DISTANCE = 30        # meters — POI to building position
+
+
+def load_optional(path):
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    ensure_dirs()
+
+    with span('load buildings.json'), open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    landmarks = load_optional(os.path.join(DATA_DIR, 'landmarks.json')) or {}
+    osm_pois = load_optional(os.path.join(RAW_DIR, 'osm_pois.json')) or []
+
+    # Landmarks already carry their building
+    extra = [(lm.get('address'), lm['building_id'])
+             for lm in landmarks.get('landmarks', [])
+             if lm.get('address') and lm.get('building_id')]
+    n_landmarks = len(extra)
+
+    # OSM POIs: place by position on the building grid
+    grid = build_address_index(buildings)
+    positions = {b['id']: (b['position'][0], b['position'][2])
+                 for b in buildings if b.get('position')}
+    for poi in osm_pois:
+        text = osm_address(poi.get('tags'))
+        if not text or poi.get('lon') is None or poi.get('lat') is None:
+            continue
+        x, z = wgs84_to_local(poi['lon'], poi['lat'])
+        bid, _ = reverse_geocode(grid, positions, x, z, POI_MAX_DISTANCE)
+        if bid:
+            extra.append((text, bid))
+    n_pois = len(extra) - n_landmarks
+
+    with span('index addresses'):
+        index = build_address_index(buildings, extra)
+    index['meta'] = {
+        'sources': ['buildings.json', 'landmarks.json', 'osm_pois.json'],
+        'key': 'house number + street key (suffix canonical, direction dropped)',
+    }
+
+    out_path = os.path.join(DATA_DIR, 'address_index.json')
+    with span('write address_index.json'), open(out_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+    print(f"Indexed {len(index['addresses'])} addresses on {len(index['streets'])} streets "
+          f"({n_landmarks} from landmarks, {n_pois} from OSM POIs)")
+    print(f"Reverse-geocode grid: {len(index['cells'])} cells of {index['cell_size']:.0f} m")
+    print(f"Written to {out_path}")
+
+
+if __name__ == '__main__':
+    with span('23-build-address-index', cat='stage'):
+        main()
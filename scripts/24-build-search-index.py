@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Build the prebuilt search index used by GlassSearch.
+
+Indexes landmarks (name, address, category, subcategory) and bare
+buildings (name, address) into a sorted term dictionary with posting
+lists. Address terms include both the raw spelling and the normalised
+key from addresses.py, so 'avenue', 'ave' and 'av' all hit. Every posting
+carries a precomputed weight: field boost times inverse document
+frequency, so rare name words outrank common street words.
+
+Terms are sorted, so all terms starting with a typed prefix form one
+contiguous range found by binary search; the client narrows that range
+as the prefix grows instead of scanning records on each keystroke.
+
+Usage: python scripts/24-build-search-index.py
+
+Inputs:
+  src/data/buildings.json
+  src/data/landmarks.json
+
+Outputs:
+  public/search_index.json
+    docs      [[listing or building id, prior], ...]
+    terms     sorted term strings
+    postings  per term, flat [doc, weight, doc, weight, ...] by weight desc
+"""
+
+import json
+import math
+import os
+
+from addresses import normalize_address
+from config import DATA_DIR, PUBLIC_DIR, ensure_dirs
+from textindex import STOPWORDS, normalize_tokens
+from tracing import span, traced
+
+OUT_PATH = os.path.join(PUBLIC_DIR, 'search_index.json')
+
+# Field boosts; a term found in several fields keeps its best one
+FIELD_BOOST = {'name': 4.0, 'address': 2.0, 'category': 1.5, 'subcategory': 1.0}
+WEIGHT_SCALE = 10            # weights are stored as integers
+
+# Document priors: named places rank above bare buildings on equal terms
+PLACE_PRIOR = 1.0
+BUILDING_PRIOR = 0.5
+
+
+def field_terms(doc):
+    """{term: best field boost} for one document."""
+    terms = {}
+
+    def add(text, field):
+        for tok in normalize_tokens(text):
+            terms[tok] = max(terms.get(tok, 0.0), FIELD_BOOST[field])
+
+    add(doc.get('name'), 'name')
+    add(doc.get('address'), 'address')
+    add(normalize_address(doc.get('address')), 'address')
+    add((doc.get('category') or '').replace('_', ' '), 'category')
+    add((doc.get('subcategory') or '').replace('_', ' '), 'subcategory')
+    return terms
+
+
+@traced('collect docs')
+def collect_docs(buildings, landmarks):
+    """Searchable records: landmarks, then buildings no landmark covers."""
+    docs = []
+    covered = set()
+    for lm in landmarks:
+        docs.append((lm['id'], PLACE_PRIOR, lm))
+        if lm.get('building_id'):
+            covered.add(lm['building_id'])
+        if lm.get('address'):
+            covered.add(normalize_address(lm['address']))
+    for b in buildings:
+        if not b.get('address') or b['id'] in covered:
+            continue
+        if normalize_address(b['address']) in covered:
+            continue
+        docs.append((b['id'], BUILDING_PRIOR, b))
+    return docs
+
+
+@traced('index terms')
+def build_index(docs):
+    """Sorted term dictionary with weighted posting lists."""
+    doc_terms = [field_terms(rec) for _, _, rec in docs]
+    df = {}
+    for terms in doc_terms:
+        for t in terms:
+            df[t] = df.get(t, 0) + 1
+
+    n = len(docs)
+    postings = {t: [] for t in df}
+    for d, terms in enumerate(doc_terms):
+        for t, boost in terms.items():
+            idf = math.log(1 + n / df[t])
+            postings[t].append((d, max(1, round(boost * idf * WEIGHT_SCALE))))
+
+    terms = sorted(postings)
+    flat = []
+    for t in terms:
+        plist = sorted(postings[t], key=lambda p: (-p[1], p[0]))
+        flat.append([v for p in plist for v in p])
+    return {
+        'version': 1,
+        'weight_scale': WEIGHT_SCALE,
+        'stopwords': sorted(STOPWORDS),
+        'docs': [[doc_id, prior] for doc_id, prior, _ in docs],
+        'terms': terms,
+        'postings': flat,
+    }
+
+
+def main():
+    ensure_dirs()
+
+    with span('load buildings.json'), open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    with span('load landmarks.json'), open(os.path.join(DATA_DIR, 'landmarks.json')) as f:
+        landmarks = json.load(f)['landmarks']
+
+    docs = collect_docs(buildings, landmarks)
+    index = build_index(docs)
+
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with span('write search_index.json'), open(OUT_PATH, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+    n_postings = sum(len(p) // 2 for p in index['postings'])
+    print(f"Indexed {len(docs)} documents: {len(index['terms'])} terms, {n_postings} postings")
+    print(f"Written to {OUT_PATH} ({os.path.getsize(OUT_PATH) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    with span('24-build-search-index', cat='stage'):
+        main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Build weekly opening-hours bitmasks and the open-at-slot table.
+
+Every landmark with hours (curated day objects, or the raw OSM
+opening_hours string) becomes a 7 x 96 quarter-hour mask (hours.py). The
+inverted table lists, for each of the 672 slots of the week, the landmarks
+open in it, so "open now" is one array lookup and "is this place open" is
+one bit test.
+
+Usage: python scripts/25-build-hours-index.py
+
+Inputs:
+  src/data/landmarks.json
+
+Outputs:
+  public/hours_index.json
+    ids       landmark ids with hours
+    masks     id -> base64 84-byte mask, bit = day * 96 + slot, day 0 = Sunday
+    open_at   per week slot, indices into ids of the landmarks open
+"""
+
+import json
+import os
+
+import numpy as np
+
+from config import DATA_DIR, PUBLIC_DIR, ensure_dirs
+from hours import SLOT_MINUTES, SLOTS_PER_DAY, encode_week, landmark_week
+from tracing import span
+
+OUT_PATH = os.path.join(PUBLIC_DIR, 'hours_index.json')
+
+
+def main():
+    ensure_dirs()
+
+    with span('load landmarks.json'), open(os.path.join(DATA_DIR, 'landmarks.json')) as f:
+        landmarks = json.load(f)['landmarks']
+
+    ids, weeks = [], []
+    for lm in landmarks:
+        week, unparsed = landmark_week(lm)
+        for rule in unparsed:
+            print(f"  {lm['id']}: skipped non-weekly rule '{rule}'")
+        if week is None:
+            continue
+        ids.append(lm['id'])
+        weeks.append(week.reshape(-1))
+
+    stack = np.array(weeks, dtype=bool).reshape(len(ids), 7 * SLOTS_PER_DAY)
+    open_at = [np.flatnonzero(stack[:, s]).tolist() for s in range(stack.shape[1])]
+
+    index = {
+        'slot_minutes': SLOT_MINUTES,
+        'slots_per_day': SLOTS_PER_DAY,
+        'first_day': 'sunday',
+        'ids': ids,
+        'masks': {i: encode_week(w) for i, w in zip(ids, weeks)},
+        'open_at': open_at,
+    }
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with span('write hours_index.json'), open(OUT_PATH, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+    busiest = max(range(len(open_at)), key=lambda s: len(open_at[s])) if ids else 0
+    print(f"Hours for {len(ids)} of {len(landmarks)} landmarks; "
+          f"busiest slot {busiest} ({len(open_at[busiest]) if ids else 0} open)")
+    print(f"Written to {OUT_PATH} ({os.path.getsize(OUT_PATH) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    with span('25-build-hours-index', cat='stage'):
+        main()
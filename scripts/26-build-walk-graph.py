@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Build the pedestrian graph and walking-distance tables.
+
+Street centerlines and park footpaths are merged into one routable graph
+(walkgraph.py: hash-grid snapping, splits at crossings, connectors from
+dangling path ends). Every building entrance (the midpoint of its
+street-facing edge) is attached to its nearest graph edge and a Dijkstra
+seeded from both ends of that edge gives its walking distance to every
+graph node. Landmarks share their building's row.
+
+Distances are quantized to whole meters in a row-major Uint16 table, so
+a courier-to-place walking distance is: nearest graph node to the courier,
+one array read, plus the courier's straight-line gap to that node.
+
+Usage: python scripts/26-build-walk-graph.py
+
+Inputs:
+  src/data/streets.json
+  src/data/park_paths.json
+  src/data/buildings.json
+  src/data/landmarks.json
+  src/data/front_edges.json   (match_facades.py; computed if absent)
+
+Outputs:
+  public/walk/graph.json      manifest: nodes, row per building/landmark id, table layout
+  public/walk/distances.bin   Uint16 little-endian, rows x nodes, meters (65535 = unreachable)
+
+Note: ground_layers.json streets are SVG traces of the same centerlines
+and are not added a second time.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import CENTER_LAT, CENTER_LON, DATA_DIR, LAT_TO_METERS, LON_TO_METERS, PROJECTION, \
+    PUBLIC_DIR, ensure_dirs
+from tracing import span
+from walkgraph import attach_points, build_graph, csr_adjacency, dijkstra
+
+OUT_DIR = os.path.join(PUBLIC_DIR, 'walk')
+QUANTUM = 1.0                # meters per table unit
+UNREACHABLE = 65535
+CHUNK = 64                   # sources per worker task
+
+
+def load_front_edges(buildings):
+    """Street-facing edge per building id (front_edges.json, else computed)."""
+    path = os.path.join(DATA_DIR, 'front_edges.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    from match_facades import compute_front_edges, index_streets
+    with open(os.path.join(DATA_DIR, 'streets.json')) as f:
+        streets = json.load(f)['streets']
+    print(f"  {path} not found; computing front edges from street geometry...")
+    return compute_front_edges(buildings, index_streets(streets))
+
+
+def distance_rows(adjacency, seeds):
+    """Quantized distance rows for a chunk of seed lists."""
+    rows = np.empty((len(seeds), len(adjacency[0]) - 1), dtype=np.uint16)
+    for i, s in enumerate(seeds):
+        d = np.round(dijkstra(adjacency, s) / QUANTUM)
+        rows[i] = np.where(np.isfinite(d), np.minimum(d, UNREACHABLE - 1), UNREACHABLE)
+    return rows
+
+
+def main():
+    ensure_dirs()
+
+    with span('load inputs'):
+        with open(os.path.join(DATA_DIR, 'streets.json')) as f:
+            streets = json.load(f)['streets']
+        with open(os.path.join(DATA_DIR, 'park_paths.json')) as f:
+            paths = json.load(f)['paths']
+        with open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+            buildings = json.load(f)['buildings']
+        with open(os.path.join(DATA_DIR, 'landmarks.json')) as f:
+            landmarks = json.load(f)['landmarks']
+
+    t0 = time.perf_counter()
+    with span('index graph'):
+        graph = build_graph([s['points'] for s in streets] + [p['points'] for p in paths])
+        adjacency = csr_adjacency(graph)
+    nodes, edges, length = graph['nodes'], graph['edges'], graph['length']
+    print(f"Graph: {len(nodes)} nodes, {len(edges)} edges from {len(streets)} streets + "
+          f"{len(paths)} paths ({graph['connectors']} path connectors) "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    # Entrances: front-edge midpoint, else the footprint position
+    front = load_front_edges(buildings)
+    ids, points = [], []
+    for b in buildings:
+        fe = front.get(b['id'])
+        if fe:
+            points.append((fe['mid_x'], fe['mid_z']))
+        elif b.get('position'):
+            points.append((b['position'][0], b['position'][2]))
+        else:
+            continue
+        ids.append(b['id'])
+    with span('match entrances'):
+        edge, offset, t = attach_points(graph, np.array(points))
+    seeds = [[(int(edges[e, 0]), float(o + tt * length[e])),
+              (int(edges[e, 1]), float(o + (1 - tt) * length[e]))]
+             for e, o, tt in zip(edge, offset, t)]
+
+    t0 = time.perf_counter()
+    chunks = [seeds[i:i + CHUNK] for i in range(0, len(seeds), CHUNK)]
+    # Worker processes are not traced; the span covers the whole pool
+    with span('distance table', sources=len(seeds)), ProcessPoolExecutor() as pool:
+        table = np.concatenate(list(pool.map(distance_rows, [adjacency] * len(chunks), chunks)))
+    print(f"Distances: {len(ids)} entrances x {len(nodes)} nodes "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    rows = {bid: i for i, bid in enumerate(ids)}
+    n_landmarks = 0
+    for lm in landmarks:
+        if lm.get('building_id') in rows and lm['id'] not in rows:
+            rows[lm['id']] = rows[lm['building_id']]
+            n_landmarks += 1
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    with span('write distances.bin'):
+        table.astype('<u2').tofile(os.path.join(OUT_DIR, 'distances.bin'))
+    manifest = {
+        'meta': {
+            'sources': ['streets.json', 'park_paths.json', 'front_edges.json'],
+            'entrance': 'front-edge midpoint',
+        },
+        'projection': {
+            'mode': PROJECTION['mode'], 'center_lon': CENTER_LON, 'center_lat': CENTER_LAT,
+            'lon_to_meters': LON_TO_METERS, 'lat_to_meters': LAT_TO_METERS,
+        },
+        'table': {
+            'file': 'distances.bin', 'dtype': 'uint16le', 'rows': len(ids),
+            'cols': len(nodes), 'quantum_m': QUANTUM, 'unreachable': UNREACHABLE,
+        },
+        'nodes': np.round(nodes, 1).tolist(),
+        'rows': rows,
+    }
+    with span('write graph.json'), open(os.path.join(OUT_DIR, 'graph.json'), 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    reach = (table != UNREACHABLE).mean() * 100
+    print(f"Rows for {len(ids)} buildings + {n_landmarks} landmarks; {reach:.1f}% of pairs reachable")
+    print(f"Written to {OUT_DIR}/ (distances.bin {table.nbytes / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    with span('26-build-walk-graph', cat='stage'):
+        main()
@@ -0,0 +1,180 @@
+"""
+Address normalisation and lookup indices.
+
+Parcels spell addresses '1732   CHOUTEAU AV' or '2315 D  RUTGER ST', OSM
+splits them into addr:housenumber / addr:street ('Chouteau Avenue'), and
+landmarks carry free text ('1901 Park Avenue, Suite 1R'). All of them
+reduce to one key, '1732 CHOUTEAU AV': collapsed whitespace, canonical
+street suffix, leading direction and unit letters dropped. House number
+ranges ('1801-1805') expand to one key per number on that side of the
+street.
+
+The address index maps key -> building ids, street key -> building ids,
+and a coarse grid cell -> building ids for reverse geocoding.
+"""
+import math
+import re
+
+# Street suffix spellings -> canonical token, for name/address keys
+STREET_TYPES = {
+    'AV': 'AV', 'AVE': 'AV', 'AVENUE': 'AV',
+    'ST': 'ST', 'STREET': 'ST',
+    'PL': 'PL', 'PLACE': 'PL',
+    'LN': 'LN', 'LANE': 'LN',
+    'DR': 'DR', 'DRIVE': 'DR',
+    'ALY': 'ALY', 'ALLEY': 'ALY',
+    'PKWY': 'PKWY', 'PARKWAY': 'PKWY',
+    'BLVD': 'BLVD', 'BOULEVARD': 'BLVD',
+    'CT': 'CT', 'COURT': 'CT',
+    'TER': 'TER', 'TERRACE': 'TER',
+    'RD': 'RD', 'ROAD': 'RD',
+}
+DIRECTIONS = {'N', 'S', 'E', 'W', 'NORTH', 'SOUTH', 'EAST', 'WEST'}
+
+MAX_RANGE_KEYS = 25          # larger house number ranges index their endpoints only
+GRID_CELL = 50.0             # meters — reverse-geocode cell size
+
+_RANGE = re.compile(r'^(\d+)[A-Z]?(?:-(\d+)[A-Z]?)?$')
+
+
+def street_key(name):
+    """Canonical street key: 'South 18th Street' and 'S 18TH ST' -> '18TH ST'."""
+    tokens = re.sub(r'[^A-Z0-9 ]', ' ', (name or '').upper()).split()
+    if tokens and tokens[-1] in STREET_TYPES:
+        tokens[-1] = STREET_TYPES[tokens[-1]]
+    while len(tokens) > 2 and tokens[0] in DIRECTIONS:
+        tokens = tokens[1:]
+    return ' '.join(tokens)
+
+
+def house_numbers(token):
+    """'1732' -> [1732]; '1801-1805' -> [1801, 1803, 1805]; '1801-05' -> [1801, 1803, 1805]."""
+    m = _RANGE.match(token)
+    if not m:
+        return []
+    lo = int(m.group(1))
+    if not m.group(2):
+        return [lo]
+    hi_s = m.group(2)
+    if len(hi_s) < len(m.group(1)):
+        hi_s = m.group(1)[:len(m.group(1)) - len(hi_s)] + hi_s
+    hi = int(hi_s)
+    if hi < lo:
+        lo, hi = hi, lo
+    step = 2 if (hi - lo) % 2 == 0 else 1
+    nums = list(range(lo, hi + 1, step))
+    return nums if len(nums) <= MAX_RANGE_KEYS else [lo, hi]
+
+
+def parse_address(text):
+    """
+    Split an address into (house numbers, street key).
+
+    Anything after the first comma (suite, city, state) is ignored. Returns
+    ([], street key) when there is no house number.
+    """
+    text = (text or '').upper().split(',')[0]
+    text = re.sub(r'\b(SUITE|STE|APT|UNIT)\b.*$|#.*$', '', text)
+    tokens = re.sub(r'[^A-Z0-9 \-]', ' ', text).split()
+    nums = house_numbers(tokens[0]) if tokens else []
+    if nums:
+        tokens = tokens[1:]
+        # Unit letter between number and street ('2315 D  RUTGER ST')
+        if len(tokens) > 2 and len(tokens[0]) == 1 and tokens[0] not in DIRECTIONS:
+            tokens = tokens[1:]
+    return nums, street_key(' '.join(tokens))
+
+
+def address_keys(text):
+    """Every normalised key an address answers to ('1801-1803 Park Ave' -> 2 keys)."""
+    nums, street = parse_address(text)
+    if not street:
+        return []
+    return [f'{n} {street}' for n in nums]
+
+
+def normalize_address(text):
+    """Single canonical key ('1732   CHOUTEAU AV' -> '1732 CHOUTEAU AV'), or None."""
+    keys = address_keys(text)
+    return keys[0] if keys else None
+
+
+def osm_address(tags):
+    """Address text from OSM addr:* tags, or None."""
+    number = (tags or {}).get('addr:housenumber')
+    street = (tags or {}).get('addr:street')
+    if not number or not street:
+        return None
+    return f'{number} {street}'
+
+
+def grid_cell(x, z, cell=GRID_CELL):
+    """Grid cell key 'ix,iz' of a local point."""
+    return f'{math.floor(x / cell)},{math.floor(z / cell)}'
+
+
+def build_address_index(buildings, extra=(), cell=GRID_CELL):
+    """
+    Address, street and reverse-geocode indices over buildings.
+
+    extra is an iterable of (address text, building id) pairs from other
+    sources (landmarks, OSM POIs). Returns a JSON-ready dict:
+      addresses  key -> [building ids]
+      streets    street key -> [building ids]
+      cells      'ix,iz' -> [building ids], by building position
+    """
+    addresses, streets, cells = {}, {}, {}
+
+    def add(table, key, bid):
+        ids = table.setdefault(key, [])
+        if bid not in ids:
+            ids.append(bid)
+
+    pairs = [(b.get('address'), b['id']) for b in buildings]
+    for text, bid in list(pairs) + list(extra):
+        nums, street = parse_address(text)
+        if not street:
+            continue
+        for n in nums:
+            add(addresses, f'{n} {street}', bid)
+        if nums:
+            add(streets, street, bid)
+
+    for b in buildings:
+        pos = b.get('position')
+        if pos:
+            add(cells, grid_cell(pos[0], pos[2], cell), b['id'])
+
+    return {'cell_size': cell, 'addresses': addresses, 'streets': streets, 'cells': cells}
+
+
+def lookup_address(index, text):
+    """Building ids at an address (any form), in index order."""
+    ids = []
+    for key in address_keys(text):
+        for bid in index['addresses'].get(key, []):
+            if bid not in ids:
+                ids.append(bid)
+    return ids
+
+
+def reverse_geocode(index, positions, x, z, max_distance=None):
+    """
+    Nearest building id to a local point, from the 3x3 cells around it.
+
+    positions maps building id -> (x, z). max_distance defaults to one cell,
+    the radius the neighbourhood is guaranteed to cover. Returns (id, dist)
+    or (None, None).
+    """
+    cell = index['cell_size']
+    limit = cell if max_distance is None else min(max_distance, cell)
+    ix, iz = math.floor(x / cell), math.floor(z / cell)
+    best, best_d = None, None
+    for dx in (-1, 0, 1):
+        for dz in (-1, 0, 1):
+            for bid in index['cells'].get(f'{ix + dx},{iz + dz}', []):
+                px, pz = positions[bid]
+                d = math.hypot(px - x, pz - z)
+                if d <= limit and (best_d is None or d < best_d or (d == best_d and bid < best)):
+                    best, best_d = bid, d
+    return best, best_d
@@ -0,0 +1,77 @@
+"""
+Minimum-cost bipartite assignment (Hungarian method).
+
+Drop-in for scipy.optimize.linear_sum_assignment on dense, finite cost
+matrices, so matching stages don't need scipy. Shortest-augmenting-path
+formulation with row/column potentials: O(n^2 m), with the inner column scan
+vectorized in NumPy.
+"""
+import numpy as np
+
+
+def linear_sum_assignment(cost):
+    """
+    Optimal assignment for an (n, m) cost matrix.
+
+    Returns (rows, cols) index arrays of length min(n, m), sorted by row, such
+    that cost[rows, cols].sum() is minimal. Ties resolve to the lowest column
+    index, so results are deterministic for a given matrix.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError(f"cost must be 2-D, got shape {cost.shape}")
+    if not np.isfinite(cost).all():
+        raise ValueError("cost must be finite")
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # 1-based rows/columns; column 0 is the virtual root of each search
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)   # row assigned to each column
+    way = np.zeros(m + 1, dtype=np.int64)     # previous column on the path
+
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used
+            free[0] = False
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free[1:] & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    cols = np.nonzero(owner[1:])[0]
+    rows = owner[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows, kind='stable')
+    return rows[order], cols[order]
@@ -0,0 +1,112 @@
+"""
+Texture atlas packing shared by the baking stages.
+
+Rectangles are shelf-packed (tallest first) into square pages of at most
+MAX_PAGE_SIZE pixels, then each page is shrunk to the smallest power-of-two
+size that still holds its contents. UV rectangles follow the three.js
+convention for textures loaded with flipY: (0, 0) is the bottom-left corner.
+"""
+from PIL import Image
+
+MAX_PAGE_SIZE = 2048
+PADDING = 4  # px of edge bleed around every tile (keeps mipmaps clean)
+
+
+def next_pow2(n):
+    """Smallest power of two >= n."""
+    p = 1
+    while p < n:
+        p *= 2
+    return p
+
+
+def pack_rects(sizes, max_size=MAX_PAGE_SIZE, padding=PADDING):
+    """
+    Shelf-pack (w, h) sizes into pages.
+
+    Returns (placements, pages) where placements[i] is (page, x, y) for
+    sizes[i] and pages is a list of (width, height) power-of-two page sizes.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements = [None] * len(sizes)
+    extents = []  # per page: [used_w, used_h]
+
+    page = -1
+    shelf_x = shelf_y = shelf_h = 0
+    for i in order:
+        w, h = sizes[i]
+        pw, ph = w + 2 * padding, h + 2 * padding
+        if pw > max_size or ph > max_size:
+            raise ValueError(f"Tile {w}x{h} does not fit in a {max_size}px page")
+
+        if page < 0 or shelf_x + pw > max_size:
+            # Start a new shelf (and a new page if this one is full)
+            shelf_y += shelf_h
+            shelf_x, shelf_h = 0, 0
+            if page < 0 or shelf_y + ph > max_size:
+                page += 1
+                shelf_y = 0
+                extents.append([0, 0])
+
+        placements[i] = (page, shelf_x + padding, shelf_y + padding)
+        shelf_x += pw
+        shelf_h = max(shelf_h, ph)
+        extents[page][0] = max(extents[page][0], shelf_x)
+        extents[page][1] = max(extents[page][1], shelf_y + shelf_h)
+
+    pages = [(next_pow2(w), next_pow2(h)) for w, h in extents]
+    return placements, pages
+
+
+def uv_rect(x, y, w, h, page_w, page_h):
+    """Pixel rect -> [u0, v0, u1, v1] with v measured from the bottom edge."""
+    return [
+        round(x / page_w, 6),
+        round(1 - (y + h) / page_h, 6),
+        round((x + w) / page_w, 6),
+        round(1 - y / page_h, 6),
+    ]
+
+
+def paste_with_bleed(page, tile, x, y, padding=PADDING):
+    """Paste tile at (x, y) and replicate its border pixels into the padding."""
+    w, h = tile.size
+    page.paste(tile, (x, y))
+    if padding <= 0:
+        return
+    p = padding
+    strips = [
+        ((0, 0, 1, h), (p, h), (x - p, y)),              # left
+        ((w - 1, 0, w, h), (p, h), (x + w, y)),          # right
+        ((0, 0, w, 1), (w, p), (x, y - p)),              # top
+        ((0, h - 1, w, h), (w, p), (x, y + h)),          # bottom
+        ((0, 0, 1, 1), (p, p), (x - p, y - p)),          # corners
+        ((w - 1, 0, w, 1), (p, p), (x + w, y - p)),
+        ((0, h - 1, 1, h), (p, p), (x - p, y + h)),
+        ((w - 1, h - 1, w, h), (p, p), (x + w, y + h)),
+    ]
+    for box, size, dest in strips:
+        page.paste(tile.crop(box).resize(size, Image.NEAREST), dest)
+
+
+def build_pages(tiles, mode='RGB', max_size=MAX_PAGE_SIZE, padding=PADDING):
+    """
+    Pack a list of PIL images into atlas pages.
+
+    Returns (page_images, rects) where rects[i] is a dict with the page
+    index, pixel rect and UV rect of tiles[i].
+    """
+    placements, page_sizes = pack_rects([t.size for t in tiles], max_size, padding)
+    page_images = [Image.new(mode, size) for size in page_sizes]
+
+    rects = []
+    for tile, (page, x, y) in zip(tiles, placements):
+        paste_with_bleed(page_images[page], tile.convert(mode), x, y, padding)
+        pw, ph = page_sizes[page]
+        w, h = tile.size
+        rects.append({
+            'page': page,
+            'px': [x, y, w, h],
+            'uv': uv_rect(x, y, w, h, pw, ph),
+        })
+    return page_images, rects
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmark pipeline stages on synthetic datasets at 1x / 10x / 100x density.
+
+Each (stage, scale) runs in a fresh process: the synthetic dataset is
+generated (synth.py, seeded), then only the stage call is timed, --repeats
+times on fresh copies of its arguments. The fastest sample is the stage's
+time (wall_s; all samples are kept), for the baseline and --check alike,
+so one slow sample from a busy machine is not a regression. Peak RSS is
+the child's high-water mark. The scaling exponent is the slope of
+log(wall time) against log(scale). A scale whose predicted time (from the
+exponent so far, assumed quadratic after one point) exceeds --budget is
+skipped rather than left to run for hours.
+
+Usage:
+  python scripts/bench/run.py                       # all stages, all scales
+  python scripts/bench/run.py --stages match_street --scales 1 10
+  python scripts/bench/run.py --save-baseline       # record scripts/bench/baseline.json
+  python scripts/bench/run.py --check               # exit 1 if slower than the baseline
+
+Outputs:
+  scripts/bench/results.json    (latest run)
+  scripts/bench/baseline.json   (with --save-baseline)
+
+Baselines are machine-specific; record one on the machine that runs --check.
+
+A stage that raises exits the run with status 1 once results are written
+(a stage that errors never gets a baseline, so --check alone would not
+notice). Before benchmarking, every module-level function (@traced ones included) of
+the scripts that use process pools (POOL_SCRIPTS) must survive a pickle
+round trip; the run exits 1 otherwise.
+"""
+
+import argparse
+import copy
+import datetime
+import importlib.util
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import resource
+import sys
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+
+import synth  # noqa: E402
+
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_BUDGET = 120.0       # seconds — predicted stage time above this is skipped
+REPEATS = 5                  # timed calls per (stage, scale); the fastest counts
+TOLERANCE = 0.25             # --check fails beyond baseline * (1 + TOLERANCE) ...
+MIN_DELTA = 0.05             # ... and at least this many seconds slower (timer noise)
+
+# Scripts that send (possibly @traced) functions to a process pool
+POOL_SCRIPTS = ['10-fetch-mapillary', '11-merge-all', 'match_facades']
+
+
+class StageUnavailable(Exception):
+    """The stage cannot run here (e.g. a missing optional dependency)."""
+
+
+def load_script(name):
+    """Import a numbered pipeline script ('11-merge-all') as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'),
+                                                  os.path.join(SCRIPTS_DIR, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    # Registered so its functions pickle by reference (process pools)
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+    except SystemExit:
+        raise StageUnavailable(f'{name}.py exited on import (missing dependency?)')
+    except ImportError as e:
+        raise StageUnavailable(f'{name}.py: {e}')
+    return module
+
+
+def unpicklable_functions(module):
+    """
+    Names of module-level functions (@traced ones included) that do not
+    pickle back to themselves, so cannot be sent to a process pool.
+    """
+    failed = []
+    for name, obj in sorted(vars(module).items()):
+        if not isinstance(obj, types.FunctionType):
+            continue
+        try:
+            if pickle.loads(pickle.dumps(obj)) is not obj:
+                failed.append(name)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            failed.append(name)
+    return failed
+
+
+# ---------------------------------------------------------------------------
+# Stages: dataset -> (callable, args)
+# ---------------------------------------------------------------------------
+
+def setup_enrich_buildings(data):
+    merge = load_script('11-merge-all')
+    return merge.enrich_buildings, (data['buildings'], data['osm_buildings'], data['osm_pois'],
+                                    data['parcels'], data['mapillary'])
+
+
+def setup_enrich_landmarks(data):
+    merge = load_script('11-merge-all')
+    return merge.enrich_landmarks, (data['landmarks'], data['buildings'], data['osm_pois'],
+                                    data['parcels'])
+
+
+def setup_match_buildings_to_images(data):
+    mapillary = load_script('10-fetch-mapillary')
+    return mapillary.match_buildings_to_images, (data['buildings'], data['images'])
+
+
+def setup_match_street(data):
+    import match_facades
+    return match_facades.match_street, synth.street_job(data, random.Random(data['seed']))
+
+
+def setup_lamp_dedup(data):
+    lamps = load_script('14-generate-street-lamps')
+    candidates = lamps.generate_perimeter_lamps(spacing=25 / data['scale'])
+    return lamps.dedup_lamps, (candidates, data['park_lamps'])
+
+
+STAGES = {
+    'enrich_buildings': setup_enrich_buildings,
+    'enrich_landmarks': setup_enrich_landmarks,
+    'match_buildings_to_images': setup_match_buildings_to_images,
+    'match_street': setup_match_street,
+    'lamp_dedup': setup_lamp_dedup,
+}
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_stage(stage, scale, seed, repeats, conn):
+    """Child process: build the dataset, time the stage call repeats times, report back."""
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        data = synth.generate(scale, seed)
+        fn, args = STAGES[stage](data)
+        setup_rss = peak_rss_mb()
+        samples = []
+        for i in range(repeats):
+            # Stages may mutate their inputs (enrich_landmarks sets building ids)
+            call_args = copy.deepcopy(args) if i < repeats - 1 else args
+            t0 = time.perf_counter()
+            fn(*call_args)
+            samples.append(round(time.perf_counter() - t0, 4))
+            del call_args
+        conn.send({'status': 'ok', 'wall_s': min(samples), 'samples': samples,
+                   'peak_rss_mb': round(peak_rss_mb(), 1), 'setup_rss_mb': round(setup_rss, 1)})
+    except StageUnavailable as e:
+        conn.send({'status': 'unavailable', 'reason': str(e)})
+    except Exception as e:
+        conn.send({'status': 'error', 'reason': repr(e)})
+
+
+def run_isolated(stage, scale, seed, repeats, timeout):
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=run_stage, args=(stage, scale, seed, repeats, child))
+    proc.start()
+    child.close()
+    if parent.poll(timeout):
+        result = parent.recv()
+    else:
+        proc.terminate()
+        result = {'status': 'timeout', 'reason': f'no result after {timeout:.0f}s'}
+    proc.join()
+    return result
+
+
+def scaling_exponent(runs):
+    """Least-squares slope of log(wall) vs log(scale) over completed runs, or None."""
+    pts = [(math.log(int(s)), math.log(max(r['wall_s'], 1e-6)))
+           for s, r in runs.items() if r['status'] == 'ok']
+    if len(pts) < 2:
+        return None
+    mx = sum(p[0] for p in pts) / len(pts)
+    my = sum(p[1] for p in pts) / len(pts)
+    sxx = sum((p[0] - mx) ** 2 for p in pts)
+    return round(sum((p[0] - mx) * (p[1] - my) for p in pts) / sxx, 2)
+
+
+def bench_stage(stage, scales, seed, budget, repeats):
+    runs = {}
+    last = None
+    for scale in sorted(scales):
+        if last is not None:
+            exponent = scaling_exponent(runs) or 2.0
+            predicted = last[1] * (scale / last[0]) ** max(exponent, 1.0)
+            if predicted > budget:
+                runs[str(scale)] = {'status': 'skipped',
+                                    'reason': f'predicted {predicted:.0f}s > budget {budget:.0f}s'}
+                print(f"  {stage:28s} {scale:>4d}x  skipped (predicted {predicted:.0f}s)")
+                continue
+        result = run_isolated(stage, scale, seed, repeats, timeout=max(2 * budget, 30) * repeats)
+        runs[str(scale)] = result
+        if result['status'] == 'ok':
+            last = (scale, result['wall_s'])
+            print(f"  {stage:28s} {scale:>4d}x  {result['wall_s']:9.3f}s  "
+                  f"(max {max(result['samples']):.3f}s)  peak {result['peak_rss_mb']:7.1f} MB")
+        else:
+            print(f"  {stage:28s} {scale:>4d}x  {result['status']}: {result['reason']}")
+            if result['status'] != 'timeout':
+                break
+    return {'runs': runs, 'exponent': scaling_exponent(runs)}
+
+
+def check_against(results, baseline, tolerance):
+    """Regression messages for every (stage, scale) slower than the baseline."""
+    failures = []
+    for stage, res in results['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base:
+            continue
+        for scale, run in res['runs'].items():
+            ref = base['runs'].get(scale)
+            if not ref or ref['status'] != 'ok':
+                continue
+            if run['status'] != 'ok':
+                failures.append(f"{stage} {scale}x: {run['status']} (baseline {ref['wall_s']:.3f}s)")
+            elif run['wall_s'] > ref['wall_s'] * (1 + tolerance) and run['wall_s'] - ref['wall_s'] > MIN_DELTA:
+                failures.append(f"{stage} {scale}x: {run['wall_s']:.3f}s vs baseline "
+                                f"{ref['wall_s']:.3f}s (+{run['wall_s'] / ref['wall_s'] - 1:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--stages', nargs='+', choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='skip scales predicted to take longer than this (seconds)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write {BASELINE_PATH}')
+    parser.add_argument('--check', action='store_true', help='fail if slower than the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--repeats', type=int, default=REPEATS,
+                        help='timed calls per stage and scale; the fastest counts')
+    args = parser.parse_args()
+
+    failed = []
+    for name in POOL_SCRIPTS:
+        try:
+            failed += [f"{name}.{fn}" for fn in unpicklable_functions(load_script(name))]
+        except StageUnavailable as e:
+            print(f"  pickle check skipped: {e}")
+    if failed:
+        print(f"Functions that cannot be sent to a process pool: {', '.join(failed)}")
+        sys.exit(1)
+
+    print(f"Benchmarking {len(args.stages)} stages at scales {args.scales} "
+          f"(seed {args.seed}, best of {args.repeats})")
+    results = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'scales': args.scales,
+            'repeats': args.repeats,
+            'base_counts': synth.BASE_COUNTS,
+        },
+        'stages': {},
+    }
+    for stage in args.stages:
+        results['stages'][stage] = bench_stage(stage, args.scales, args.seed, args.budget, args.repeats)
+        exp = results['stages'][stage]['exponent']
+        if exp is not None:
+            print(f"  {stage:28s} scaling exponent {exp}")
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {RESULTS_PATH}")
+
+    errors = [f"{stage} {scale}x: {run['reason']}"
+              for stage, res in results['stages'].items()
+              for scale, run in res['runs'].items() if run['status'] == 'error']
+    for msg in errors:
+        print(f"  ERROR {msg}")
+    if errors:
+        sys.exit(1)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if args.check:
+        if not os.path.exists(BASELINE_PATH):
+            print(f"No baseline at {BASELINE_PATH}; run with --save-baseline first")
+            sys.exit(2)
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('repeats', 1) != args.repeats:
+            print(f"Baseline was timed best of {baseline['meta'].get('repeats', 1)}, this run best of "
+                  f"{args.repeats}; re-record it with --save-baseline --repeats {args.repeats}")
+            sys.exit(2)
+        failures = check_against(results, baseline, args.tolerance)
+        for msg in failures:
+            print(f"  REGRESSION {msg}")
+        if failures:
+            sys.exit(1)
+        print(f"No regressions against baseline ({baseline['meta']['date']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Seeded synthetic datasets for the benchmark suite.
+
+Scale 1 matches the real neighborhood (1,056 buildings, 85 landmarks,
+~300 POIs, ~2,000 Mapillary images); scale k multiplies every count by k
+inside the same config.BBOX, so density grows the way a denser city's
+would. Records carry the fields the pipeline stages read, in the same
+shapes the fetch stages produce:
+
+  buildings      {id, footprint, position, size, address, year_built}
+  parcels        {handle, address, owner, year_built, stories, centroid}
+  osm_buildings  {osm_id, centroid_x, centroid_z, tags}
+  osm_pois       {osm_id, name, category, lon, lat, x, z, tags}
+  landmarks      {id, name, building_id, category}
+  images         {image_id, lon, lat, local_x, local_z, compass_angle, captured_at,
+                  thumb_*_url}  (as enrich_images_with_local_coords returns them)
+  mapillary      {building_id, image_id, ...}  (match records)
+  streets        [{name, points}] on a grid rotated with the street grid
+"""
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BBOX, local_to_wgs84, wgs84_to_local
+
+BASE_COUNTS = {
+    'buildings': 1056,
+    'landmarks': 85,
+    'osm_pois': 300,
+    'images': 2000,
+    'park_lamps': 33,
+}
+OSM_BUILDING_FRACTION = 0.6
+MAPILLARY_MATCH_FRACTION = 0.5
+GRID_ROTATION = 9.2 * math.pi / 180
+BLOCK = 90.0                 # meters between synthetic streets
+
+STREET_NAMES = ['PARK', 'LAFAYETTE', 'MISSISSIPPI', 'MISSOURI', 'HICKORY', 'RUTGER', 'CHOUTEAU',
+                'DOLMAN', 'LASALLE', 'MACKAY', 'ALBION', 'KENNETT', 'PRESTON', 'SIMPSON', 'CARROLL']
+NAME_WORDS = ['Square', 'Park', 'Brewery', 'Cafe', 'Bistro', 'Gallery', 'Market', 'Studio',
+              'Tavern', 'Bakery', 'Salon', 'Hardware', 'Books', 'Wine', 'Coffee', 'Garden',
+              'Lafayette', 'Benton', 'Union', 'Victorian', 'Corner', 'Station', 'House']
+CATEGORIES = ['dining', 'shopping', 'services', 'arts', 'historic', 'community']
+MATERIALS = ['brick', 'stone', 'wood', 'stucco', 'vinyl']
+
+
+def local_extent():
+    """(min_x, max_x, min_z, max_z) of config.BBOX in local meters."""
+    x0, z1 = wgs84_to_local(BBOX['min_lon'], BBOX['min_lat'])
+    x1, z0 = wgs84_to_local(BBOX['max_lon'], BBOX['max_lat'])
+    return x0, x1, z0, z1
+
+
+def to_wgs84(x, z):
+    return local_to_wgs84(x, z)
+
+
+def rotate(x, z, angle=GRID_ROTATION):
+    c, s = math.cos(angle), math.sin(angle)
+    return x * c - z * s, x * s + z * c
+
+
+def make_streets(extent):
+    """East-west and north-south streets every BLOCK meters, rotated with the grid."""
+    x0, x1, z0, z1 = extent
+    reach = max(x1 - x0, z1 - z0)
+    streets = []
+    k = 0
+    for axis in ('ew', 'ns'):
+        for off in range(int(-reach / 2 // BLOCK), int(reach / 2 // BLOCK) + 1):
+            t = off * BLOCK
+            ends = [(-reach, t), (reach, t)] if axis == 'ew' else [(t, -reach), (t, reach)]
+            pts = [list(rotate(*p)) for p in ends]
+            # Intermediate vertices every 30 m, as real centerlines have
+            n = int(2 * reach // 30)
+            pts = [[pts[0][0] + (pts[1][0] - pts[0][0]) * i / n,
+                    pts[0][1] + (pts[1][1] - pts[0][1]) * i / n] for i in range(n + 1)]
+            suffix = 'AV' if axis == 'ew' else 'ST'
+            streets.append({'name': f"{STREET_NAMES[k % len(STREET_NAMES)]} {k // len(STREET_NAMES) or ''}".strip()
+                            + f' {suffix}', 'points': pts})
+            k += 1
+    return streets
+
+
+def random_name(rng):
+    return ' '.join(rng.sample(NAME_WORDS, rng.choice((2, 2, 3))))
+
+
+def generate(scale=1, seed=0):
+    """Synthetic dataset at scale x the real counts."""
+    rng = random.Random(seed * 1000 + scale)
+    extent = local_extent()
+    x0, x1, z0, z1 = extent
+    streets = make_streets(extent)
+
+    # Buildings on a jittered lattice, rotated with the street grid
+    n = BASE_COUNTS['buildings'] * scale
+    spacing = math.sqrt((x1 - x0) * (z1 - z0) / n)
+    cols = max(1, int((x1 - x0) / spacing))
+    avenues = [s for s in streets if s['name'].endswith(' AV')]
+    buildings = []
+    for i in range(n):
+        cx = x0 + (i % cols + 0.5 + rng.uniform(-0.3, 0.3)) * spacing
+        cz = z0 + (i // cols % max(1, int((z1 - z0) / spacing)) + 0.5 + rng.uniform(-0.3, 0.3)) * spacing
+        w, d = rng.uniform(6, 14), rng.uniform(10, 25)
+        w, d = min(w, spacing * 0.9), min(d, spacing * 0.9)
+        fp = [[cx + ox, cz + oz] for ox, oz in
+              (rotate(-w / 2, -d / 2), rotate(w / 2, -d / 2), rotate(w / 2, d / 2), rotate(-w / 2, d / 2))]
+        row = int(round(rotate(cx, cz, -GRID_ROTATION)[1] / BLOCK))
+        street = avenues[row % len(avenues)]['name']
+        height = rng.uniform(6, 14)
+        buildings.append({
+            'id': f'bldg-{i:06d}',
+            'footprint': [[round(x, 2), round(z, 2)] for x, z in fp],
+            'position': [round(cx, 2), 0, round(cz, 2)],
+            'size': [round(w, 1), round(height, 1), round(d, 1)],
+            'address': f'{1000 + 2 * (i % 700)}   {street}',
+            'year_built': rng.choice([None] + list(range(1850, 2021))),
+        })
+
+    parcels = []
+    for i, b in enumerate(buildings):
+        parcels.append({
+            'handle': f'P{i:08d}',
+            'address': b['address'],
+            'owner': f'{random_name(rng).upper()} LLC' if rng.random() < 0.3 else 'PRIVATE OWNER',
+            'year_built': b['year_built'],
+            'stories': rng.randint(1, 4),
+            'centroid': [b['position'][0] + rng.uniform(-3, 3), b['position'][2] + rng.uniform(-3, 3)],
+        })
+
+    osm_buildings = []
+    for i, b in enumerate(buildings):
+        if rng.random() < OSM_BUILDING_FRACTION:
+            osm_buildings.append({
+                'osm_id': 10_000_000 + i,
+                'centroid_x': b['position'][0] + rng.uniform(-2, 2),
+                'centroid_z': b['position'][2] + rng.uniform(-2, 2),
+                'tags': {'building': 'yes', 'building:material': rng.choice(MATERIALS),
+                         'building:levels': str(rng.randint(1, 4))},
+            })
+
+    osm_pois, poi_building = [], []
+    for i in range(BASE_COUNTS['osm_pois'] * scale):
+        b = rng.choice(buildings)
+        poi_building.append(b['id'])
+        x, z = b['position'][0] + rng.uniform(-5, 5), b['position'][2] + rng.uniform(-5, 5)
+        lon, lat = to_wgs84(x, z)
+        number, street = b['address'].split(None, 1)
+        osm_pois.append({
+            'osm_id': 20_000_000 + i, 'type': 'node', 'name': random_name(rng),
+            'category': rng.choice(CATEGORIES), 'lon': lon, 'lat': lat,
+            'x': round(x, 2), 'z': round(z, 2),
+            'tags': {'addr:housenumber': number, 'addr:street': street.title()},
+        })
+
+    # Landmarks: most are a POI's name (perhaps respelled), on its building
+    landmarks = []
+    for i in range(BASE_COUNTS['landmarks'] * scale):
+        k = rng.randrange(len(osm_pois))
+        poi = osm_pois[k]
+        name = poi['name'] if rng.random() < 0.5 else poi['name'].replace(' ', ' & ', 1)
+        landmarks.append({'id': f'lmk-{i:06d}', 'name': name, 'category': poi['category'],
+                          'building_id': poi_building[k] if rng.random() < 0.8 else None})
+
+    # Mapillary images along the streets
+    images = []
+    for i in range(BASE_COUNTS['images'] * scale):
+        st = rng.choice(streets)['points']
+        a = rng.randrange(len(st) - 1)
+        t = rng.random()
+        x = st[a][0] + (st[a + 1][0] - st[a][0]) * t + rng.uniform(-4, 4)
+        z = st[a][1] + (st[a + 1][1] - st[a][1]) * t + rng.uniform(-4, 4)
+        lon, lat = to_wgs84(x, z)
+        image_id = str(30_000_000 + i)
+        images.append({
+            'image_id': image_id, 'lon': lon, 'lat': lat,
+            'local_x': round(x, 1), 'local_z': round(z, 1),
+            'compass_angle': rng.uniform(0, 360),
+            'captured_at': 1_500_000_000_000 + rng.randrange(10 ** 11),
+            'thumb_256_url': f'https://fixtures.invalid/{image_id}/256.jpg',
+            'thumb_1024_url': f'https://fixtures.invalid/{image_id}/1024.jpg',
+            'thumb_2048_url': f'https://fixtures.invalid/{image_id}/2048.jpg',
+        })
+    mapillary = [{'building_id': b['id'], 'image_id': rng.choice(images)['image_id'], 'distance': 10.0}
+                 for b in buildings if rng.random() < MAPILLARY_MATCH_FRACTION]
+
+    # Park lamps: OSM interior lamps plus perimeter candidates
+    park_lamps = [{'x': rng.uniform(-155, 155), 'z': rng.uniform(-155, 155), 'park': True}
+                  for _ in range(BASE_COUNTS['park_lamps'] * scale)]
+
+    return {
+        'scale': scale, 'seed': seed, 'streets': streets, 'buildings': buildings,
+        'parcels': parcels, 'osm_buildings': osm_buildings, 'osm_pois': osm_pois,
+        'landmarks': landmarks, 'images': images, 'mapillary': mapillary,
+        'park_lamps': park_lamps,
+    }
+
+
+def street_job(data, rng):
+    """match_street() inputs for the street with the most buildings."""
+    from addresses import build_address_index, street_key
+    index = build_address_index(data['buildings'])
+    key = max(index['streets'], key=lambda k: (len(index['streets'][k]), k))
+    by_id = {b['id']: b for b in data['buildings']}
+    bldgs = [by_id[bid] for bid in index['streets'][key]]
+    imgs = [{'file': f'/photos/synthetic/{i:06d}.jpg',
+             'description': f'Built in {rng.randint(1850, 2020)}' if rng.random() < 0.7 else ''}
+            for i in range(len(bldgs))]
+    segments = [s for s in data['streets'] if street_key(s['name']) == key]
+    return key, imgs, bldgs, segments
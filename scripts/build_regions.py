@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Build several neighbourhoods in parallel, each into its own outputs.
+
+Every stage runs as its own process with LSQ_REGION set, so config.py
+resolves that region's frame, bbox and directories (see regions.py). Fetch
+stages run once per shared raw cache, over the union of the bboxes sharing
+it; each region's own stages start as soon as its cache is fetched and,
+for a region seeded from another one being built (regions.py 'seed_from'),
+once that region's stages have finished, so it clips the merged files. Up to
+--jobs stage chains run at a time; stages within a chain run in order and a
+chain stops at its first failing stage. Chain output goes to
+<RAW_DIR>/fetch.log and <REGION_RAW_DIR>/build.log.
+
+Usage:
+  python scripts/build_regions.py --list
+  python scripts/build_regions.py                                  # every region
+  python scripts/build_regions.py lafayette-square lafayette-park --jobs 2
+  python scripts/build_regions.py --incremental                    # --sync / --refresh / --incremental
+  python scripts/build_regions.py --stages 11-merge-all 23-build-address-index
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from regions import REGIONS, get_region, raw_group, region_paths
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# Stages that fill the shared raw cache, then stages run per region
+FETCH_STAGES = ['02-fetch-osm', '03-fetch-stl-parcels', '16-fetch-osm-ground']
+REGION_STAGES = ['09-seed-region', '10-fetch-mapillary', '11-merge-all', '23-build-address-index',
+                 '24-build-search-index', '25-build-hours-index']
+
+# Flags that turn a stage's full fetch into an update of its last output
+INCREMENTAL_ARGS = {
+    '02-fetch-osm': ['--sync'],
+    '03-fetch-stl-parcels': ['--refresh'],
+    '16-fetch-osm-ground': ['--sync'],
+    '10-fetch-mapillary': ['--incremental'],
+}
+
+
+def run_chain(region, stages, log_path, incremental=False):
+    """
+    Run stages in order for region (each a fresh process); stop at the first
+    failure. Returns [(stage, returncode, seconds)].
+    """
+    env = dict(os.environ, LSQ_REGION=region)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    results = []
+    with open(log_path, 'w') as log:
+        for stage in stages:
+            cmd = [sys.executable, os.path.join(SCRIPTS_DIR, f'{stage}.py')]
+            if incremental:
+                cmd += INCREMENTAL_ARGS.get(stage, [])
+            log.write(f"=== {region}: {' '.join(cmd[1:])}\n")
+            log.flush()
+            t0 = time.perf_counter()
+            code = subprocess.run(cmd, cwd=PROJECT_DIR, env=env, stdout=log,
+                                  stderr=subprocess.STDOUT).returncode
+            results.append((stage, code, time.perf_counter() - t0))
+            if code != 0:
+                break
+    return results
+
+
+def print_chain(label, results, log_path):
+    failed = results and results[-1][1] != 0
+    steps = ', '.join(f"{stage} {seconds:.1f}s" + (f" (exit {code})" if code else '')
+                      for stage, code, seconds in results)
+    print(f"  {label:32s} {'FAILED' if failed else 'ok':6s} {steps}")
+    if failed:
+        print(f"  {'':32s} see {os.path.relpath(log_path, PROJECT_DIR)}")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build neighbourhoods in parallel')
+    parser.add_argument('regions', nargs='*', help='region names (default: every region)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='stage chains run at once')
+    parser.add_argument('--stages', nargs='+', default=FETCH_STAGES + REGION_STAGES,
+                        help='stage scripts to run, without .py')
+    parser.add_argument('--incremental', action='store_true',
+                        help='update the last outputs instead of fetching everything')
+    parser.add_argument('--list', action='store_true', help='list regions and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name in REGIONS:
+            region, group = get_region(name), raw_group(name)
+            shared = f"  (raw cache shared with {', '.join(n for n in group if n != name)})" \
+                if len(group) > 1 else ''
+            print(f"  {name:24s} {region['title']}{shared}")
+        return
+
+    names = args.regions or list(REGIONS)
+    for name in names:
+        get_region(name)  # unknown names fail here, before anything runs
+    fetch_stages = [s for s in args.stages if s in FETCH_STAGES]
+    region_stages = [s for s in args.stages if s not in FETCH_STAGES]
+
+    # One fetch chain per raw cache, run under its first selected region
+    groups = {}
+    for name in names:
+        groups.setdefault(raw_group(name)[0], []).append(name)
+    paths = {name: region_paths(name, SCRIPTS_DIR, PROJECT_DIR) for name in names}
+
+    # Regions waiting on the seed region built in this run
+    seed_of = {name: get_region(name).get('seed_from') for name in names}
+    seed_of = {name: parent for name, parent in seed_of.items() if parent in names and parent != name}
+    fetched, built, started = set(), set(), set()
+
+    print(f"Building {len(names)} regions ({len(groups)} raw caches) with {args.jobs} jobs")
+    t0 = time.perf_counter()
+    ok = True
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        pending = {}
+
+        def start_ready():
+            for name in names:
+                parent = seed_of.get(name)
+                if name in started or name not in fetched or (parent and parent not in built):
+                    continue
+                started.add(name)
+                region_log = os.path.join(paths[name]['region_raw'], 'build.log')
+                region_fut = pool.submit(run_chain, name, region_stages, region_log, args.incremental)
+                pending[region_fut] = ('region', [name], region_log)
+
+        for members in groups.values():
+            log_path = os.path.join(paths[members[0]]['raw'], 'fetch.log')
+            fut = pool.submit(run_chain, members[0], fetch_stages, log_path, args.incremental)
+            pending[fut] = ('fetch', members, log_path)
+
+        while pending:
+            fut = next(as_completed(pending))
+            kind, members, log_path = pending.pop(fut)
+            label = f"{kind} {'+'.join(members)}" if kind == 'fetch' else members[0]
+            passed = print_chain(label, fut.result(), log_path)
+            ok &= passed
+            if passed:
+                (fetched if kind == 'fetch' else built).update(members)
+                start_ready()
+
+    skipped = [name for name in names if name not in started]
+    if skipped:
+        print(f"  {'':32s} skipped {', '.join(skipped)} (fetch or seed region failed)")
+        ok = False
+
+    print(f"\nDone in {time.perf_counter() - t0:.1f}s")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,129 +2,37 @@
 """
 Classify building materials — aligned with the ACTUAL roof geometry renderer.
 Uses the exact same classifyRoof logic as LafayetteScene.jsx.
+
+Buildings are loaded into a columnar table (one NumPy array per attribute),
+and each classification is an ordered rule list of array masks — first
+matching rule wins — so the whole city is classified in a few vectorized
+passes instead of per-building function calls.
+
+Usage: python scripts/classify_materials.py [--dry-run]
+
+  --dry-run   classify and print what would change, without writing
+
+Inputs:
+  src/data/buildings.json
+  src/data/buildingOverrides.json
+  src/data/facade_mapping.json   (optional — facade photo descriptions)
+
+Output: src/data/buildings.json (wall_material, roof_material, color, and a
+        `render` block of precomputed roof/foundation hints for the scene,
+        with buildingOverrides.json applied)
 """
-import json, re, os, hashlib, math
+import argparse, json, os, hashlib, time
 from collections import Counter
 
-with open('src/data/buildings.json') as f:
-    data = json.load(f)
-buildings = data['buildings']
-
-# Load overrides (same as renderer)
-with open('src/data/buildingOverrides.json') as f:
-    overrides_data = json.load(f)
-overrides = overrides_data.get('overrides', {})
-
-# Load facade descriptions
-facade_desc = {}
-if os.path.exists('src/data/facade_mapping.json'):
-    with open('src/data/facade_mapping.json') as f:
-        fm = json.load(f)
-    for bid, entry in fm.items():
-        facade_desc[bid] = entry.get('description', '').lower()
-
-
-def is_convex(pts):
-    """Check if polygon is convex (same as JS isConvex)."""
-    n = len(pts)
-    if n < 3:
-        return False
-    sign = None
-    for i in range(n):
-        x1, y1 = pts[i]
-        x2, y2 = pts[(i+1) % n]
-        x3, y3 = pts[(i+2) % n]
-        cross = (x2-x1)*(y3-y2) - (y2-y1)*(x3-x2)
-        if abs(cross) < 1e-10:
-            continue
-        s = cross > 0
-        if sign is None:
-            sign = s
-        elif s != sign:
-            return False
-    return True
+import numpy as np
 
+from config import DATA_DIR
+from tracing import span, traced
 
-def classify_roof_shape(b):
-    """Exact replica of classifyRoof() from LafayetteScene.jsx."""
-    ov = overrides.get(b['id'], {}).get('roof_shape')
-    if ov is not None:
-        return ov
-
-    year = b.get('year_built') or 0
-    stories = b.get('stories') or 1
-    if not year:
-        return 'flat'
-    if stories >= 4:
-        return 'flat'
-    if stories == 1 and b.get('size', [0,0,0])[0] * b.get('size', [0,0,0])[2] > 500:
-        return 'flat'
-    if year < 1900 and stories >= 2 and stories <= 3:
-        return 'mansard'
-    if year < 1920 and stories >= 1 and stories <= 3:
-        return 'hip'
-    return 'flat'
-
-
-def get_local_pts(b):
-    """Get footprint in local coords (same as JS getLocalPts)."""
-    fp = b.get('footprint')
-    if not fp or len(fp) < 3:
-        return None
-    pos = b.get('position', [0,0,0])
-    return [(p[0] - pos[0], p[1] - pos[2]) for p in fp]
-
-
-def roof_actually_renders(b):
-    """Check if the roof geometry will actually be generated by the renderer."""
-    roof_shape = classify_roof_shape(b)
-    if roof_shape == 'flat':
-        return 'flat'
-
-    local_pts = get_local_pts(b)
-    if not local_pts:
-        return 'flat'
-
-    if roof_shape == 'mansard':
-        if is_convex(local_pts):
-            return 'mansard'
-        else:
-            return 'flat'  # renderer falls through to no roof
-    elif roof_shape == 'hip':
-        if len(local_pts) <= 8:
-            return 'hip'
-        else:
-            return 'flat'
-
-    return 'flat'
-
-
-def classify_wall(b):
-    """Wall material from description or style."""
-    desc = facade_desc.get(b['id'], '')
-    style = (b.get('architecture', {}).get('style') or '').lower()
-    year = b.get('year_built') or 0
-
-    if desc:
-        if 'stone-clad' in desc or 'stone front' in desc or 'limestone front' in desc:
-            return 'stone'
-        if 'frame' in desc or 'clapboard' in desc:
-            return 'wood_siding'
-        if 'stucco' in desc or 'vinyl' in desc or 'aluminum siding' in desc:
-            return 'stucco'
-        if 'brick' in desc:
-            return 'brick_red' if year < 1900 else 'brick_weathered'
-
-    if 'craftsman' in style:
-        return 'wood_siding'
-    if 'art deco' in style or 'modernistic' in style:
-        return 'stucco'
-
-    if year and year >= 1970:
-        return 'stucco'
-    if year and year >= 1920:
-        return 'brick_weathered'
-    return 'brick_red'
+BUILDINGS_PATH = os.path.join(DATA_DIR, 'buildings.json')
+OVERRIDES_PATH = os.path.join(DATA_DIR, 'buildingOverrides.json')
+FACADE_MAPPING_PATH = os.path.join(DATA_DIR, 'facade_mapping.json')
+DIFF_SAMPLES = 10  # changed buildings listed per field in --dry-run
 
 
 # Wall tint colors — light enough to multiply with texture
@@ -151,40 +59,318 @@ WALL_TINTS = {
     ],
 }
 
+ROOF_MATERIAL = {'mansard': 'slate', 'hip': 'metal'}  # anything else: flat
+
+
+# ============================================================
+# Columnar building table
+# ============================================================
+
+def local_footprints(buildings):
+    """Footprints relative to building position (same as JS getLocalPts)."""
+    pts = []
+    for b in buildings:
+        fp = b.get('footprint')
+        if not fp or len(fp) < 3:
+            pts.append(None)
+            continue
+        pos = b.get('position', [0, 0, 0])
+        pts.append(np.array(fp, dtype=np.float64) - [pos[0], pos[2]])
+    return pts
+
+
+@traced('footprint metrics')
+def footprint_metrics(footprints):
+    """
+    Batched footprint checks over a list of (N, 2) arrays (None = no footprint).
+
+    Returns (convex, clockwise, ratio): JS isConvex (near-zero turns ignored,
+    as in the renderer), whether ensureCCW would reverse the ring (positive
+    signed area in XZ), and JS footprintRatio (min / max bbox extent).
+    Footprints are grouped by vertex count so each group runs at once.
+    """
+    n = len(footprints)
+    convex = np.zeros(n, dtype=bool)
+    clockwise = np.zeros(n, dtype=bool)
+    ratio = np.zeros(n)
+    groups = {}
+    for i, pts in enumerate(footprints):
+        if pts is not None and len(pts) >= 3:
+            groups.setdefault(len(pts), []).append(i)
+
+    for idx in groups.values():
+        p0 = np.stack([footprints[i] for i in idx])
+        p1 = np.roll(p0, -1, axis=1)
+        p2 = np.roll(p0, -2, axis=1)
+        cross = ((p1[..., 0] - p0[..., 0]) * (p2[..., 1] - p1[..., 1])
+                 - (p1[..., 1] - p0[..., 1]) * (p2[..., 0] - p1[..., 0]))
+        turning = np.abs(cross) >= 1e-10
+        left = (turning & (cross > 0)).any(axis=1)
+        right = (turning & (cross <= 0)).any(axis=1)
+        convex[idx] = ~(left & right)
+
+        area = (p0[..., 0] * p1[..., 1] - p1[..., 0] * p0[..., 1]).sum(axis=1)
+        clockwise[idx] = area > 0
+
+        extent = p0.max(axis=1) - p0.min(axis=1)
+        extent[extent == 0] = 1
+        ratio[idx] = extent.min(axis=1) / extent.max(axis=1)
+    return convex, clockwise, ratio
+
+
+@traced('index buildings')
+def building_table(buildings, overrides, facade_desc):
+    """One array per attribute the rules read, in buildings order."""
+    footprints = local_footprints(buildings)
+    size = np.array([b.get('size', [0, 0, 0]) for b in buildings], dtype=np.float64).reshape(-1, 3)
+
+    def contains(texts, *needles):
+        return np.array([any(n in t for n in needles) for t in texts], dtype=bool)
+
+    convex, clockwise, ratio = footprint_metrics(footprints)
+    foundation_override = [overrides.get(b['id'], {}).get('foundation_height') for b in buildings]
+
+    desc = [facade_desc.get(b['id'], '') for b in buildings]
+    style = [(b.get('architecture', {}).get('style') or '').lower() for b in buildings]
+    roof_override = [overrides.get(b['id'], {}).get('roof_shape') for b in buildings]
+
+    return {
+        'id': [b['id'] for b in buildings],
+        'year': np.array([b.get('year_built') or 0 for b in buildings], dtype=np.int64),
+        'stories': np.array([b.get('stories') or 1 for b in buildings], dtype=np.int64),
+        'stories_raw': np.array([b.get('stories') or 0 for b in buildings], dtype=np.int64),
+        'area': size[:, 0] * size[:, 2],
+        'footprint': footprints,
+        'has_footprint': np.array([p is not None for p in footprints], dtype=bool),
+        'n_pts': np.array([0 if p is None else len(p) for p in footprints], dtype=np.int64),
+        'convex': convex,
+        'clockwise': clockwise,
+        'footprint_ratio': ratio,
+        'roof_override': np.array(roof_override, dtype=object),
+        'has_roof_override': np.array([o is not None for o in roof_override], dtype=bool),
+        'foundation_override': np.array(foundation_override, dtype=object),
+        'has_foundation_override': np.array([o is not None for o in foundation_override], dtype=bool),
+        'has_desc': np.array([bool(d) for d in desc], dtype=bool),
+        'desc_stone': contains(desc, 'stone-clad', 'stone front', 'limestone front'),
+        'desc_wood': contains(desc, 'frame', 'clapboard'),
+        'desc_stucco': contains(desc, 'stucco', 'vinyl', 'aluminum siding'),
+        'desc_brick': contains(desc, 'brick'),
+        'style_craftsman': contains(style, 'craftsman'),
+        'style_modern': contains(style, 'art deco', 'modernistic'),
+    }
+
+
+def apply_rules(n, rules, default):
+    """Ordered (mask, value) rules -> object array; first match wins."""
+    out = np.full(n, default, dtype=object)
+    decided = np.zeros(n, dtype=bool)
+    for mask, value in rules:
+        hit = mask & ~decided
+        out[hit] = value[hit] if isinstance(value, np.ndarray) else value
+        decided |= hit
+    return out
+
+
+# ============================================================
+# Rules
+# ============================================================
+
+def classify_roof_shape(t):
+    """Exact replica of classifyRoof() from LafayetteScene.jsx."""
+    year, stories = t['year'], t['stories']
+    return apply_rules(len(year), [
+        (t['has_roof_override'], t['roof_override']),
+        (year == 0, 'flat'),
+        (stories >= 4, 'flat'),
+        ((stories == 1) & (t['area'] > 500), 'flat'),
+        ((year < 1900) & (stories >= 2) & (stories <= 3), 'mansard'),
+        ((year < 1920) & (stories >= 1) & (stories <= 3), 'hip'),
+    ], 'flat')
+
 
-# === Classify ===
-wall_counts = Counter()
-roof_counts = Counter()
+def roof_actually_renders(t, roof_shape):
+    """Roof the renderer will actually build (mansard needs convex, hip <= 8 pts)."""
+    return apply_rules(len(roof_shape), [
+        (~t['has_footprint'], 'flat'),
+        ((roof_shape == 'mansard') & t['convex'], 'mansard'),
+        ((roof_shape == 'hip') & (t['n_pts'] <= 8), 'hip'),
+    ], 'flat')
 
-for b in buildings:
-    # Wall
-    wall = classify_wall(b)
-    b['wall_material'] = wall
-    wall_counts[wall] += 1
+
+def roof_peak_height(t, roof):
+    """JS getRoofPeakHeight (raw stories, as the roof builders use)."""
+    stories = t['stories_raw']
+    return np.select(
+        [roof == 'mansard', roof == 'hip'],
+        [np.where(stories >= 3, 2.5, 2.0), np.where(stories == 1, 1.8, 1.5)],
+        0.0,
+    )
+
+
+def foundation_height(t):
+    """JS getFoundationHeight: override, else raised basements on pre-1920 houses."""
+    year = t['year']
+    return apply_rules(len(year), [
+        (t['has_foundation_override'], t['foundation_override']),
+        (year == 0, 0),
+        (year < 1900, 1.2),
+        (year < 1920, 0.8),
+    ], 0)
+
+
+def render_hints(t, roof_shape, roof):
+    """
+    Per-building scene-build inputs, so LafayetteScene skips re-deriving them:
+    classified and actually-built roof, local footprint wound CCW from above,
+    convexity, footprint ratio, roof peak and foundation heights.
+    """
+    peak = roof_peak_height(t, roof)
+    foundation = foundation_height(t)
+    hints = []
+    for i, pts in enumerate(t['footprint']):
+        if pts is not None:
+            ring = pts[::-1] if t['clockwise'][i] else pts
+            pts = np.round(ring, 2).tolist()
+        hints.append({
+            'roof_shape': roof_shape[i],
+            'roof_built': roof[i],
+            'roof_peak': float(peak[i]),
+            'foundation_height': foundation[i],
+            'convex': bool(t['convex'][i]),
+            'footprint_ratio': round(float(t['footprint_ratio'][i]), 4),
+            'local_pts': pts,
+        })
+    return hints
+
+
+def classify_wall(t):
+    """Wall material from description or style."""
+    year, has_desc = t['year'], t['has_desc']
+    return apply_rules(len(year), [
+        (has_desc & t['desc_stone'], 'stone'),
+        (has_desc & t['desc_wood'], 'wood_siding'),
+        (has_desc & t['desc_stucco'], 'stucco'),
+        (has_desc & t['desc_brick'] & (year < 1900), 'brick_red'),
+        (has_desc & t['desc_brick'], 'brick_weathered'),
+        (t['style_craftsman'], 'wood_siding'),
+        (t['style_modern'], 'stucco'),
+        (year >= 1970, 'stucco'),
+        (year >= 1920, 'brick_weathered'),
+    ], 'brick_red')
+
+
+def wall_tints(ids, walls):
+    """Stable per-building tint: MD5 of the id picks from the wall's palette."""
+    colors = []
+    for bid, wall in zip(ids, walls):
+        tints = WALL_TINTS.get(wall, WALL_TINTS['brick_red'])
+        h = int(hashlib.md5(bid.encode()).hexdigest()[:8], 16)
+        colors.append(tints[h % len(tints)])
+    return colors
+
+
+# ============================================================
+# Main
+# ============================================================
+
+def print_diff(buildings, columns):
+    """Per-field change counts plus a few sample changes."""
+    print("Dry run — changes that would be written:")
+    for field, values in columns.items():
+        changed = [(b['id'], b.get(field), v) for b, v in zip(buildings, values)
+                   if b.get(field) != v]
+        print(f"\n  {field}: {len(changed)} of {len(buildings)} buildings change")
+        for bid, old, new in changed[:DIFF_SAMPLES]:
+            if isinstance(new, dict):
+                old = old if isinstance(old, dict) else {}
+                keys = [k for k in new if old.get(k) != new[k]]
+                print(f"    {bid:10s}  {', '.join(keys)}")
+            else:
+                print(f"    {bid:10s}  {old} -> {new}")
+        if len(changed) > DIFF_SAMPLES:
+            print(f"    ... {len(changed) - DIFF_SAMPLES} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classify building wall/roof materials')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print what would change without writing buildings.json')
+    args = parser.parse_args()
+
+    timings = []
+    t0 = time.perf_counter()
+
+    def lap(label):
+        nonlocal t0
+        now = time.perf_counter()
+        timings.append((label, now - t0))
+        t0 = now
+
+    with open(BUILDINGS_PATH) as f:
+        data = json.load(f)
+    buildings = data['buildings']
+
+    # Load overrides (same as renderer)
+    with open(OVERRIDES_PATH) as f:
+        overrides = json.load(f).get('overrides', {})
+
+    # Load facade descriptions
+    facade_desc = {}
+    if os.path.exists(FACADE_MAPPING_PATH):
+        with open(FACADE_MAPPING_PATH) as f:
+            fm = json.load(f)
+        for bid, entry in fm.items():
+            facade_desc[bid] = entry.get('description', '').lower()
+    lap('load')
+
+    table = building_table(buildings, overrides, facade_desc)
+    lap('table')
 
     # Roof — aligned with what actually renders
-    actual_roof = roof_actually_renders(b)
-    if actual_roof == 'mansard':
-        b['roof_material'] = 'slate'
-    elif actual_roof == 'hip':
-        b['roof_material'] = 'metal'
+    roof_shape = classify_roof_shape(table)
+    roof = roof_actually_renders(table, roof_shape)
+    roof_material = [ROOF_MATERIAL.get(r, 'flat') for r in roof]
+    lap('roof rules')
+
+    wall = classify_wall(table)
+    lap('wall rules')
+
+    color = wall_tints(table['id'], wall)
+    lap('tints')
+
+    render = render_hints(table, roof_shape, roof)
+    lap('render hints')
+
+    columns = {'wall_material': list(wall), 'roof_material': roof_material, 'color': color,
+               'render': render}
+    if args.dry_run:
+        print_diff(buildings, columns)
     else:
-        b['roof_material'] = 'flat'
-    roof_counts[b['roof_material']] += 1
-
-    # Color tint
-    tints = WALL_TINTS.get(wall, WALL_TINTS['brick_red'])
-    h = int(hashlib.md5(b['id'].encode()).hexdigest()[:8], 16)
-    b['color'] = tints[h % len(tints)]
-
-with open('src/data/buildings.json', 'w') as f:
-    json.dump(data, f)
-
-print("Material Classification (aligned with renderer)")
-print("=" * 50)
-print(f"\nWall materials ({len(buildings)} buildings):")
-for m, c in wall_counts.most_common():
-    print(f"  {m:20s}: {c:4d}  ({100*c/len(buildings):.0f}%)")
-print(f"\nRoof materials (matches actual geometry):")
-for m, c in roof_counts.most_common():
-    print(f"  {m:20s}: {c:4d}  ({100*c/len(buildings):.0f}%)")
+        for i, b in enumerate(buildings):
+            for field, values in columns.items():
+                b[field] = values[i]
+        with open(BUILDINGS_PATH, 'w') as f:
+            json.dump(data, f)
+    lap('diff' if args.dry_run else 'write')
+
+    wall_counts = Counter(wall)
+    roof_counts = Counter(roof_material)
+
+    print("Material Classification (aligned with renderer)")
+    print("=" * 50)
+    print(f"\nWall materials ({len(buildings)} buildings):")
+    for m, c in wall_counts.most_common():
+        print(f"  {m:20s}: {c:4d}  ({100*c/len(buildings):.0f}%)")
+    print(f"\nRoof materials (matches actual geometry):")
+    for m, c in roof_counts.most_common():
+        print(f"  {m:20s}: {c:4d}  ({100*c/len(buildings):.0f}%)")
+
+    print(f"\nTiming ({len(buildings)} buildings):")
+    for label, seconds in timings:
+        print(f"  {label:12s} {seconds * 1000:8.1f} ms")
+    print(f"  {'total':12s} {sum(s for _, s in timings) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    with span('classify_materials', cat='stage'):
+        main()
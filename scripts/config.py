@@ -1,32 +1,45 @@
 """
 Shared configuration for Lafayette Square data pipeline.
+
+Region constants and output directories come from the region registry
+(regions.py); set LSQ_REGION to build another neighbourhood.
 """
 import os
 
-# Lafayette Park center (actual park centroid from OSM)
-CENTER_LAT = 38.6160
-CENTER_LON = -90.2161
+import projection
+from regions import DEFAULT_REGION, get_region, region_paths
+
+REGION_NAME = os.environ.get('LSQ_REGION', DEFAULT_REGION)
+REGION = get_region(REGION_NAME)
+
+# Projection frame (Lafayette Square: the Lafayette Park centroid)
+CENTER_LAT = REGION['center_lat']
+CENTER_LON = REGION['center_lon']
 
-# Bounding box (N: Chouteau Ave, S: I-44, W: Jefferson Ave, E: Dolman St)
-BBOX = {
-    'min_lat': 38.6090,
-    'max_lat': 38.6250,
-    'min_lon': -90.2210,  # W: Jefferson Ave
-    'max_lon': -90.2070,
-}
+# Bounding box of the region's outputs
+BBOX = REGION['bbox']
 
 # Conversion constants at this latitude
-LON_TO_METERS = 86774
-LAT_TO_METERS = 111000
+LON_TO_METERS = REGION['lon_to_meters']
+LAT_TO_METERS = REGION['lat_to_meters']
+
+# WGS84 <-> local transform (equirectangular with the constants above, or tangent plane)
+PROJECTION = projection.for_region(REGION_NAME)
 
 # Overture Maps release
 OVERTURE_RELEASE = '2026-01-21.0'
 
-# Directories
+# Directories (namespaced per region; see regions.py)
 SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
-DATA_DIR = os.path.join(PROJECT_DIR, 'src', 'data')
-RAW_DIR = os.path.join(SCRIPTS_DIR, 'raw')
+_paths = region_paths(REGION_NAME, SCRIPTS_DIR, PROJECT_DIR)
+DATA_DIR = _paths['data']
+PUBLIC_DIR = _paths['public']
+RAW_DIR = _paths['raw']                 # fetch cache, shared by overlapping regions
+REGION_RAW_DIR = _paths['region_raw']   # raw files derived from this region's buildings
+
+# Fetch stages request FETCH_BBOX (BBOX widened to every region sharing RAW_DIR)
+FETCH_BBOX = _paths['fetch_bbox']
 
 # Load .env file if present (for API keys)
 _env_path = os.path.join(SCRIPTS_DIR, '.env')
@@ -41,6 +54,14 @@ if os.path.exists(_env_path):
 # API keys (from environment or .env file)
 MAPILLARY_TOKEN = os.environ.get('MAPILLARY_ACCESS_TOKEN', '')
 
+# API endpoints; override to point the fetch stages at scripts/fixtures/server.py
+OVERPASS_URL = os.environ.get('LSQ_OVERPASS_URL', 'https://overpass-api.de/api/interpreter')
+PARCELS_URL = os.environ.get(
+    'LSQ_PARCELS_URL',
+    'https://maps8.stlouis-mo.gov/arcgis/rest/services/ASSESSOR/Assessor_Public_Parcels/MapServer/11/query',
+)
+MAPILLARY_URL = os.environ.get('LSQ_MAPILLARY_URL', 'https://graph.mapillary.com/images')
+
 # Victorian brick palette
 BUILDING_COLORS = [
     '#8B4513', '#A0522D', '#CD853F',
@@ -51,13 +72,22 @@ BUILDING_COLORS = [
 
 
 def wgs84_to_local(lon, lat):
-    """Convert WGS84 to local meters centered on Lafayette Park."""
-    x = (lon - CENTER_LON) * LON_TO_METERS
-    z = (CENTER_LAT - lat) * LAT_TO_METERS  # Z = south (+)
-    return x, z
+    """Convert WGS84 to local meters centered on the region's center (scalars or arrays)."""
+    return projection.to_local(PROJECTION, lon, lat)
+
+
+def lonlat_to_local(points):
+    """(N, 2) local [x, z] of a whole geometry's [lon, lat] points, in one call."""
+    return projection.to_local_points(PROJECTION, points)
+
+
+def local_to_wgs84(x, z):
+    """Inverse of wgs84_to_local."""
+    return projection.to_wgs84(PROJECTION, x, z)
 
 
 def ensure_dirs():
     """Create output directories if needed."""
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(RAW_DIR, exist_ok=True)
+    os.makedirs(REGION_RAW_DIR, exist_ok=True)
@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Overpass, ArcGIS parcel and Mapillary APIs.
+
+Serves a seeded synthetic neighborhood (bench/synth.py) in the request
+and response shapes the fetch stages use, so fetch-path changes
+(concurrency, retries, caching) can be tested offline and load-tested
+deterministically:
+
+  Overpass   POST/GET /api/interpreter       tag filters + bbox, out body;>;out skel
+  ArcGIS     GET /arcgis/rest/.../11         layer metadata (fields, editFieldsInfo)
+             GET /arcgis/rest/.../11/query   resultOffset / resultRecordCount paging,
+                                             exceededTransferLimit, maxRecordCount cap,
+                                             where 1=1 / EditDate > TIMESTAMP / Handle IN
+  Mapillary  GET /images                     bbox + limit + start_captured_at, paging.next
+                                             cursors, OAuth header required, 429 when rate
+                                             limited
+
+Injected faults are a pure function of (seed, request, attempt number for
+that request), so a run replays identically however requests interleave:
+Overpass fails with 429/504, ArcGIS with an HTTP 200 {"error": ...} body
+(as the real server does), Mapillary with 429.
+
+Usage:
+  python scripts/fixtures/server.py                          # port 8765, scale 1
+  python scripts/fixtures/server.py --scale 10 --latency 0.2 --jitter 0.1 --error-rate 0.05
+
+then point the fetch stages at it (printed on startup):
+  export LSQ_OVERPASS_URL=http://127.0.0.1:8765/api/interpreter
+  export LSQ_PARCELS_URL=http://127.0.0.1:8765/arcgis/rest/services/ASSESSOR/Assessor_Public_Parcels/MapServer/11/query
+  export LSQ_MAPILLARY_URL=http://127.0.0.1:8765/images
+  export MAPILLARY_ACCESS_TOKEN=fixture
+
+GET /_stats returns request and fault counts per API; /_reset zeroes them
+along with the attempt counters. GET /_edit?n=5 applies five seeded OSM
+edits (node moves, retags, renames, deletions, new POIs), each one second
+after the last on the dataset's clock, for exercising incremental sync;
+/_edit?n=5&source=parcels edits parcels (owner and boundary changes,
+retirements, new Handles) and stamps their EditDate;
+/_edit?n=5&source=mapillary uploads new images, captured after every
+existing one, near existing camera positions.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import synth  # noqa: E402
+from config import BBOX, LAT_TO_METERS, LON_TO_METERS  # noqa: E402
+
+OVERPASS_PATH = '/api/interpreter'
+PARCELS_LAYER_PATH = '/arcgis/rest/services/ASSESSOR/Assessor_Public_Parcels/MapServer/11'
+PARCELS_PATH = PARCELS_LAYER_PATH + '/query'
+MAPILLARY_PATH = '/images'
+MAX_RECORD_COUNT = 1000      # ArcGIS server-side page cap (the city's layer allows 2000)
+MAPILLARY_MAX_LIMIT = 2000
+PARCEL_MARGIN = 2.0          # meters — parcel rings around the building footprint
+
+# synth.py categories -> OSM tags
+CATEGORY_TAGS = {
+    'dining': ('amenity', 'restaurant'),
+    'shopping': ('shop', 'gift'),
+    'services': ('amenity', 'bank'),
+    'arts': ('tourism', 'gallery'),
+    'historic': ('historic', 'building'),
+    'community': ('amenity', 'community_centre'),
+}
+
+BASE_TIME = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+QUERY_RE = re.compile(r'(node|way|relation)(?:\.(\w+))?((?:\[[^\]]*\]|\([^)]*\))*)$')
+FILTER_RE = re.compile(r'\[([^\]]*)\]|\(([^)]*)\)')
+TAG_RE = re.compile(r'\s*"([^"]+)"\s*(?:=\s*"([^"]*)")?\s*$')
+OUT_RE = re.compile(r'(?:\.(\w+)\s*)?out\b(.*)$')
+RECURSE_RE = re.compile(r'(?:\.(\w+)\s*)?>$')
+TYPE_ORDER = {'node': 0, 'way': 1, 'relation': 2}
+
+FIELD_TYPES = {
+    'Handle': 'esriFieldTypeString', 'SITEADDR': 'esriFieldTypeString',
+    'OwnerName': 'esriFieldTypeString', 'NbrOfApts': 'esriFieldTypeInteger',
+    'NbrOfUnits': 'esriFieldTypeInteger', 'VacantLot': 'esriFieldTypeSmallInteger',
+    'Nbrhd': 'esriFieldTypeInteger', 'AsrLandUse1': 'esriFieldTypeInteger',
+    'Zoning': 'esriFieldTypeString', 'FirstYearBuilt': 'esriFieldTypeInteger',
+    'LastYearBuilt': 'esriFieldTypeInteger', 'SQFT': 'esriFieldTypeInteger',
+    'LandArea': 'esriFieldTypeInteger', 'NbrOfBldgsRes': 'esriFieldTypeInteger',
+    'NbrOfBldgsCom': 'esriFieldTypeInteger', 'AprResImprove': 'esriFieldTypeInteger',
+    'AprComImprove': 'esriFieldTypeInteger', 'NatHistDist': 'esriFieldTypeSmallInteger',
+    'LocalHistDist': 'esriFieldTypeSmallInteger', 'CertLocalHistDist': 'esriFieldTypeSmallInteger',
+    'EditDate': 'esriFieldTypeDate',
+    'Shape__Area': 'esriFieldTypeDouble', 'Shape__Length': 'esriFieldTypeDouble',
+}
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+class Dataset:
+    """Synthetic records in each API's native shape."""
+
+    def __init__(self, scale=1, seed=0):
+        data = synth.generate(scale, seed)
+        self.osm = {}            # (type, id) -> Overpass element with version/timestamp
+        self.clock = BASE_TIME   # OSM data timestamp; each edit advances it a second
+        self.edits = 0
+        self._next_node = 1
+
+        osm_by_building = {b['osm_id'] - 10_000_000: b for b in data['osm_buildings']}
+        self.parcels = []
+        for i, (b, p) in enumerate(zip(data['buildings'], data['parcels'])):
+            ring = [synth.to_wgs84(x, z) for x, z in b['footprint']]
+            osm = osm_by_building.get(i)
+            if osm:
+                self._way(osm['osm_id'], ring, dict(osm['tags']))
+            self.parcels.append(self._parcel(i, b, p))
+
+        for poi in data['osm_pois']:
+            key, value = CATEGORY_TAGS[poi['category']]
+            self._node(poi['osm_id'], poi['lon'], poi['lat'],
+                       {'name': poi['name'], key: value, **poi['tags']})
+
+        for k, st in enumerate(data['streets']):
+            coords = [synth.to_wgs84(x, z) for x, z in st['points']]
+            self._way(30_000_000 + k, coords, {
+                'highway': 'residential', 'name': st['name'].title(), 'surface': 'asphalt'}, closed=False)
+        park = [synth.to_wgs84(x, z) for x, z in ((-155, -155), (155, -155), (155, 155), (-155, 155))]
+        self._way(40_000_000, park, {'leisure': 'park', 'name': 'Lafayette Park'})
+
+        self.images = [{
+            'id': img['image_id'],
+            'captured_at': img['captured_at'],
+            'compass_angle': round(img['compass_angle'], 2),
+            'geometry': {'type': 'Point', 'coordinates': [img['lon'], img['lat']]},
+            'thumb_256_url': img['thumb_256_url'],
+            'thumb_1024_url': img['thumb_1024_url'],
+            'thumb_2048_url': img['thumb_2048_url'],
+        } for img in data['images']]
+
+    @property
+    def timestamp(self):
+        return self.clock.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _node(self, node_id, lon, lat, tags=None):
+        el = {'type': 'node', 'id': node_id, 'lat': lat, 'lon': lon,
+              'version': 1, 'timestamp': self.timestamp}
+        if tags:
+            el['tags'] = tags
+        self.osm[('node', node_id)] = el
+        return el
+
+    def _way(self, way_id, coords, tags, closed=True):
+        ids = []
+        for lon, lat in coords:
+            ids.append(self._node(self._next_node, lon, lat)['id'])
+            self._next_node += 1
+        if closed:
+            ids.append(ids[0])
+        el = {'type': 'way', 'id': way_id, 'nodes': ids, 'tags': tags,
+              'version': 1, 'timestamp': self.timestamp}
+        self.osm[('way', way_id)] = el
+        return el
+
+    @property
+    def clock_ms(self):
+        return int(self.clock.timestamp() * 1000)
+
+    def edit(self, n, seed=0, source='osm'):
+        """
+        Apply n seeded edits to one source ('osm', 'parcels' or 'mapillary'),
+        each a second after the last; returns a description of each.
+        """
+        rng = random.Random(f'{seed}|{source}|{self.edits}')
+        apply = {'osm': self._edit_osm, 'parcels': self._edit_parcel,
+                 'mapillary': self._edit_mapillary}[source]
+        done = []
+        for _ in range(n):
+            self.edits += 1
+            self.clock += datetime.timedelta(seconds=1)
+            done.append(apply(rng))
+        return done
+
+    def _edit_osm(self, rng):
+        """A mapper's edit: node move, retag, rename, deletion or new POI."""
+        buildings = sorted(k for k, el in self.osm.items()
+                           if k[0] == 'way' and 'building' in el['tags'])
+        pois = sorted(k for k, el in self.osm.items() if k[0] == 'node' and 'name' in el.get('tags', {}))
+        kind = rng.choice(['move', 'retag', 'rename', 'delete', 'create'])
+        if kind == 'move':
+            way = self.osm[rng.choice(sorted(k for k in self.osm if k[0] == 'way'))]
+            el = self.osm[('node', rng.choice(way['nodes']))]
+            el['lon'] += rng.uniform(-1, 1) / LON_TO_METERS
+            el['lat'] += rng.uniform(-1, 1) / LAT_TO_METERS
+            target = el
+        elif kind == 'retag' and buildings:
+            target = self.osm[rng.choice(buildings)]
+            target['tags']['building:levels'] = str(rng.randint(1, 5))
+        elif kind == 'rename' and pois:
+            target = self.osm[rng.choice(pois)]
+            target['tags']['name'] += ' ' + rng.choice(synth.NAME_WORDS)
+        elif kind == 'delete' and buildings:
+            target = self.osm.pop(rng.choice(buildings))
+            return {'edit': 'delete', 'type': 'way', 'id': target['id']}
+        else:
+            kind = 'create'
+            lon = rng.uniform(BBOX['min_lon'], BBOX['max_lon'])
+            lat = rng.uniform(BBOX['min_lat'], BBOX['max_lat'])
+            key, value = CATEGORY_TAGS[rng.choice(sorted(CATEGORY_TAGS))]
+            target = self._node(50_000_000 + self.edits, lon, lat,
+                                {'name': synth.random_name(rng), key: value})
+            target['version'] = 0
+        target['version'] += 1
+        target['timestamp'] = self.timestamp
+        return {'edit': kind, 'type': target['type'], 'id': target['id']}
+
+    def _edit_parcel(self, rng):
+        """An assessor's edit: owner change, boundary change, retirement or new parcel."""
+        kind = rng.choice(['owner', 'reshape', 'delete', 'create'])
+        i = rng.randrange(len(self.parcels))
+        parcel = self.parcels[i]
+        if kind == 'owner':
+            parcel['attributes']['OwnerName'] = f'{synth.random_name(rng).upper()} LLC'
+        elif kind == 'reshape':
+            x0, z0, x1, z1 = parcel['box']
+            parcel.update(self._parcel_shape(x0, z0, x1 + rng.uniform(0.5, 2), z1))
+        elif kind == 'delete':
+            del self.parcels[i]
+            return {'edit': 'delete', 'handle': parcel['attributes']['Handle']}
+        else:
+            x0, z0, x1, z1 = parcel['box']
+            parcel = {'attributes': dict(parcel['attributes'], Handle=f'P9{self.edits:07d}'),
+                      **self._parcel_shape(x0 + 1, z0 + 1, x1 - 1, z1 - 1)}
+            self.parcels.append(parcel)
+        parcel['attributes']['EditDate'] = self.clock_ms
+        return {'edit': kind, 'handle': parcel['attributes']['Handle']}
+
+    def _edit_mapillary(self, rng):
+        """A contributor's upload: a new image a few meters from an existing camera."""
+        near = rng.choice(self.images)
+        lon, lat = near['geometry']['coordinates']
+        image_id = str(60_000_000 + self.edits)
+        self.images.append({
+            'id': image_id,
+            'captured_at': max(img['captured_at'] for img in self.images) + 1000,
+            'compass_angle': round(rng.uniform(0, 360), 2),
+            'geometry': {'type': 'Point', 'coordinates': [lon + rng.uniform(-5, 5) / LON_TO_METERS,
+                                                          lat + rng.uniform(-5, 5) / LAT_TO_METERS]},
+            'thumb_256_url': f"https://fixtures.invalid/{image_id}/256.jpg",
+            'thumb_1024_url': f"https://fixtures.invalid/{image_id}/1024.jpg",
+            'thumb_2048_url': f"https://fixtures.invalid/{image_id}/2048.jpg",
+        })
+        return {'edit': 'upload', 'id': image_id}
+
+    @staticmethod
+    def _parcel_shape(x0, z0, x1, z1):
+        ring = [list(synth.to_wgs84(x, z)) for x, z in ((x0, z0), (x1, z0), (x1, z1), (x0, z1), (x0, z0))]
+        return {'box': (x0, z0, x1, z1), 'geometry': {'rings': [ring]},
+                'shape': {'Shape__Area': round((x1 - x0) * (z1 - z0), 3),
+                          'Shape__Length': round(2 * (x1 - x0 + z1 - z0), 3)}}
+
+    def _parcel(self, i, b, p):
+        xs = [x for x, _ in b['footprint']]
+        zs = [z for _, z in b['footprint']]
+        x0, x1 = min(xs) - PARCEL_MARGIN, max(xs) + PARCEL_MARGIN
+        z0, z1 = min(zs) - PARCEL_MARGIN, max(zs) + PARCEL_MARGIN
+        year = p['year_built'] or 0
+        return {
+            'attributes': {
+                'Handle': p['handle'], 'SITEADDR': ' '.join(p['address'].split()),
+                'OwnerName': p['owner'], 'NbrOfApts': 0, 'NbrOfUnits': p['stories'],
+                'VacantLot': 0, 'Nbrhd': 30, 'AsrLandUse1': 1110, 'Zoning': 'B',
+                'FirstYearBuilt': year, 'LastYearBuilt': year,
+                'SQFT': round(b['size'][0] * b['size'][2] * p['stories'] * 10.764),
+                'LandArea': round((x1 - x0) * (z1 - z0) * 10.764),
+                'NbrOfBldgsRes': 1, 'NbrOfBldgsCom': 0,
+                'AprResImprove': 1000 * (i % 400 + 100), 'AprComImprove': 0,
+                'NatHistDist': 1, 'LocalHistDist': 1, 'CertLocalHistDist': 1,
+                'EditDate': self.clock_ms,
+            },
+            **self._parcel_shape(x0, z0, x1, z1),
+        }
+
+
+def in_bbox(lon, lat, bbox):
+    """bbox = (min_lon, min_lat, max_lon, max_lat)."""
+    return bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]
+
+
+# ---------------------------------------------------------------------------
+# API handlers: (query params, body) -> (status, payload)
+# ---------------------------------------------------------------------------
+
+def split_statements(text):
+    """Top-level ';'-separated statements (unions keep their inner ';')."""
+    out, depth, cur = [], 0, ''
+    for ch in text:
+        depth += ch == '('
+        depth -= ch == ')'
+        if ch == ';' and depth == 0:
+            out.append(cur.strip())
+            cur = ''
+        else:
+            cur += ch
+    if cur.strip():
+        out.append(cur.strip())
+    return out
+
+
+def element_in_bbox(dataset, el, bbox):
+    if el['type'] == 'node':
+        return in_bbox(el['lon'], el['lat'], bbox)
+    nodes = (dataset.osm.get(('node', nid)) for nid in el['nodes'])
+    return any(nd and in_bbox(nd['lon'], nd['lat'], bbox) for nd in nodes)
+
+
+def query_statement(dataset, kind, input_set, filters, sets):
+    """node/way query with tag, bbox, newer and bn filters."""
+    if input_set:
+        found = [el for el in sets.get(input_set, {}).values() if el['type'] == kind]
+    else:
+        found = [el for (t, _), el in dataset.osm.items() if t == kind]
+    for tag, arg in FILTER_RE.findall(filters):
+        if tag:
+            m = TAG_RE.match(tag)
+            if not m:
+                raise ValueError(f'unsupported tag filter [{tag}]')
+            k, v = m.groups()
+            found = [el for el in found if k in el.get('tags', {}) and (v is None or el['tags'][k] == v)]
+        elif arg.startswith('newer:'):
+            since = arg[len('newer:'):].strip().strip('"')
+            found = [el for el in found if el['timestamp'] > since]
+        elif arg.startswith('id:'):
+            ids = {int(v) for v in arg[3:].split(',')}
+            found = [el for el in found if el['id'] in ids]
+        elif arg.startswith('bn'):
+            members = {el['id'] for el in sets.get(arg[3:] or '_', {}).values() if el['type'] == 'node'}
+            found = [el for el in found if el['type'] == 'way' and members.intersection(el['nodes'])]
+        else:
+            s_, w, n, e = (float(v) for v in arg.split(','))
+            found = [el for el in found if element_in_bbox(dataset, el, (w, s_, e, n))]
+    return {(el['type'], el['id']): el for el in found}
+
+
+def output(el, mode):
+    """An element as `out ids|skel|body|meta` prints it."""
+    keep = {'ids': ('type', 'id'), 'skel': ('type', 'id', 'lat', 'lon', 'nodes'),
+            'body': ('type', 'id', 'lat', 'lon', 'nodes', 'tags')}.get(mode)
+    if keep is None:
+        return dict(el)
+    return {k: el[k] for k in keep if k in el}
+
+
+def run_statements(dataset, statements, sets, elements):
+    result = {}
+    for stmt in statements:
+        if not stmt or stmt.startswith('['):
+            continue
+        target = '_'
+        if '->' in stmt and not stmt.endswith(')'):
+            stmt, target = (p.strip() for p in stmt.rsplit('->', 1))
+            target = target.lstrip('.')
+        m = OUT_RE.match(stmt)
+        if m:
+            mode = next((w for w in m.group(2).split() if w in ('ids', 'skel', 'body', 'meta')), 'body')
+            chosen = sets.get(m.group(1) or '_', {})
+            for key in sorted(chosen, key=lambda k: (TYPE_ORDER[k[0]], k[1])):
+                elements.append(output(chosen[key], mode))
+            continue
+        m = RECURSE_RE.match(stmt)
+        if m:
+            found = {}
+            for el in sets.get(m.group(1) or '_', {}).values():
+                for nid in el.get('nodes', []):
+                    if ('node', nid) in dataset.osm:
+                        found[('node', nid)] = dataset.osm[('node', nid)]
+        elif stmt.startswith('('):
+            found = run_statements(dataset, split_statements(stmt[1:stmt.rindex(')')]), sets, elements)
+        else:
+            m = QUERY_RE.match(stmt)
+            if not m:
+                raise ValueError(f'unsupported statement: {stmt}')
+            found = query_statement(dataset, m.group(1), m.group(2), m.group(3), sets)
+        sets[target] = found
+        if target == '_':
+            result.update(found)
+    return result
+
+
+def overpass(dataset, query):
+    """Evaluate the Overpass QL subset the fetch stages use.
+
+    Statements: tag / bbox / (newer:"...") / (id:...) / (bn.set) queries on
+    nodes and ways, unions, named sets (->.name), recurse down (>) and out with
+    ids, skel, body or meta.
+    """
+    elements = []
+    try:
+        run_statements(dataset, split_statements(query), {}, elements)
+    except ValueError as e:
+        return 400, f'Error: fixture cannot evaluate the query: {e}'
+    return 200, {
+        'version': 0.6,
+        'generator': 'lafayette-square fixtures',
+        'osm3s': {'timestamp_osm_base': dataset.timestamp},
+        'elements': elements,
+    }
+
+
+def arcgis_error(message):
+    return 200, {'error': {'code': 400, 'message': 'Unable to complete operation.',
+                           'details': [message]}}
+
+
+def arcgis_layer(edit_date):
+    """Layer metadata, as <layer>?f=json returns it."""
+    fields = [{'name': name, 'type': ftype} for name, ftype in FIELD_TYPES.items()
+              if edit_date or name != 'EditDate']
+    info = {'id': 11, 'name': 'Assessor_Public_Parcels', 'type': 'Feature Layer',
+            'geometryType': 'esriGeometryPolygon', 'displayField': 'Handle', 'fields': fields}
+    if edit_date:
+        info['editFieldsInfo'] = {'editDateField': 'EditDate'}
+    return 200, info
+
+
+def arcgis_where(where, edit_date):
+    """Predicate for the where clauses the fetch stage sends, or None if unsupported."""
+    where = where.strip()
+    if where == '1=1':
+        return lambda a: True
+    m = re.match(r"^(\w+)\s*>\s*TIMESTAMP\s*'([^']+)'$", where, re.I)
+    if m and (edit_date or m.group(1) != 'EditDate') and FIELD_TYPES.get(m.group(1)) == 'esriFieldTypeDate':
+        t = datetime.datetime.strptime(m.group(2), '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+        ms = t.timestamp() * 1000
+        return lambda a: (a.get(m.group(1)) or 0) > ms
+    m = re.match(r"^Handle\s+IN\s*\((.*)\)$", where, re.I)
+    if m:
+        handles = {h.replace("''", "'") for h in re.findall(r"'((?:[^']|'')*)'", m.group(1))}
+        return lambda a: a['Handle'] in handles
+    return None
+
+
+def arcgis(dataset, params, max_record_count, edit_date=True):
+    match = arcgis_where(params.get('where', '1=1'), edit_date)
+    if match is None:
+        return arcgis_error(f"Invalid where clause: {params.get('where')}")
+    offset = int(params.get('resultOffset', 0))
+    count = min(int(params.get('resultRecordCount', max_record_count)), max_record_count)
+    fields = params.get('outFields', '*')
+    hits = [f for f in dataset.parcels if match(f['attributes'])]
+    page = []
+    for f in hits[offset:offset + count]:
+        attrs = {**f['attributes'], **f['shape']}
+        if not edit_date:
+            attrs.pop('EditDate')
+        if fields != '*':
+            attrs = {k: attrs.get(k) for k in fields.split(',')}
+        feature = {'attributes': attrs}
+        if params.get('returnGeometry', 'true') != 'false':
+            feature['geometry'] = f['geometry']
+        page.append(feature)
+    payload = {
+        'objectIdFieldName': 'OBJECTID',
+        'geometryType': 'esriGeometryPolygon',
+        'spatialReference': {'wkid': 4326},
+        'features': page,
+    }
+    if offset + count < len(hits):
+        payload['exceededTransferLimit'] = True
+    return 200, payload
+
+
+def mapillary(dataset, params, base_url):
+    bbox = tuple(float(v) for v in params['bbox'].split(',')) if 'bbox' in params else None
+    limit = min(int(params.get('limit', MAPILLARY_MAX_LIMIT)), MAPILLARY_MAX_LIMIT)
+    after = int(params.get('after', 0))
+    fields = params.get('fields', 'id').split(',')
+    start = 0
+    if 'start_captured_at' in params:
+        when = datetime.datetime.fromisoformat(params['start_captured_at'].replace('Z', '+00:00'))
+        start = int(when.timestamp() * 1000)
+
+    hits = [img for img in dataset.images[after:]
+            if (not bbox or in_bbox(*img['geometry']['coordinates'], bbox))
+            and img['captured_at'] >= start]
+    page = hits[:limit]
+    payload = {'data': [{k: img[k] for k in fields if k in img} for img in page]}
+    if len(hits) > limit:
+        cursor = dataset.images.index(hits[limit], after)
+        payload['paging'] = {'next': f"{base_url}{MAPILLARY_PATH}?" +
+                             urlencode({**params, 'after': cursor})}
+    return 200, payload
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dataset, latency=0.0, jitter=0.0, error_rate=0.0, seed=0,
+                 max_record_count=MAX_RECORD_COUNT, edit_date=True):
+        super().__init__(address, Handler)
+        self.dataset = dataset
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.seed = seed
+        self.max_record_count = max_record_count
+        self.edit_date = edit_date
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset(self):
+        with self.lock:
+            self.attempts = {}
+            self.stats = {api: {'requests': 0, 'faults': 0, 'bytes': 0}
+                          for api in ('overpass', 'arcgis', 'mapillary')}
+
+    def draw(self, key):
+        """Two uniforms for this request, fixed by (seed, request, attempt)."""
+        with self.lock:
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        h = hashlib.sha256(f'{self.seed}|{attempt}|{key}'.encode()).digest()
+        return int.from_bytes(h[:8], 'big') / 2 ** 64, int.from_bytes(h[8:16], 'big') / 2 ** 64
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request(b'')
+
+    def do_POST(self):
+        self.handle_request(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+    def handle_request(self, body):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if body:
+            params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+
+        if url.path == '/_stats':
+            return self.send(200, server.stats)
+        if url.path == '/_reset':
+            server.reset()
+            return self.send(200, {'reset': True})
+        if url.path == '/_edit':
+            with server.lock:
+                edits = server.dataset.edit(int(params.get('n', 1)), server.seed,
+                                            params.get('source', 'osm'))
+            return self.send(200, {'timestamp': server.dataset.timestamp, 'edits': edits})
+
+        api = {OVERPASS_PATH: 'overpass', PARCELS_PATH: 'arcgis', PARCELS_LAYER_PATH: 'arcgis',
+               MAPILLARY_PATH: 'mapillary'}.get(url.path)
+        if api is None:
+            return self.send(404, {'error': f'no fixture at {url.path}'})
+
+        fault, wait = server.draw(f'{self.command} {self.path} {body.decode(errors="replace")}')
+        time.sleep(server.latency + server.jitter * wait)
+        with server.lock:
+            server.stats[api]['requests'] += 1
+        if fault < server.error_rate:
+            with server.lock:
+                server.stats[api]['faults'] += 1
+            return self.fault(api, fault / server.error_rate)
+
+        if api == 'overpass':
+            with server.lock:
+                status, payload = overpass(server.dataset, params.get('data', ''))
+        elif url.path == PARCELS_LAYER_PATH:
+            status, payload = arcgis_layer(server.edit_date)
+        elif api == 'arcgis':
+            with server.lock:
+                status, payload = arcgis(server.dataset, params, server.max_record_count,
+                                         server.edit_date)
+        else:
+            if not self.headers.get('Authorization', '').startswith('OAuth '):
+                return self.send(401, {'error': {'message': 'Invalid OAuth access token',
+                                                 'type': 'OAuthException', 'code': 190}})
+            status, payload = mapillary(server.dataset, params, server.base_url)
+        self.send(status, payload, api)
+
+    def fault(self, api, u):
+        if api == 'overpass':
+            if u < 0.5:
+                return self.send(429, 'rate_limited: too many requests', api)
+            return self.send(504, 'Gateway Timeout: server too busy', api)
+        if api == 'arcgis':
+            return self.send(200, {'error': {'code': 500, 'message': 'Unable to complete operation.',
+                                             'details': []}}, api)
+        return self.send(429, {'error': {'message': 'Application request limit reached',
+                                         'type': 'OAuthException', 'code': 4}}, api)
+
+    def send(self, status, payload, api=None):
+        if isinstance(payload, str):
+            data, ctype = payload.encode(), 'text/plain'
+        else:
+            data, ctype = json.dumps(payload).encode(), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if api:
+            with self.server.lock:
+                self.server.stats[api]['bytes'] += len(data)
+
+
+def start(port=0, scale=1, seed=0, **options):
+    """Serve on a background thread; returns the server (see .base_url, .shutdown())."""
+    server = FixtureServer(('127.0.0.1', port), Dataset(scale, seed), seed=seed, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def env_for(base_url):
+    """Environment variables that point the fetch stages at a fixture server."""
+    return {
+        'LSQ_OVERPASS_URL': base_url + OVERPASS_PATH,
+        'LSQ_PARCELS_URL': base_url + PARCELS_PATH,
+        'LSQ_MAPILLARY_URL': base_url + MAPILLARY_PATH,
+        'MAPILLARY_ACCESS_TOKEN': 'fixture',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Overpass / ArcGIS / Mapillary fixtures')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--scale', type=int, default=1, help='dataset size, x the real neighborhood')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--max-record-count', type=int, default=MAX_RECORD_COUNT,
+                        help='ArcGIS page cap')
+    parser.add_argument('--no-edit-date', action='store_true',
+                        help='parcel layer without an edit-date field (refresh falls back to hashes)')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    dataset = Dataset(args.scale, args.seed)
+    server = FixtureServer(('127.0.0.1', args.port), dataset, latency=args.latency,
+                           jitter=args.jitter, error_rate=args.error_rate, seed=args.seed,
+                           max_record_count=args.max_record_count, edit_date=not args.no_edit_date)
+    n_ways = sum(k[0] == 'way' for k in dataset.osm)
+    n_pois = sum(k[0] == 'node' and 'tags' in el for k, el in dataset.osm.items())
+    print(f"Dataset x{args.scale} (seed {args.seed}): {n_ways} ways, "
+          f"{n_pois} POIs, {len(dataset.parcels)} parcels, "
+          f"{len(dataset.images)} images in {time.perf_counter() - t0:.1f}s")
+    print(f"Serving on {server.base_url}\n")
+    for key, value in env_for(server.base_url).items():
+        print(f"  export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Opening hours as weekly quarter-hour bitmasks.
+
+A week is a (7, 96) boolean array: day 0 is Sunday (JavaScript getDay()
+order), slot s covers minutes [15 s, 15 s + 15). Intervals are widened to
+whole slots (open rounds down, close rounds up) and an interval that ends
+at or before it starts runs past midnight into the next day, wrapping
+Saturday night into Sunday morning.
+
+Two sources are understood: the landmarks.json day objects
+({'monday': {'open': '11:00', 'close': '21:00'}, ...}) and the weekly
+subset of the OSM opening_hours syntax ('Mo-Fr 06:30-18:00; Sa 07:00-18:00',
+'Su 09:00-14:00,17:00-20:00', '24/7', 'off', 'PH off'). Rules with month,
+week or date selectors cannot be expressed in a weekly mask and are
+reported back unparsed.
+"""
+import base64
+import re
+
+import numpy as np
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_NAMES = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+OSM_DAYS = ['Su', 'Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa']
+
+_DAY = r'(?:Mo|Tu|We|Th|Fr|Sa|Su|PH|SH)'
+_DAYS_SELECTOR = re.compile(rf'^({_DAY}(?:-{_DAY})?(?:,{_DAY}(?:-{_DAY})?)*)(?:\s+|$)')
+_TIME_RANGE = re.compile(r'^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})\+?$')
+# ', Sa 10:00-14:00' inside a rule starts an additional (non-overriding) rule
+_ADDITIONAL = re.compile(rf',\s+(?={_DAY}\b)')
+
+
+def empty_week():
+    return np.zeros((7, SLOTS_PER_DAY), dtype=bool)
+
+
+def to_minutes(hhmm):
+    """'07:30' -> 450, or None."""
+    m = re.match(r'^\s*(\d{1,2}):(\d{2})\s*$', str(hhmm or ''))
+    return int(m.group(1)) * 60 + int(m.group(2)) if m else None
+
+
+def fill_interval(week, day, start, end):
+    """Mark [start, end) minutes of day open; end <= start runs past midnight."""
+    if end <= start:
+        end += 24 * 60
+    s = start // SLOT_MINUTES
+    e = -(-end // SLOT_MINUTES)
+    idx = (day * SLOTS_PER_DAY + np.arange(s, e)) % week.size
+    week.reshape(-1)[idx] = True
+
+
+def parse_day_objects(hours):
+    """Week mask from landmarks.json day objects; days without open/close are closed."""
+    week = empty_week()
+    for day, name in enumerate(DAY_NAMES):
+        slot = (hours or {}).get(name)
+        if not isinstance(slot, dict):
+            continue
+        start, end = to_minutes(slot.get('open')), to_minutes(slot.get('close'))
+        if start is not None and end is not None:
+            fill_interval(week, day, start, end)
+    return week
+
+
+def _selected_days(selector):
+    """'Mo-Fr,Su' -> [1, 2, 3, 4, 5, 0]; PH/SH are dropped."""
+    days = []
+    for part in selector.split(','):
+        ends = part.split('-')
+        if any(e not in OSM_DAYS for e in ends):
+            continue
+        a = OSM_DAYS.index(ends[0])
+        b = OSM_DAYS.index(ends[-1])
+        days.extend((a + k) % 7 for k in range((b - a) % 7 + 1))
+    return days
+
+
+def _apply_rule(week, rule, override):
+    """Apply one OSM rule; returns False if it is outside the weekly subset."""
+    rule = rule.strip()
+    if not rule:
+        return True
+    if rule == '24/7':
+        week[:] = True
+        return True
+
+    m = _DAYS_SELECTOR.match(rule)
+    if m:
+        days = _selected_days(m.group(1))
+        if not days:
+            return True  # holiday-only rule
+        rest = rule[m.end():].strip()
+    else:
+        days = list(range(7))
+        rest = rule
+
+    if rest in ('off', 'closed'):
+        week[days] = False
+        return True
+
+    intervals = []
+    for part in (rest or '00:00-24:00').split(','):
+        t = _TIME_RANGE.match(part.strip())
+        if not t:
+            return False
+        intervals.append((int(t.group(1)) * 60 + int(t.group(2)),
+                          int(t.group(3)) * 60 + int(t.group(4))))
+
+    if override:
+        week[days] = False
+    for day in days:
+        for start, end in intervals:
+            fill_interval(week, day, start, end)
+    return True
+
+
+def parse_opening_hours(text):
+    """
+    Week mask from an OSM opening_hours string.
+
+    Returns (week, unparsed) where unparsed lists the rules that were
+    skipped. Later ';' rules replace earlier ones for the days they name,
+    ', '-joined rules add to them.
+    """
+    week = empty_week()
+    unparsed = []
+    for rule in re.split(r';|\|\|', text or ''):
+        for k, part in enumerate(_ADDITIONAL.split(rule)):
+            if not _apply_rule(week, part, override=(k == 0)):
+                unparsed.append(part.strip())
+    return week, unparsed
+
+
+def landmark_week(landmark):
+    """
+    Week mask for a landmark, or (None, []) when it has no hours.
+
+    Curated day objects win over the OSM string. Returns (week, unparsed).
+    """
+    if landmark.get('hours'):
+        return parse_day_objects(landmark['hours']), []
+    raw = landmark.get('opening_hours_raw') or landmark.get('opening_hours')
+    if isinstance(raw, str) and raw.strip():
+        return parse_opening_hours(raw)
+    return None, []
+
+
+def encode_week(week):
+    """84-byte little-endian bitmask (bit = day * 96 + slot), base64."""
+    bits = np.packbits(week.reshape(-1), bitorder='little')
+    return base64.b64encode(bits.tobytes()).decode('ascii')
+
+
+def decode_week(encoded):
+    bits = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8)
+    return np.unpackbits(bits, bitorder='little')[:7 * SLOTS_PER_DAY].reshape(7, SLOTS_PER_DAY).astype(bool)
@@ -2,21 +2,33 @@
 """
 Match wikimedia facade photos to specific buildings.
 
-Strategy: year-first matching
-1. For each street, group images and buildings by year_built
-2. Within each year group, match by geographic proximity (position along street)
-3. Unmatched images get assigned to nearest unmatched building
-4. Output facade_mapping.json with building_id -> image + front edge geometry
+Strategy: one optimal assignment per street
+1. For each street, collect its images (walking order) and the buildings on it
+2. Cost of pairing a building with an image = year_built distance plus the
+   mismatch between the building's offset along the street polyline (as a
+   fraction of the street's length) and the image's place in walking order
+3. Solve the cost matrix with the Hungarian method, so every street gets the
+   globally cheapest pairing independent of iteration order
+4. Find every building's street-facing footprint edge from street geometry
+   (nearest centerline segment per edge, via a grid segment index)
+5. Output front_edges.json (all buildings) and facade_mapping.json with
+   building_id -> image + front edge geometry
+
+Streets are independent and are matched in parallel worker processes.
 """
-import json, re, math, os
-from collections import defaultdict
+import json, re, math, os, time
+from concurrent.futures import ProcessPoolExecutor
 
-with open('public/photos/lafayette-square/attribution.json') as f:
-    attrs = json.load(f)
-with open('src/data/buildings.json') as f:
-    buildings = json.load(f)['buildings']
-with open('src/data/streets.json') as f:
-    streets_data = json.load(f)['streets']
+import numpy as np
+
+from addresses import build_address_index, street_key
+from assignment import linear_sum_assignment
+from config import DATA_DIR
+from spatial import nearest_segment, polyline_segments, segment_index
+from tracing import span, traced
+
+UNKNOWN_YEAR_DISTANCE = 50   # years — unknown year = moderate penalty
+POSITION_WEIGHT = 10         # years per full street length of position mismatch
 
 WIKI_TO_ADDR = {
     'lafayette-ave': 'LAFAYETTE AV',
@@ -29,16 +41,10 @@ WIKI_TO_ADDR = {
     'park-and-vail': 'VAIL PL',
 }
 
-WIKI_TO_STREET_NAME = {
-    'lafayette-ave': 'Lafayette',
-    'mississippi-ave': 'Mississippi',
-    'park-ave': 'Park',
-    'missouri-ave': 'Missouri',
-    'benton-place': 'Benton',
-    'whittemore-place': 'Whittemore',
-    'dolman-st': 'Dolman',
-    'park-and-vail': 'Vail',
-}
+# Front-edge detection
+MIN_EDGE_LENGTH = 0.5        # meters — shorter edges are footprint noise
+ADDRESS_STREET_MAX = 60.0    # meters — farther than this, use the nearest street
+FRONT_DISTANCE_SCALE = 10.0  # meters — score halves at this edge-to-street distance
 
 
 def get_image_year(desc):
@@ -46,10 +52,8 @@ def get_image_year(desc):
     return int(m.group(1)) if m else None
 
 
-def get_street_axis(wiki_street):
-    """Get the primary direction vector for a street."""
-    name_pattern = WIKI_TO_STREET_NAME.get(wiki_street, '')
-    segs = [s for s in streets_data if name_pattern.lower() in s.get('name', '').lower()]
+def get_street_axis(segs):
+    """Get the primary direction vector for a street's segments."""
     if not segs:
         return None
     dx_total, dz_total = 0, 0
@@ -70,259 +74,346 @@ def project_along(bldg, axis):
     return pos[0] * axis[0] + pos[2] * axis[1]
 
 
-def year_distance(y1, y2):
-    """How far apart two years are. None = large penalty."""
-    if y1 is None or y2 is None:
-        return 50  # unknown = moderate penalty
-    return abs(y1 - y2)
-
-
-def match_street(wiki_street):
-    """Match images to buildings using year-first, position-second."""
-    addr_pattern = WIKI_TO_ADDR.get(wiki_street)
-    if not addr_pattern:
-        return {}
-
-    # Images sorted by filename (walking order)
-    imgs = sorted(
-        [a for a in attrs if a['street'] == wiki_street],
-        key=lambda a: a['file']
-    )
-    # Only include images that actually exist on disk
-    imgs = [a for a in imgs if os.path.exists(a['file'].lstrip('/'))]
-
-    # Buildings on this street with position data
-    street_bldgs = [b for b in buildings
-                    if addr_pattern in b.get('address', '') and b.get('position')]
+def street_offsets(bldgs, segments, axis):
+    """
+    Each building's offset along the street polyline, as a fraction of the
+    street's length (0 at the end the axis points away from), or None
+    without street geometry.
 
+    The street's pieces are oriented along the axis and laid end to end in
+    axis order; a building's offset is the arc length to the closest point
+    of the nearest piece.
+    """
+    pieces = [np.asarray(s['points'], dtype=np.float64)[:, :2] for s in segments or []
+              if len(s['points']) >= 2]
+    if not pieces or not axis:
+        return None
+    axis = np.asarray(axis)
+    pieces = [p if (p[-1] - p[0]) @ axis >= 0 else p[::-1] for p in pieces]
+    pieces.sort(key=lambda p: p[0] @ axis)
+    a, b, _ = polyline_segments(pieces)
+    seg_len = np.hypot(*(b - a).T)
+    total = seg_len.sum()
+    if total <= 0:
+        return None
+    seg_start = np.cumsum(seg_len) - seg_len
+
+    pos = np.array([[bd['position'][0], bd['position'][2]] for bd in bldgs], dtype=np.float64)
+    seg, _, closest = nearest_segment(segment_index(a, b), pos)
+    along = seg_start[seg] + np.hypot(*(closest - a[seg]).T)
+    return np.clip(along / total, 0, 1)
+
+
+def cost_matrix(street_bldgs, imgs, b_pos=None):
+    """
+    Assignment cost of every (building, image) pair.
+
+    Year distance in years, plus POSITION_WEIGHT years per full street length
+    of disagreement between the building's offset along the street (b_pos,
+    fractions from street_offsets; by rank in the given order when None)
+    and the image's place in walking order. Returns (cost, year_cost).
+    """
+    b_years = np.array([b.get('year_built') or np.nan for b in street_bldgs], dtype=np.float64)
+    i_years = np.array([img['_year'] or np.nan for img in imgs], dtype=np.float64)
+    year_cost = np.abs(b_years[:, None] - i_years[None, :])
+    year_cost[np.isnan(year_cost)] = UNKNOWN_YEAR_DISTANCE
+
+    if b_pos is None:
+        b_pos = np.linspace(0, 1, len(street_bldgs)) if len(street_bldgs) > 1 else np.zeros(1)
+    i_pos = np.linspace(0, 1, len(imgs)) if len(imgs) > 1 else np.zeros(1)
+    position_cost = np.abs(b_pos[:, None] - i_pos[None, :])
+    return year_cost + POSITION_WEIGHT * position_cost, year_cost
+
+
+def match_confidence(yr_dist, img_year, bldg_year):
+    if img_year is None or bldg_year is None:
+        return 0.5  # unknown
+    return (1.0 if yr_dist == 0 else 0.9 if yr_dist <= 2 else 0.7 if yr_dist <= 5
+            else 0.4 if yr_dist <= 10 else 0.2)
+
+
+@traced('match street')
+def match_street(wiki_street, imgs, street_bldgs, segments):
+    """
+    Match a street's images to its buildings in one optimal assignment.
+
+    imgs are in walking order (sorted by filename); street_bldgs are the
+    buildings whose address is on this street. Returns (wiki_street, results,
+    seconds).
+    """
+    t0 = time.perf_counter()
     if not street_bldgs or not imgs:
-        return {}
+        return wiki_street, {}, time.perf_counter() - t0
 
-    # Sort buildings by position along street
-    axis = get_street_axis(wiki_street)
+    # Order buildings along the street (id breaks ties) so image walking
+    # order and building order line up
+    axis = get_street_axis(segments)
     if axis:
-        for b in street_bldgs:
-            b['_proj'] = project_along(b, axis)
-        street_bldgs.sort(key=lambda b: b['_proj'])
+        street_bldgs = sorted(street_bldgs, key=lambda b: (project_along(b, axis), b['id']))
+    else:
+        street_bldgs = sorted(street_bldgs, key=lambda b: b['id'])
+    b_pos = street_offsets(street_bldgs, segments, axis)
 
-    # Extract years
     for img in imgs:
         img['_year'] = get_image_year(img.get('description', ''))
 
-    # === Year-first matching ===
-    # For each building, find best image by year match
-    # Track which images are claimed
-    claimed_imgs = set()
-    bldg_to_img = {}
+    cost, year_cost = cost_matrix(street_bldgs, imgs, b_pos)
+    rows, cols = linear_sum_assignment(cost)
 
-    # Pass 1: exact year matches
-    for b in street_bldgs:
-        b_year = b.get('year_built')
-        if b_year is None:
-            continue
-        best_img = None
-        best_dist = 999
-        for i, img in enumerate(imgs):
-            if i in claimed_imgs:
-                continue
-            dist = year_distance(img['_year'], b_year)
-            if dist <= 2 and dist < best_dist:
-                best_dist = dist
-                best_img = i
-        if best_img is not None:
-            claimed_imgs.add(best_img)
-            bldg_to_img[b['id']] = (best_img, best_dist)
-
-    # Pass 2: close year matches (within 5 years)
-    for b in street_bldgs:
-        if b['id'] in bldg_to_img:
-            continue
-        b_year = b.get('year_built')
-        best_img = None
-        best_dist = 999
-        for i, img in enumerate(imgs):
-            if i in claimed_imgs:
-                continue
-            dist = year_distance(img['_year'], b_year)
-            if dist <= 5 and dist < best_dist:
-                best_dist = dist
-                best_img = i
-        if best_img is not None:
-            claimed_imgs.add(best_img)
-            bldg_to_img[b['id']] = (best_img, best_dist)
-
-    # Pass 3: remaining buildings get nearest unclaimed image by position
-    if axis:
-        unclaimed = sorted(
-            [i for i in range(len(imgs)) if i not in claimed_imgs],
-            key=lambda i: i  # keep walking order
-        )
-        unmatched_bldgs = [b for b in street_bldgs if b['id'] not in bldg_to_img]
-
-        for b in unmatched_bldgs:
-            if not unclaimed:
-                break
-            # Find nearest unclaimed image by index (proxy for position)
-            b_idx = street_bldgs.index(b)
-            # Estimate where in the image sequence this building would be
-            expected_img_idx = int(b_idx * len(imgs) / len(street_bldgs))
-            best_i = min(unclaimed, key=lambda i: abs(i - expected_img_idx))
-            unclaimed.remove(best_i)
-            claimed_imgs.add(best_i)
-            dist = year_distance(imgs[best_i]['_year'], b.get('year_built'))
-            bldg_to_img[b['id']] = (best_i, dist)
-
-    # Build results
     results = {}
-    for bid, (img_idx, yr_dist) in bldg_to_img.items():
-        img = imgs[img_idx]
-        bldg = next(b for b in street_bldgs if b['id'] == bid)
-
-        confidence = 1.0 if yr_dist == 0 else 0.9 if yr_dist <= 2 else 0.7 if yr_dist <= 5 else 0.4 if yr_dist <= 10 else 0.2
-        if img['_year'] is None or bldg.get('year_built') is None:
-            confidence = 0.5  # unknown
-
-        results[bid] = {
+    for r, c in zip(rows, cols):
+        bldg, img = street_bldgs[r], imgs[c]
+        yr_dist = int(year_cost[r, c])
+        results[bldg['id']] = {
             'image': img['file'],
             'image_year': img['_year'],
             'building_year': bldg.get('year_built'),
-            'confidence': confidence,
+            'confidence': match_confidence(yr_dist, img['_year'], bldg.get('year_built')),
             'description': img.get('description', '')[:300],
             'address': bldg.get('address', ''),
         }
 
-    return results
-
-
-def compute_front_edge(building):
-    """Compute the street-facing edge of a building footprint."""
-    fp = building.get('footprint')
-    if not fp or len(fp) < 3:
-        # Fallback: use building size to create a synthetic edge
-        size = building.get('size', [8, 8, 8])
-        return {
-            'width': size[0],
-            'mid_x': building['position'][0],
-            'mid_z': building['position'][2],
-            'nx': 0,
-            'nz': 1,
-            'angle': 0,
-        }
+    return wiki_street, results, time.perf_counter() - t0
+
+
+def address_street_key(address, known_keys):
+    """Street key of an address ('1808   CHOUTEAU AV', 'H S 18TH ST'), or None."""
+    tokens = (address or '').upper().split()
+    for i in range(len(tokens)):
+        key = street_key(' '.join(tokens[i:]))
+        if key in known_keys:
+            return key
+    return None
+
+
+def fallback_front_edge(building):
+    """Synthetic south-facing edge from the building size (no usable footprint)."""
+    size = building.get('size', [8, 8, 8])
+    return {
+        'width': size[0],
+        'mid_x': building['position'][0],
+        'mid_z': building['position'][2],
+        'nx': 0,
+        'nz': 1,
+        'angle': 0,
+    }
 
-    addr = building.get('address', '').upper()
-
-    # Classify street direction
-    ew_streets = ['LAFAYETTE', 'PARK', 'CHOUTEAU', 'HICKORY', 'RUTGER', 'CARROLL',
-                  'BENTON', 'WHITTEMORE', 'ALBION', 'MACKAY', 'KENNETT']
-    ns_streets = ['MISSISSIPPI', 'MISSOURI', 'DOLMAN', '18TH', 'LASALLE', 'VAIL',
-                  'JEFFERSON', '17TH', '19TH']
-
-    is_ew = any(s in addr for s in ew_streets)
-    is_ns = any(s in addr for s in ns_streets)
-    if not is_ew and not is_ns:
-        is_ew = True  # default
-
-    best_edge = None
-    best_score = -1
-
-    for i in range(len(fp)):
-        p1 = fp[i]
-        p2 = fp[(i + 1) % len(fp)]
-        dx = p2[0] - p1[0]
-        dz = p2[1] - p1[1]
-        length = math.sqrt(dx ** 2 + dz ** 2)
-        if length < 0.5:
+
+def footprint_edges(buildings):
+    """
+    Every usable footprint edge of every building, as flat arrays.
+
+    Returns dict of owner (E,) building index, p1/p2 (E, 2) endpoints,
+    normal (E, 2) outward unit normals and length (E,).
+    """
+    owner, p1, p2 = [], [], []
+    for i, b in enumerate(buildings):
+        fp = b.get('footprint')
+        if not fp or len(fp) < 3:
             continue
+        pts = np.asarray(fp, dtype=np.float64)
+        # Orient counter-clockwise in (x, z) so (dz, -dx) points outward
+        area = np.dot(pts[:, 0], np.roll(pts[:, 1], -1)) - np.dot(np.roll(pts[:, 0], -1), pts[:, 1])
+        if area < 0:
+            pts = pts[::-1]
+        owner.append(np.full(len(pts), i))
+        p1.append(pts)
+        p2.append(np.roll(pts, -1, axis=0))
+
+    if not owner:
+        empty = np.empty((0, 2))
+        return {'owner': np.empty(0, dtype=np.int64), 'p1': empty, 'p2': empty,
+                'normal': empty, 'length': np.empty(0)}
+    owner, p1, p2 = np.concatenate(owner), np.concatenate(p1), np.concatenate(p2)
+    d = p2 - p1
+    length = np.hypot(d[:, 0], d[:, 1])
+    keep = length >= MIN_EDGE_LENGTH
+    owner, p1, p2, d, length = owner[keep], p1[keep], p2[keep], d[keep], length[keep]
+    normal = np.column_stack([d[:, 1], -d[:, 0]]) / length[:, None]
+    return {'owner': owner, 'p1': p1, 'p2': p2, 'normal': normal, 'length': length}
+
+
+@traced('match front edges')
+def compute_front_edges(buildings, streets_by_key):
+    """
+    Street-facing footprint edge of every building, from street geometry.
+
+    Each edge midpoint is matched to the nearest street centerline segment
+    (the building's address street when it is within ADDRESS_STREET_MAX,
+    otherwise any street) in batched grid-index queries. The front edge is
+    the one that faces its street most squarely, weighted toward longer and
+    closer edges. Returns {building_id: front_edge}.
+    """
+    edges = footprint_edges(buildings)
+    mid = (edges['p1'] + edges['p2']) / 2
+
+    # Nearest street of any name
+    names = [name for name, segs in streets_by_key.items() for _ in segs]
+    a, b, owner = polyline_segments([s['points'] for segs in streets_by_key.values() for s in segs])
+    seg, dist, closest = nearest_segment(segment_index(a, b), mid)
+    street = np.array([names[o] for o in owner[seg]] if len(seg) else [], dtype=object)
+
+    # Nearest segment of the address street, one index per street
+    keys = [address_street_key(bd.get('address'), streets_by_key) for bd in buildings]
+    edge_keys = np.array([keys[o] for o in edges['owner']], dtype=object)
+    for key in set(keys) - {None}:
+        sel = np.nonzero(edge_keys == key)[0]
+        ka, kb, _ = polyline_segments([s['points'] for s in streets_by_key[key]])
+        if not len(sel) or not len(ka):
+            continue
+        _, kd, kc = nearest_segment(segment_index(ka, kb), mid[sel])
+        use = kd <= ADDRESS_STREET_MAX
+        dist[sel[use]] = kd[use]
+        closest[sel[use]] = kc[use]
+        street[sel[use]] = key
+
+    toward = closest - mid
+    toward /= np.maximum(np.hypot(toward[:, 0], toward[:, 1]), 1e-9)[:, None]
+    facing = np.maximum((edges['normal'] * toward).sum(axis=1), 0.0)
+    score = facing * (1 + edges['length'] * 0.05) / (1 + dist / FRONT_DISTANCE_SCALE)
+
+    # Best-scoring edge per building (first edge wins ties)
+    order = np.lexsort((np.arange(len(score)), -score, edges['owner']))
+    first = order[np.r_[True, edges['owner'][order][1:] != edges['owner'][order][:-1]]]
+
+    front = {}
+    for e in first:
+        bd = buildings[edges['owner'][e]]
+        nx, nz = edges['normal'][e]
+        front[bd['id']] = {
+            'width': round(float(edges['length'][e]), 2),
+            'mid_x': round(float(mid[e, 0]), 2),
+            'mid_z': round(float(mid[e, 1]), 2),
+            'nx': round(float(nx), 3),
+            'nz': round(float(nz), 3),
+            'angle': round(math.atan2(nx, nz), 4),
+            'street': street[e],
+            'street_distance': round(float(dist[e]), 1),
+        }
+    for bd in buildings:
+        if bd['id'] not in front and bd.get('position'):
+            front[bd['id']] = fallback_front_edge(bd)
+    return front
 
-        nx, nz = -dz / length, dx / length
-
-        # Front face has normal pointing toward the street
-        # E-W streets: front face normal has large |Z| component
-        # N-S streets: front face normal has large |X| component
-        score = abs(nz) if is_ew else abs(nx)
-
-        # Prefer wider edges (the actual front, not a narrow side)
-        score *= (1 + length * 0.05)
-
-        if score > best_score:
-            best_score = score
-            mid_x = (p1[0] + p2[0]) / 2
-            mid_z = (p1[1] + p2[1]) / 2
-            best_edge = {
-                'width': round(length, 2),
-                'mid_x': round(mid_x, 2),
-                'mid_z': round(mid_z, 2),
-                'nx': round(nx, 3),
-                'nz': round(nz, 3),
-                'angle': round(math.atan2(nx, nz), 4),
-            }
-
-    return best_edge
-
-
-# ============================================================
-# Run matching
-# ============================================================
-all_results = {}
-total_imgs = 0
-total_matched = 0
-total_high = 0
-
-print("Facade Matching Results")
-print("=" * 60)
-
-for wiki_street in WIKI_TO_ADDR:
-    results = match_street(wiki_street)
-    all_results.update(results)
-
-    n_imgs = len([a for a in attrs if a['street'] == wiki_street
-                  and os.path.exists(a['file'].lstrip('/'))])
-    matched = len(results)
-    high = sum(1 for r in results.values() if r['confidence'] >= 0.7)
-    med = sum(1 for r in results.values() if 0.4 <= r['confidence'] < 0.7)
-    low = sum(1 for r in results.values() if r['confidence'] < 0.4)
 
-    total_imgs += n_imgs
-    total_matched += matched
-    total_high += high
+def index_streets(streets_data):
+    """Street centerline records grouped by street key (built once)."""
+    by_key = {}
+    for s in streets_data:
+        key = street_key(s.get('name'))
+        if key and len(s.get('points') or []) >= 2:
+            by_key.setdefault(key, []).append(s)
+    return by_key
+
+
+def print_street_summary(wiki_street, n_imgs, results, seconds):
+    matched = len(results)
+    conf = [r['confidence'] for r in results.values()]
+    high = sum(1 for c in conf if c >= 0.7)
+    med = sum(1 for c in conf if 0.4 <= c < 0.7)
+    low = sum(1 for c in conf if c < 0.4)
+    mean = sum(conf) / matched if matched else 0
 
     print(f"\n{wiki_street:20s}  imgs={n_imgs:3d}  matched={matched:3d}  "
-          f"high={high:3d}  med={med:3d}  low={low:3d}")
+          f"high={high:3d}  med={med:3d}  low={low:3d}  "
+          f"mean_conf={mean:.2f}  {seconds * 1000:6.1f} ms")
 
     # Show samples
-    for bid, r in sorted(results.items(), key=lambda x: -x[1]['confidence'])[:3]:
+    for bid, r in sorted(results.items(), key=lambda x: (-x[1]['confidence'], x[0]))[:3]:
         sym = "✓" if r['confidence'] >= 0.7 else "~" if r['confidence'] >= 0.4 else "✗"
         fname = r['image'].split('/')[-1]
         print(f"  {sym} {fname} -> {bid:10s} ({r['address']:25s}) "
               f"img={r['image_year'] or '?':>5} bldg={r['building_year'] or '?':>5} "
               f"conf={r['confidence']:.1f}")
 
-print(f"\n{'=' * 60}")
-print(f"TOTAL: {total_imgs} images, {total_matched} matched, {total_high} high-confidence")
-
-# ============================================================
-# Build facade_mapping.json with front edge geometry
-# ============================================================
-facade_mapping = {}
-
-for bid, match in all_results.items():
-    bldg = next((b for b in buildings if b['id'] == bid), None)
-    if not bldg:
-        continue
-
-    edge = compute_front_edge(bldg)
-    if not edge:
-        continue
-
-    facade_mapping[bid] = {
-        'image': match['image'],
-        'confidence': match['confidence'],
-        'description': match['description'],
-        'wall_height': bldg.get('size', [0, 0, 0])[1],
-        'front_edge': edge,
-    }
 
-with open('src/data/facade_mapping.json', 'w') as f:
-    json.dump(facade_mapping, f, indent=2)
+def main():
+    with open('public/photos/lafayette-square/attribution.json') as f:
+        attrs = json.load(f)
+    with open(os.path.join(DATA_DIR, 'buildings.json')) as f:
+        buildings = json.load(f)['buildings']
+    with open(os.path.join(DATA_DIR, 'streets.json')) as f:
+        streets_data = json.load(f)['streets']
+    streets_by_key = index_streets(streets_data)
+    address_index = build_address_index(buildings)
+    buildings_by_id = {b['id']: b for b in buildings}
+
+    # Per-street inputs; images sorted by filename (walking order) and
+    # limited to those that actually exist on disk
+    jobs = []
+    for wiki_street, addr_pattern in WIKI_TO_ADDR.items():
+        imgs = sorted(
+            [a for a in attrs if a['street'] == wiki_street
+             and os.path.exists(a['file'].lstrip('/'))],
+            key=lambda a: a['file']
+        )
+        street_bldgs = [buildings_by_id[bid]
+                        for bid in address_index['streets'].get(street_key(addr_pattern), [])
+                        if buildings_by_id[bid].get('position')]
+        jobs.append((wiki_street, imgs, street_bldgs,
+                     streets_by_key.get(street_key(addr_pattern), [])))
+
+    # ============================================================
+    # Run matching
+    # ============================================================
+    print("Facade Matching Results")
+    print("=" * 60)
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor() as pool:
+        futures = [pool.submit(match_street, *job) for job in jobs]
+        street_results = [fut.result() for fut in futures]
+    wall = time.perf_counter() - t0
+
+    all_results = {}
+    total_imgs = total_matched = total_high = 0
+    for (wiki_street, imgs, _, _), (_, results, seconds) in zip(jobs, street_results):
+        print_street_summary(wiki_street, len(imgs), results, seconds)
+        total_imgs += len(imgs)
+        total_matched += len(results)
+        total_high += sum(1 for r in results.values() if r['confidence'] >= 0.7)
+        all_results.update(results)
+
+    print(f"\n{'=' * 60}")
+    print(f"TOTAL: {total_imgs} images, {total_matched} matched, {total_high} high-confidence "
+          f"({wall:.2f}s wall, {sum(r[2] for r in street_results):.2f}s matching)")
+
+    # ============================================================
+    # Front edges for every building, from street geometry
+    # ============================================================
+    t0 = time.perf_counter()
+    front_edges = compute_front_edges(buildings, streets_by_key)
+    with open(os.path.join(DATA_DIR, 'front_edges.json'), 'w') as f:
+        json.dump(front_edges, f, separators=(',', ':'))
+    print(f"\nWritten {len(front_edges)} front edges to {DATA_DIR}/front_edges.json "
+          f"({time.perf_counter() - t0:.2f}s)")
+
+    # ============================================================
+    # Build facade_mapping.json with front edge geometry
+    # ============================================================
+    by_id = {b['id']: b for b in buildings}
+    facade_mapping = {}
+
+    for bid, match in all_results.items():
+        bldg = by_id.get(bid)
+        edge = front_edges.get(bid)
+        if not bldg or not edge:
+            continue
+
+        facade_mapping[bid] = {
+            'image': match['image'],
+            'confidence': match['confidence'],
+            'description': match['description'],
+            'wall_height': bldg.get('size', [0, 0, 0])[1],
+            'front_edge': edge,
+        }
+
+    with open(os.path.join(DATA_DIR, 'facade_mapping.json'), 'w') as f:
+        json.dump(facade_mapping, f, indent=2)
+
+    print(f"\nWritten {len(facade_mapping)} entries to {DATA_DIR}/facade_mapping.json")
+
 
-print(f"\nWritten {len(facade_mapping)} entries to src/data/facade_mapping.json")
+if __name__ == '__main__':
+    with span('match_facades', cat='stage'):
+        main()
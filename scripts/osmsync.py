@@ -0,0 +1,168 @@
+"""
+Incremental Overpass sync for the raw OSM stores.
+
+A full fetch (out meta) records, per store, the Overpass data timestamp
+and the version of every matched element. A sync then sends one request
+so that both halves see the same database snapshot:
+
+  (filters(bbox);); out ids;                         every current id -> deletions
+  node(newer:"T")(bbox)->.moved;
+  (filters(newer:"T")(bbox); way(bn.moved)filters;); out meta; >; out skel qt;
+
+The second half returns elements edited since T plus ways whose nodes
+moved (their version is unchanged but their geometry is not), with the
+node coordinates needed to rebuild them. Element keys are 'way/123' /
+'node/456', as in OSM URLs.
+
+State lives in raw/osm_sync.json. Downstream stages find what changed
+themselves (11-merge-all diffs record digests against its last run), so no
+list of touched keys is kept.
+"""
+import json
+import os
+
+from config import FETCH_BBOX, RAW_DIR
+
+STATE_PATH = os.path.join(RAW_DIR, 'osm_sync.json')
+
+# Overpass bbox format: (min_lat, min_lon, max_lat, max_lon)
+OVERPASS_BBOX = (f"{FETCH_BBOX['min_lat']},{FETCH_BBOX['min_lon']},"
+                 f"{FETCH_BBOX['max_lat']},{FETCH_BBOX['max_lon']}")
+
+
+class SyncError(Exception):
+    """The Overpass response cannot be trusted for a sync (failed or partial)."""
+
+
+def element_key(el):
+    return f"{el['type']}/{el['id']}"
+
+
+def full_query(filters):
+    """Query for a full fetch: every matching element with its version."""
+    body = ''.join(f'{f}({OVERPASS_BBOX});' for f in filters)
+    return f'({body});out meta;>;out skel qt;'
+
+
+def sync_query(filters, since):
+    """Query for the ids of every match plus everything changed after `since`."""
+    current = ''.join(f'{f}({OVERPASS_BBOX});' for f in filters)
+    changed = ''.join(f'{f}(newer:"{since}")({OVERPASS_BBOX});' for f in filters)
+    moved = ''.join(f'way(bn.moved){f[len("way"):]};' for f in filters if f.startswith('way'))
+    return (f'({current});out ids;'
+            f'node(newer:"{since}")({OVERPASS_BBOX})->.moved;'
+            f'({changed}{moved});out meta;>;out skel qt;')
+
+
+def ids_query(keys):
+    """Query for specific elements (by key) with their geometry."""
+    by_type = {}
+    for key in keys:
+        kind, osm_id = key.split('/')
+        by_type.setdefault(kind, []).append(osm_id)
+    body = ''.join(f'{kind}(id:{",".join(ids)});' for kind, ids in sorted(by_type.items()))
+    return f'({body});out meta;>;out skel qt;'
+
+
+def checked(data):
+    """The response's data timestamp; raises SyncError on a failed or partial response."""
+    remark = data.get('remark', '')
+    if 'error' in remark.lower():
+        raise SyncError(f'Overpass: {remark}')
+    timestamp = data.get('osm3s', {}).get('timestamp_osm_base')
+    if not timestamp:
+        raise SyncError('Overpass response has no osm3s timestamp (request failed?)')
+    return timestamp
+
+
+def versions_of(elements):
+    """Versions of the matched (out meta) elements; recursed-down nodes carry none."""
+    return {element_key(el): el['version'] for el in elements if 'version' in el}
+
+
+def full_entry(data):
+    """Sync state for a store after a full fetch."""
+    return {'timestamp': checked(data), 'versions': versions_of(data.get('elements', []))}
+
+
+def fetch_changes(query_fn, filters, entry):
+    """
+    Changes to a store since its state entry.
+
+    query_fn sends an Overpass QL body and returns the parsed JSON.
+    Returns {'timestamp', 'elements', 'created', 'modified', 'deleted',
+    'versions'}: elements are the changed elements plus node geometry, in
+    the shape a full fetch returns, ready for the stage's parser.
+    """
+    data = query_fn(sync_query(filters, entry['timestamp']))
+    timestamp = checked(data)
+
+    current, elements = set(), []
+    for el in data.get('elements', []):
+        # out ids prints bare {type, id}; everything else is the change set
+        if el.keys() == {'type', 'id'}:
+            current.add(element_key(el))
+        else:
+            elements.append(el)
+    # way(bn.moved) is not bbox-limited: drop ways that do not match
+    elements = [el for el in elements if 'version' not in el or element_key(el) in current]
+
+    versions = versions_of(elements)
+    known = entry['versions']
+    # Matches the state never saw and the newer query did not return
+    # (e.g. a way that entered the bbox without an edit of its own)
+    missing = current - set(known) - set(versions)
+    if missing:
+        extra = query_fn(ids_query(sorted(missing)))
+        checked(extra)
+        elements.extend(extra.get('elements', []))
+        versions.update(versions_of(extra.get('elements', [])))
+
+    changed = set(versions) & current
+    return {
+        'timestamp': timestamp,
+        'elements': elements,
+        'created': sorted(k for k in changed if k not in known),
+        'modified': sorted(k for k in changed if k in known),
+        'deleted': sorted(set(known) - current),
+        'versions': versions,
+    }
+
+
+def apply_changes(entry, changes):
+    """Advance a store's state entry past a set of changes."""
+    entry['timestamp'] = changes['timestamp']
+    for key in changes['deleted']:
+        entry['versions'].pop(key, None)
+    for key in changes['created'] + changes['modified']:
+        entry['versions'][key] = changes['versions'][key]
+
+
+def patch(records, replacements, deleted, key):
+    """
+    Records with `deleted` keys dropped and `replacements` swapped in.
+
+    Replaced records keep their position; new ones are appended.
+    """
+    new = {key(r): r for r in replacements}
+    gone = set(deleted)
+    out = []
+    for r in records:
+        k = key(r)
+        if k in gone:
+            continue
+        out.append(new.pop(k, r))
+    out.extend(new.values())
+    return out
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(STATE_PATH, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
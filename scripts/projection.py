@@ -0,0 +1,131 @@
+"""
+WGS84 <-> local meters for the pipeline, on whole geometries at once.
+
+Local coordinates are [x, z] meters from the region center, x east and
+z south (+). A region picks its mode in the registry (regions.py):
+
+  equirectangular   x = (lon - center_lon) * lon_to_meters, likewise z; the
+                    frontend's projection, exact to the bit with the
+                    original per-point wgs84_to_local. The default.
+  tangent           East/south on the plane tangent to the WGS84 ellipsoid
+                    at the center (ECEF -> ENU). No scale drift across
+                    the region; for extents where one lon_to_meters is off.
+
+    tf = for_region('lafayette-square')          # cached per region
+    x, z = to_local(tf, lons, lats)              # arrays (or scalars)
+    xz = to_local_points(tf, ring)               # (N, 2) [lon, lat] -> (N, 2)
+    flat = to_local_flat(tf, buf)                # [lon0, lat0, lon1, ...] -> [x0, z0, ...]
+    lon, lat = to_wgs84(tf, x, z)
+
+Results are float64 arrays; call .tolist() before round() when writing JSON
+so rounding stays Python's (NumPy rounds float64 slightly differently).
+"""
+import functools
+
+import numpy as np
+
+from regions import get_region
+
+WGS84_A = 6378137.0                 # meters — semi-major axis
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)  # first eccentricity squared
+
+MODES = ('equirectangular', 'tangent')
+INVERSE_ITERATIONS = 3   # tangent to_wgs84 refinements; error is well below 1 mm after two
+
+
+def _ecef(lon, lat):
+    """Earth-centered coordinates (3, N) of points on the ellipsoid surface."""
+    lam, phi = np.radians(lon), np.radians(lat)
+    sin_phi = np.sin(phi)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+    return np.stack([n * np.cos(phi) * np.cos(lam),
+                     n * np.cos(phi) * np.sin(lam),
+                     n * (1 - WGS84_E2) * sin_phi])
+
+
+def make_transform(center_lon, center_lat, lon_to_meters=None, lat_to_meters=None,
+                   mode='equirectangular'):
+    """
+    Transform for a projection frame. Equirectangular needs the two scale
+    constants; tangent derives its own (used as the to_wgs84 first guess).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown projection mode {mode!r}; known modes: {', '.join(MODES)}")
+    tf = {'mode': mode, 'center_lon': float(center_lon), 'center_lat': float(center_lat)}
+    if mode == 'equirectangular':
+        tf.update(lon_to_meters=lon_to_meters, lat_to_meters=lat_to_meters)
+        return tf
+
+    lam, phi = np.radians(center_lon), np.radians(center_lat)
+    w = 1 - WGS84_E2 * np.sin(phi) ** 2
+    tf.update(
+        # Meridian and prime-vertical radii at the center, per degree
+        lat_to_meters=float(WGS84_A * (1 - WGS84_E2) / w ** 1.5 * np.pi / 180),
+        lon_to_meters=float(WGS84_A / np.sqrt(w) * np.cos(phi) * np.pi / 180),
+        origin=_ecef(np.float64(center_lon), np.float64(center_lat)).reshape(3, 1),
+        # Rows: east and south unit vectors in ECEF
+        rotation=np.array([
+            [-np.sin(lam), np.cos(lam), 0.0],
+            [np.sin(phi) * np.cos(lam), np.sin(phi) * np.sin(lam), -np.cos(phi)],
+        ]),
+    )
+    return tf
+
+
+@functools.lru_cache(maxsize=None)
+def for_region(name):
+    """The (cached) transform of a registry region."""
+    region = get_region(name)
+    return make_transform(region['center_lon'], region['center_lat'], region['lon_to_meters'],
+                          region['lat_to_meters'], region['projection'])
+
+
+def to_local(tf, lon, lat):
+    """Local (x, z) of lon/lat arrays (any matching shapes); floats for scalars."""
+    if tf['mode'] == 'equirectangular' and isinstance(lon, (int, float)) and isinstance(lat, (int, float)):
+        # Single points (per-record fallbacks) skip the NumPy call overhead
+        return ((lon - tf['center_lon']) * tf['lon_to_meters'],
+                (tf['center_lat'] - lat) * tf['lat_to_meters'])
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    if tf['mode'] == 'equirectangular':
+        x = (lon - tf['center_lon']) * tf['lon_to_meters']
+        z = (tf['center_lat'] - lat) * tf['lat_to_meters']  # Z = south (+)
+    else:
+        lon, lat = np.broadcast_arrays(lon, lat)
+        d = _ecef(lon.reshape(-1), lat.reshape(-1)) - tf['origin']
+        east, south = tf['rotation'] @ d
+        x, z = east.reshape(lon.shape), south.reshape(lon.shape)
+    if x.ndim == 0:
+        return float(x), float(z)
+    return x, z
+
+
+def to_local_points(tf, points):
+    """(N, 2) local [x, z] of (N, 2) [lon, lat] points (lists, tuples or arrays)."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x, z = to_local(tf, pts[:, 0], pts[:, 1])
+    return np.column_stack([x, z])
+
+
+def to_local_flat(tf, buf):
+    """Interleaved [x0, z0, x1, ...] of an interleaved [lon0, lat0, lon1, ...] buffer."""
+    return to_local_points(tf, np.asarray(buf, dtype=np.float64)).reshape(-1)
+
+
+def to_wgs84(tf, x, z):
+    """Inverse of to_local: (lon, lat) of local x/z arrays; floats for scalars."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    lon = tf['center_lon'] + x / tf['lon_to_meters']
+    lat = tf['center_lat'] - z / tf['lat_to_meters']
+    if tf['mode'] == 'tangent':
+        # Newton steps with the center's scales as the Jacobian
+        for _ in range(INVERSE_ITERATIONS):
+            fx, fz = to_local(tf, lon, lat)
+            lon = lon + (x - fx) / tf['lon_to_meters']
+            lat = lat - (z - fz) / tf['lat_to_meters']
+    if lon.ndim == 0:
+        return float(lon), float(lat)
+    return lon, lat
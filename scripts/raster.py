@@ -0,0 +1,123 @@
+"""
+NumPy polygon rasterization shared by the baking stages.
+
+Polygons are given in pixel coordinates (x right, y down) and sampled at
+pixel centers. Every polygon is normalized to the same winding before being
+scan-converted, so a single nonzero-winding pass yields the union of any
+number of (possibly overlapping) shapes.
+"""
+import math
+
+import numpy as np
+
+
+def world_to_px(points, min_x, min_z, cell):
+    """Local [x, z] meters -> pixel coords of a grid whose row 0 is min_z."""
+    pts = np.asarray(points, dtype=np.float64)
+    return np.column_stack(((pts[:, 0] - min_x) / cell, (pts[:, 1] - min_z) / cell))
+
+
+def signed_area(pts):
+    """Shoelace signed area of an (N, 2) array."""
+    x, y = pts[:, 0], pts[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _polygon_edges(polys):
+    """
+    Stack the edges of all polygons, normalized to positive winding.
+
+    Entries may be single (N, 2) polygons or (K, N, 2) batches of same-sized
+    polygons, which are oriented in one vectorized step.
+    """
+    starts, ends = [], []
+    for poly in polys:
+        pts = np.array(poly, dtype=np.float64)  # copy: reoriented in place
+        if pts.ndim == 2:
+            pts = pts[None]
+        if pts.shape[1] < 3:
+            continue
+        nxt = np.roll(pts, -1, axis=1)
+        area = (pts[..., 0] * nxt[..., 1] - nxt[..., 0] * pts[..., 1]).sum(axis=1)
+        flip = area < 0
+        pts[flip] = pts[flip, ::-1]
+        starts.append(pts.reshape(-1, 2))
+        ends.append(np.roll(pts, -1, axis=1).reshape(-1, 2))
+    if not starts:
+        return np.empty((0, 2)), np.empty((0, 2))
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def rasterize_polygons(polys, width, height):
+    """
+    Union of polygons as a (height, width) bool mask.
+
+    Each non-horizontal edge contributes a +-1 winding step at the first pixel
+    center right of its crossing on every scanline it spans; a cumulative sum
+    along the row then gives the winding number of every pixel.
+    """
+    p0, p1 = _polygon_edges(polys)
+    mask = np.zeros((height, width), dtype=bool)
+    if len(p0) == 0:
+        return mask
+
+    x0, y0 = p0[:, 0], p0[:, 1]
+    x1, y1 = p1[:, 0], p1[:, 1]
+    keep = y0 != y1
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+
+    # Scanline centers r + 0.5 with min(y) <= r + 0.5 < max(y)
+    ylo = np.minimum(y0, y1)
+    yhi = np.maximum(y0, y1)
+    r_start = np.clip(np.ceil(ylo - 0.5), 0, height).astype(np.int64)
+    r_end = np.clip(np.ceil(yhi - 0.5), 0, height).astype(np.int64)
+    counts = np.maximum(r_end - r_start, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return mask
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    rows = r_start[edge] + (np.arange(total) - first)
+
+    t = (rows + 0.5 - y0[edge]) / (y1[edge] - y0[edge])
+    xi = x0[edge] + t * (x1[edge] - x0[edge])
+    cols = np.clip(np.ceil(xi - 0.5), 0, width).astype(np.int64)
+    step = np.where(y1[edge] > y0[edge], 1, -1).astype(np.int32)
+
+    diff = np.zeros((height, width + 1), dtype=np.int32)
+    np.add.at(diff, (rows, cols), step)
+    mask[:] = np.cumsum(diff, axis=1)[:, :width] != 0
+    return mask
+
+
+def rasterize_coverage(polys, width, height, supersample=4):
+    """Antialiased coverage (0..1 float32) by box-filtering a supersampled mask."""
+    s = supersample
+    scaled = [np.asarray(p, dtype=np.float64) * s for p in polys]
+    mask = rasterize_polygons(scaled, width * s, height * s)
+    return mask.reshape(height, s, width, s).mean(axis=(1, 3), dtype=np.float32)
+
+
+def stroke_polyline(points, half_width, round_segments=8):
+    """
+    Polygons covering a polyline stroked to 2 * half_width.
+
+    Returns one quad per segment plus a round cap/join polygon per vertex;
+    rasterize them together to get the stroked outline.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    polys = []
+    for a, b in zip(pts[:-1], pts[1:]):
+        d = b - a
+        length = math.hypot(d[0], d[1])
+        if length == 0:
+            continue
+        n = np.array([-d[1], d[0]]) / length * half_width
+        polys.append(np.array([a + n, b + n, b - n, a - n]))
+
+    angles = np.linspace(0, 2 * math.pi, round_segments, endpoint=False)
+    circle = np.column_stack((np.cos(angles), np.sin(angles))) * half_width
+    for p in pts:
+        polys.append(circle + p)
+    return polys
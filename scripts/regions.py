@@ -0,0 +1,149 @@
+"""
+Registry of the neighbourhoods the pipeline can build.
+
+Each region has a projection frame (center and meters-per-degree constants),
+a bounding box and an output namespace. config.py reads the region named by
+LSQ_REGION (default: lafayette-square) and every stage takes its constants
+and directories from there:
+
+  DATA_DIR        src/data[/regions/<namespace>]
+  PUBLIC_DIR      public[/regions/<namespace>]
+  RAW_DIR         scripts/raw[/<raw cache>]       shared fetch cache
+  REGION_RAW_DIR  RAW_DIR[/<name>]                raw files derived from this
+                                                  region's own buildings
+
+Regions whose bboxes overlap and whose frames are identical share one raw
+cache (local coordinates in raw files depend on the frame). Fetch stages
+request the union of the bboxes sharing the cache (FETCH_BBOX), so one fetch
+serves every region in it. The cache is named after the first region of the
+group in registry order, so it does not depend on which regions are built
+together. The lafayette-square namespace is empty: its outputs stay where
+the frontend reads them.
+
+To add a neighbourhood, add an entry below; lon_to_meters / lat_to_meters
+may be omitted and are then derived from the center latitude. 'projection'
+is 'equirectangular' (the default, and what the frontend assumes) or
+'tangent' for an ellipsoid tangent plane at the center (see projection.py).
+
+A region's base buildings.json and landmarks.json are not fetched: the
+default region's are maintained by hand. A new region either gets its own
+in DATA_DIR before building, or names a 'seed_from' region with the same
+frame whose files 09-seed-region.py clips to its bbox.
+"""
+import math
+import os
+
+DEFAULT_REGION = 'lafayette-square'
+
+REGIONS = {
+    'lafayette-square': {
+        'title': 'Lafayette Square',
+        # Lafayette Park center (actual park centroid from OSM)
+        'center_lat': 38.6160,
+        'center_lon': -90.2161,
+        # N: Chouteau Ave, S: I-44, W: Jefferson Ave, E: Dolman St
+        'bbox': {'min_lat': 38.6090, 'max_lat': 38.6250, 'min_lon': -90.2210, 'max_lon': -90.2070},
+        'lon_to_meters': 86774,
+        'lat_to_meters': 111000,
+        'namespace': '',
+    },
+    'lafayette-park': {
+        'title': 'Lafayette Park',
+        # The park alone, in the Lafayette Square frame (shares its raw cache);
+        # buildings and landmarks clipped from Lafayette Square's
+        'center_lat': 38.6160,
+        'center_lon': -90.2161,
+        'bbox': {'min_lat': 38.6144, 'max_lat': 38.6176, 'min_lon': -90.2181, 'max_lon': -90.2141},
+        'lon_to_meters': 86774,
+        'lat_to_meters': 111000,
+        'namespace': 'lafayette-park',
+        'seed_from': 'lafayette-square',
+    },
+}
+
+EARTH_METERS_PER_DEGREE = 111320.0  # meters — one degree of latitude (and of longitude at the equator)
+
+
+def get_region(name):
+    """The registry entry for name, with projection constants filled in."""
+    if name not in REGIONS:
+        raise ValueError(f"Unknown region {name!r}; known regions: {', '.join(sorted(REGIONS))}")
+    region = dict(REGIONS[name], name=name)
+    region.setdefault('lat_to_meters', EARTH_METERS_PER_DEGREE)
+    region.setdefault('lon_to_meters',
+                      EARTH_METERS_PER_DEGREE * math.cos(math.radians(region['center_lat'])))
+    region.setdefault('namespace', name)
+    region.setdefault('projection', 'equirectangular')
+    return region
+
+
+def frame(region):
+    """The projection frame: regions with equal frames have compatible local coords."""
+    return (region['center_lat'], region['center_lon'],
+            region['lon_to_meters'], region['lat_to_meters'], region['projection'])
+
+
+def overlaps(a, b):
+    """True if two bboxes share any area."""
+    return (a['min_lat'] < b['max_lat'] and b['min_lat'] < a['max_lat']
+            and a['min_lon'] < b['max_lon'] and b['min_lon'] < a['max_lon'])
+
+
+def union_bbox(bboxes):
+    return {
+        'min_lat': min(b['min_lat'] for b in bboxes), 'max_lat': max(b['max_lat'] for b in bboxes),
+        'min_lon': min(b['min_lon'] for b in bboxes), 'max_lon': max(b['max_lon'] for b in bboxes),
+    }
+
+
+def raw_groups():
+    """
+    Regions grouped by shared raw cache, over the whole registry: connected
+    components of 'bboxes overlap and frames are equal', in registry order.
+    """
+    regions = [get_region(name) for name in REGIONS]
+    parent = list(range(len(regions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, a in enumerate(regions):
+        for j in range(i + 1, len(regions)):
+            b = regions[j]
+            if frame(a) == frame(b) and overlaps(a['bbox'], b['bbox']):
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for i, region in enumerate(regions):
+        groups.setdefault(find(i), []).append(region['name'])
+    return list(groups.values())
+
+
+def raw_group(name):
+    """Names of the regions sharing name's raw cache (name included), first one owning it."""
+    return next(group for group in raw_groups() if name in group)
+
+
+def region_paths(name, scripts_dir, project_dir):
+    """
+    Output directories and fetch bbox for a region:
+    {'data', 'public', 'raw', 'region_raw', 'fetch_bbox'}.
+    """
+    region = get_region(name)
+    group = raw_group(name)
+    owner = get_region(group[0])
+    raw = (os.path.join(scripts_dir, 'raw', owner['namespace']) if owner['namespace']
+           else os.path.join(scripts_dir, 'raw'))
+    ns = region['namespace']
+    return {
+        'data': os.path.join(project_dir, 'src', 'data', 'regions', ns) if ns
+        else os.path.join(project_dir, 'src', 'data'),
+        'public': os.path.join(project_dir, 'public', 'regions', ns) if ns
+        else os.path.join(project_dir, 'public'),
+        'raw': raw,
+        'region_raw': raw if name == group[0] else os.path.join(raw, name),
+        'fetch_bbox': union_bbox([get_region(n)['bbox'] for n in group]),
+    }
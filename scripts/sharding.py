@@ -0,0 +1,81 @@
+"""
+Tile-sharded execution for the matching stages.
+
+The area is cut into square tiles of TILE_SIZE meters. Every item being
+matched (a building) is owned by exactly one tile: the one containing its
+anchor point (centroid, or front edge midpoint), with half-open tile bounds
+so a point on a tile edge has one owner. A tile's job gets its owned items
+plus every record whose extent reaches the tile grown by a halo; records in
+a halo are copied into each neighbouring tile that needs them, read-only.
+With the halo at least the largest match radius, each item sees every
+record it could match, in the original order, so its result equals the
+single-process one; results are put back in item order.
+
+    jobs = shard(anchors, [(rec_lo, rec_hi, HALO)], TILE_SIZE)
+    for result in run(match_tile, [args_for(job) for job in jobs], workers):
+        ...
+
+Records with NaN coordinates (unlocated) are never copied to any tile.
+"""
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TILE_SIZE = 500.0   # meters — tile edge; thousands of buildings per tile citywide
+HALO = 30.0         # meters — largest match radius (parcels in 11, images in 10)
+
+
+def tile_keys(xy, tile_size):
+    """Integer (i, j) tile of each point, (N, 2)."""
+    return np.floor(np.asarray(xy, dtype=np.float64).reshape(-1, 2) / tile_size).astype(np.int64)
+
+
+def shard(anchors, sources, tile_size=TILE_SIZE):
+    """
+    Partition items by tile and gather the records each tile needs.
+
+    anchors: (N, 2) item anchor points. sources: list of (lo, hi, halo) with
+    lo/hi (M, 2) record extents (lo == hi for points). Returns a list of
+    (owned item indices, [record indices per source]) for the non-empty
+    tiles, indices ascending.
+    """
+    anchors = np.asarray(anchors, dtype=np.float64).reshape(-1, 2)
+    keys = tile_keys(anchors, tile_size)
+    if not len(keys):
+        return []
+    tiles, owner = np.unique(keys, axis=0, return_inverse=True)
+    owner = owner.reshape(-1)
+    by_tile = np.argsort(owner, kind='stable')
+    starts = np.searchsorted(owner[by_tile], np.arange(len(tiles) + 1))
+
+    jobs = []
+    for t, (i, j) in enumerate(tiles):
+        box_lo = np.array([i, j], dtype=np.float64) * tile_size
+        box_hi = box_lo + tile_size
+        picked = []
+        for lo, hi, halo in sources:
+            lo = np.asarray(lo, dtype=np.float64).reshape(-1, 2)
+            hi = np.asarray(hi, dtype=np.float64).reshape(-1, 2)
+            # NaN compares False, so unlocated records are never picked
+            reach = ((hi >= box_lo - halo) & (lo <= box_hi + halo)).all(axis=1)
+            picked.append(np.flatnonzero(reach))
+        jobs.append((by_tile[starts[t]:starts[t + 1]], picked))
+    return jobs
+
+
+def _quiet(fn, args):
+    # Tile jobs reuse the stage's matching functions; keep their progress
+    # output out of the parent's log
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return fn(*args)
+
+
+def run(fn, jobs, workers=None):
+    """fn(*args) for every args tuple in jobs, in a process pool; results in job order."""
+    if workers == 1 or len(jobs) <= 1:
+        return [_quiet(fn, args) for args in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_quiet, fn, args) for args in jobs]
+        return [fut.result() for fut in futures]
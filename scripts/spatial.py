@@ -0,0 +1,194 @@
+"""
+Uniform-grid index over 2-D line segments with batched nearest queries.
+
+Segments are bucketed into every grid cell their bounding box touches and
+stored in CSR form (cell_start / seg_ids sorted by cell), so a query for N
+points (or N boxes) gathers all candidate pairs from the touched cells at
+once and reduces them in NumPy. Coordinates are local meters [x, z].
+"""
+import numpy as np
+
+
+def polyline_segments(polylines):
+    """
+    Flatten polylines into segment arrays.
+
+    Returns (a (S, 2), b (S, 2), owner (S,)) where owner is the index of the
+    polyline each segment came from.
+    """
+    a, b, owner = [], [], []
+    for i, pts in enumerate(polylines):
+        pts = np.asarray(pts, dtype=np.float64)
+        if len(pts) < 2:
+            continue
+        a.append(pts[:-1])
+        b.append(pts[1:])
+        owner.append(np.full(len(pts) - 1, i))
+    if not a:
+        return np.empty((0, 2)), np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    return np.concatenate(a), np.concatenate(b), np.concatenate(owner)
+
+
+def segment_index(a, b, cell_size=25.0):
+    """Build a grid index over segments a[i] -> b[i]."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 2)
+    index = {'a': a, 'b': b, 'cell': float(cell_size)}
+    if len(a) == 0:
+        index.update(origin=np.zeros(2), shape=(0, 0),
+                     cell_start=np.zeros(1, dtype=np.int64),
+                     seg_ids=np.empty(0, dtype=np.int64))
+        return index
+
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+    origin = lo.min(axis=0)
+    c0 = np.floor((lo - origin) / cell_size).astype(np.int64)
+    c1 = np.floor((hi - origin) / cell_size).astype(np.int64)
+    shape = tuple(int(v) + 1 for v in c1.max(axis=0))
+
+    # Expand every segment to the cells of its bounding box
+    span = c1 - c0 + 1
+    counts = span[:, 0] * span[:, 1]
+    seg = np.repeat(np.arange(len(a)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = c0[seg, 0] + k // span[seg, 1]
+    cz = c0[seg, 1] + k % span[seg, 1]
+    key = cx * shape[1] + cz
+
+    order = np.argsort(key, kind='stable')
+    key, seg = key[order], seg[order]
+    cell_start = np.searchsorted(key, np.arange(shape[0] * shape[1] + 1))
+    index.update(origin=origin, shape=shape, cell_start=cell_start, seg_ids=seg)
+    return index
+
+
+def point_segment_distance(p, a, b):
+    """
+    Distance from points p to segments a -> b (all (N, 2), paired row-wise).
+
+    Returns (dist, t, closest) with t the clamped parameter along the segment.
+    """
+    d = b - a
+    len2 = (d * d).sum(axis=1)
+    t = ((p - a) * d).sum(axis=1) / np.where(len2 > 0, len2, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    closest = a + d * t[:, None]
+    return np.hypot(*(p - closest).T), t, closest
+
+
+def _nearest_brute(index, points):
+    """Exact nearest segment for each point against every segment."""
+    n = len(points)
+    best = np.full(n, -1, dtype=np.int64)
+    best_d = np.full(n, np.inf)
+    a, b = index['a'], index['b']
+    chunk = max(1, 2_000_000 // max(1, len(a)))
+    for s in range(0, n, chunk):
+        p = points[s:s + chunk]
+        pp = np.repeat(p, len(a), axis=0)
+        d, _, _ = point_segment_distance(pp, np.tile(a, (len(p), 1)), np.tile(b, (len(p), 1)))
+        d = d.reshape(len(p), len(a))
+        best[s:s + chunk] = d.argmin(axis=1)
+        best_d[s:s + chunk] = d.min(axis=1)
+    return best, best_d
+
+
+def nearest_segment(index, points):
+    """
+    Nearest indexed segment to each of N points.
+
+    Returns (seg (N,), dist (N,), closest (N, 2)); seg is -1 only when the
+    index is empty. Points whose nearest candidate in the 3x3 neighbourhood
+    lies beyond one cell (so a closer segment could sit outside it) are
+    resolved by an exact scan.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    seg = np.full(n, -1, dtype=np.int64)
+    dist = np.full(n, np.inf)
+    closest = np.full((n, 2), np.nan)
+    if n == 0 or len(index['a']) == 0:
+        return seg, dist, closest
+
+    cell = index['cell']
+    nx, nz = index['shape']
+    pc = np.floor((points - index['origin']) / cell).astype(np.int64)
+
+    # Candidate (point, segment) pairs from the 3x3 neighbourhood
+    offsets = np.array([(dx, dz) for dx in (-1, 0, 1) for dz in (-1, 0, 1)])
+    cells = pc[:, None, :] + offsets[None, :, :]
+    valid = ((cells[..., 0] >= 0) & (cells[..., 0] < nx)
+             & (cells[..., 1] >= 0) & (cells[..., 1] < nz))
+    pt = np.broadcast_to(np.arange(n)[:, None], valid.shape)[valid]
+    key = cells[valid][:, 0] * nz + cells[valid][:, 1]
+    start = index['cell_start'][key]
+    count = index['cell_start'][key + 1] - start
+    pair_pt = np.repeat(pt, count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    pair_seg = index['seg_ids'][np.repeat(start, count) + k]
+
+    if len(pair_pt):
+        d, _, _ = point_segment_distance(points[pair_pt], index['a'][pair_seg],
+                                         index['b'][pair_seg])
+        # Per point, the closest candidate (lowest segment id on ties)
+        order = np.lexsort((pair_seg, d, pair_pt))
+        pair_pt, pair_seg, d = pair_pt[order], pair_seg[order], d[order]
+        first = np.r_[True, pair_pt[1:] != pair_pt[:-1]]
+        seg[pair_pt[first]] = pair_seg[first]
+        dist[pair_pt[first]] = d[first]
+
+    far = dist > cell
+    if far.any():
+        seg[far], dist[far] = _nearest_brute(index, points[far])
+
+    _, _, closest = point_segment_distance(points, index['a'][seg], index['b'][seg])
+    return seg, dist, closest
+
+
+def query_boxes(index, lo, hi):
+    """
+    Candidate segments for N axis-aligned query boxes lo[i]..hi[i].
+
+    Returns (query (P,), seg (P,)) pairs — every indexed segment sharing a
+    grid cell with its box, each pair listed once. Callers apply the exact
+    geometric test.
+    """
+    lo = np.asarray(lo, dtype=np.float64).reshape(-1, 2)
+    hi = np.asarray(hi, dtype=np.float64).reshape(-1, 2)
+    empty = np.empty(0, dtype=np.int64)
+    if len(lo) == 0 or len(index['a']) == 0:
+        return empty, empty
+
+    cell = index['cell']
+    nx, nz = index['shape']
+    c0 = np.clip(np.floor((lo - index['origin']) / cell).astype(np.int64), 0, [nx - 1, nz - 1])
+    c1 = np.clip(np.floor((hi - index['origin']) / cell).astype(np.int64), 0, [nx - 1, nz - 1])
+    inside = ((hi >= index['origin']).all(axis=1)
+              & (lo < index['origin'] + cell * np.array([nx, nz])).all(axis=1))
+
+    span = np.where(inside[:, None], c1 - c0 + 1, 0)
+    counts = span[:, 0] * span[:, 1]
+    query = np.repeat(np.arange(len(lo)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    key = (c0[query, 0] + k // span[query, 1]) * nz + c0[query, 1] + k % span[query, 1]
+
+    start = index['cell_start'][key]
+    count = index['cell_start'][key + 1] - start
+    query = np.repeat(query, count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    seg = index['seg_ids'][np.repeat(start, count) + k]
+
+    # A segment spanning several cells of the same box is listed once
+    pair = np.unique(query * len(index['a']) + seg)
+    return pair // len(index['a']), pair % len(index['a'])
+
+
+def segments_cross(p1, p2, q1, q2):
+    """Row-wise proper intersection of segments p1->p2 and q1->q2 (touching excluded)."""
+    def orient(a, b, c):
+        return np.sign((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+                       - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+
+    return ((orient(p1, p2, q1) * orient(p1, p2, q2) < 0)
+            & (orient(q1, q2, p1) * orient(q1, q2, p2) < 0))
@@ -0,0 +1,90 @@
+"""
+Trigram inverted index for fuzzy name matching.
+
+Names are normalised (case, accents, '&' -> 'and', punctuation, legal
+suffixes like LLC) into tokens, and each token contributes its padded
+character trigrams. A query only touches the posting lists of its own
+trigrams, so candidate retrieval cost depends on how many names share
+trigrams with the query, not on the total number of names.
+
+Similarity weights Jaccard overlap 3:1 over containment (overlap over the
+smaller trigram set). Containment lets "Square One Brewery" score 0.76
+against "Square One Brewery & Distillery", but a short name wholly inside a
+longer one ("Park" in "Lafayette Park", 0.50) stays below the usual 0.6
+threshold because Jaccard dominates. Callers wanting exact matches to win
+outright compare normalize_name() keys first.
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+STOPWORDS = {'the', 'and', 'of', 'at', 'llc', 'inc', 'co', 'corp', 'company', 'ltd', 'lp', 'trust'}
+JACCARD_WEIGHT = 0.75   # rest of the similarity is containment
+
+
+def normalize_tokens(text):
+    """'The Square One Brewery & Distillery, LLC' -> ['square', 'one', 'brewery', 'distillery']."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace('&', ' and ').replace("'", '')
+    tokens = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+def normalize_name(text):
+    """Exact-match key: 'The Square One Brewery, LLC' -> 'square one brewery'."""
+    return ' '.join(normalize_tokens(text))
+
+
+def trigrams(text):
+    """Set of padded character trigrams over the normalised tokens."""
+    grams = set()
+    for tok in normalize_tokens(text):
+        padded = f'  {tok} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def build_trigram_index(names):
+    """
+    Index a list of names (position = document id).
+
+    Returns a dict with 'postings' {trigram: sorted int array of ids} and
+    'sizes' (trigram count per id).
+    """
+    postings = {}
+    sizes = np.zeros(len(names), dtype=np.int64)
+    for i, name in enumerate(names):
+        grams = trigrams(name)
+        sizes[i] = len(grams)
+        for g in grams:
+            postings.setdefault(g, []).append(i)
+    return {
+        'postings': {g: np.array(ids, dtype=np.int64) for g, ids in postings.items()},
+        'sizes': sizes,
+    }
+
+
+def search(index, text, min_similarity=0.3):
+    """
+    Ids similar to text, best first.
+
+    Returns (ids, similarity) arrays, both empty when nothing shares a
+    trigram with the query or clears min_similarity.
+    """
+    grams = trigrams(text)
+    lists = [index['postings'][g] for g in grams if g in index['postings']]
+    if not lists:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    ids, overlap = np.unique(np.concatenate(lists), return_counts=True)
+    sizes = index['sizes'][ids]
+    jaccard = overlap / (len(grams) + sizes - overlap)
+    containment = overlap / np.minimum(len(grams), sizes)
+    sim = JACCARD_WEIGHT * jaccard + (1 - JACCARD_WEIGHT) * containment
+
+    keep = sim >= min_similarity
+    ids, sim = ids[keep], sim[keep]
+    order = np.lexsort((ids, -sim))
+    return ids[order], sim[order]
@@ -0,0 +1,199 @@
+"""
+Lightweight spans for the pipeline, exported as a Chrome trace.
+
+    from tracing import span
+
+    with span('load'):
+        ...
+
+Spans nest and record wall time, CPU time, bytes the process read and
+wrote through read()/write() (Linux /proc/self/io rchar/wchar: files and
+pipes, but not socket recv/send, so HTTP responses are not counted) and
+the tracemalloc peak inside the span. Spans do nothing when tracing is
+off.
+
+Tracing is on when LSQ_TRACE names a directory. Each script run writes
+<dir>/<script>-<pid>.json in Chrome trace_event format (open it in
+chrome://tracing or ui.perfetto.dev) and prints a summary table on exit.
+A full rebuild leaves one file per stage; merge them into one timeline:
+
+    LSQ_TRACE=trace python scripts/11-merge-all.py   # ... every stage
+    python scripts/tracing.py trace -o rebuild.json
+
+Set LSQ_TRACE_MEMORY=0 to skip tracemalloc (it slows allocation-heavy
+stages noticeably).
+
+Only the script's own process is traced. Process pool workers, forked or
+spawned (the macOS default), record nothing and write no file; their time
+is in the parent's span around the pool.
+"""
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# A spawned worker re-imports this module with its process name already set
+_WORKER = multiprocessing.current_process().name != 'MainProcess'
+TRACE_DIR = '' if _WORKER else os.environ.get('LSQ_TRACE', '')
+TRACE_MEMORY = TRACE_DIR and os.environ.get('LSQ_TRACE_MEMORY', '1') != '0'
+
+_events = []
+_local = threading.local()
+
+
+def _io_counters():
+    """(bytes read, bytes written) by this process so far, or (0, 0)."""
+    try:
+        with open('/proc/self/io') as f:
+            io = dict(line.split(':') for line in f)
+        return int(io['rchar']), int(io['wchar'])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name, cat='phase', **args):
+    """Record one span; extra keyword args are stored with the event."""
+    if not TRACE_DIR:
+        yield
+        return
+
+    stack = _stack()
+    frame = {'peak': 0}
+    if TRACE_MEMORY:
+        # Hand the peak so far to the enclosing span, then measure ours
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    read0, written0 = _io_counters()
+    ts = time.time_ns() // 1000
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        read1, written1 = _io_counters()
+        stack.pop()
+        peak = 0
+        if TRACE_MEMORY:
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        _events.append({
+            'name': name, 'cat': cat, 'ph': 'X', 'ts': ts, 'dur': round(wall * 1e6),
+            'pid': os.getpid(), 'tid': threading.get_ident() % 100000,
+            'args': {'cpu_ms': round(cpu * 1000, 1), 'read_bytes': read1 - read0,
+                     'written_bytes': written1 - written0, 'peak_alloc_bytes': peak, **args},
+        })
+
+
+def traced(name=None, cat='phase'):
+    """
+    Decorator form of span(). The wrapper takes the function's module and
+    qualified name, so it pickles by reference like the function itself
+    and can be sent to a process pool.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            with span(name or fn.__name__, cat):
+                return fn(*a, **kw)
+        return inner
+    return wrap
+
+
+def summary(events):
+    """Summary table rows per (cat, name): count, wall, cpu, I/O, peak."""
+    rows = {}
+    for e in events:
+        r = rows.setdefault((e['cat'], e['name']), [0, 0.0, 0.0, 0, 0, 0])
+        r[0] += 1
+        r[1] += e['dur'] / 1e6
+        r[2] += e['args']['cpu_ms'] / 1000
+        r[3] += e['args']['read_bytes']
+        r[4] += e['args']['written_bytes']
+        r[5] = max(r[5], e['args']['peak_alloc_bytes'])
+    return rows
+
+
+def format_summary(events):
+    lines = [f"{'span':36s} {'n':>4s} {'wall s':>9s} {'cpu s':>9s} {'read MB':>9s} "
+             f"{'write MB':>9s} {'peak MB':>8s}"]
+    rows = sorted(summary(events).items(), key=lambda kv: -kv[1][1])
+    for (cat, name), (n, wall, cpu, rd, wr, peak) in rows:
+        label = name if cat == 'phase' else f'[{name}]'
+        lines.append(f"{label[:36]:36s} {n:4d} {wall:9.3f} {cpu:9.3f} {rd / 1e6:9.2f} "
+                     f"{wr / 1e6:9.2f} {peak / 1e6:8.1f}")
+    return '\n'.join(lines)
+
+
+def write_trace(path, events):
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _finish():
+    if not _events:
+        return
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+    path = os.path.join(TRACE_DIR, f'{script}-{os.getpid()}.json')
+    # Name the process row after the script in the viewer
+    meta = {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': script}}
+    write_trace(path, [meta] + _events)
+    print(f"\nTrace: {path}\n{format_summary(_events)}", file=sys.stderr)
+
+
+def _after_fork():
+    # A forked worker inherits tracing: turn it off, drop the parent's events
+    # and stop tracemalloc, which would otherwise slow every worker allocation
+    global TRACE_DIR
+    TRACE_DIR = ''
+    _events.clear()
+    _local.__dict__.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+if TRACE_DIR:
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    atexit.register(_finish)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_after_fork)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Merge per-stage traces into one timeline.')
+    parser.add_argument('trace_dir')
+    parser.add_argument('-o', '--output', default='rebuild-trace.json')
+    args = parser.parse_args()
+
+    events = []
+    for fname in sorted(os.listdir(args.trace_dir)):
+        if fname.endswith('.json'):
+            with open(os.path.join(args.trace_dir, fname)) as f:
+                events.extend(json.load(f).get('traceEvents', []))
+    write_trace(args.output, events)
+    print(format_summary([e for e in events if e.get('ph') == 'X']))
+    print(f"\n{len(events)} events from {args.trace_dir} written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
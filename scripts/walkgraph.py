@@ -0,0 +1,208 @@
+"""
+Pedestrian graph from polylines, with shortest-path distance tables.
+
+Polylines (street centerlines, park footpaths) become one undirected graph:
+vertices closer than a snap tolerance are merged through a hash grid,
+segments that cross are split at the crossing, and path ends that stop
+short of another line (park paths ending at the curb) are joined to it by
+a connector edge. Distances come from Dijkstra over a CSR adjacency.
+Coordinates are local meters [x, z].
+"""
+import heapq
+import math
+
+import numpy as np
+
+from spatial import nearest_segment, point_segment_distance, polyline_segments, query_boxes, \
+    segment_index, segments_cross
+
+SNAP_TOLERANCE = 1.0       # meters — vertices this close are one node
+CONNECT_DISTANCE = 15.0    # meters — dangling ends reach this far for a connection
+
+
+def snap_points(points, tolerance=SNAP_TOLERANCE):
+    """
+    Merge points within tolerance of an earlier point (hash grid, 3x3 cells).
+
+    Returns (nodes (M, 2), node_of (N,)).
+    """
+    cells = {}
+    nodes = []
+    node_of = np.empty(len(points), dtype=np.int64)
+    for i, (x, z) in enumerate(points):
+        cx, cz = math.floor(x / tolerance), math.floor(z / tolerance)
+        found = -1
+        for dx in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                for n in cells.get((cx + dx, cz + dz), ()):
+                    if math.hypot(nodes[n][0] - x, nodes[n][1] - z) <= tolerance:
+                        found = n
+                        break
+                if found >= 0:
+                    break
+            if found >= 0:
+                break
+        if found < 0:
+            found = len(nodes)
+            nodes.append((x, z))
+            cells.setdefault((cx, cz), []).append(found)
+        node_of[i] = found
+    return np.array(nodes, dtype=np.float64).reshape(-1, 2), node_of
+
+
+def crossing_splits(a, b, owner, index):
+    """(segment, t) split parameters where segments properly cross."""
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    q, s = query_boxes(index, lo, hi)
+    keep = q < s
+    q, s = q[keep], s[keep]
+    cross = segments_cross(a[q], b[q], a[s], b[s])
+    q, s = q[cross], s[cross]
+
+    # Intersection parameters on both segments
+    d1, d2 = b[q] - a[q], b[s] - a[s]
+    denom = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    w = a[s] - a[q]
+    t1 = (w[:, 0] * d2[:, 1] - w[:, 1] * d2[:, 0]) / denom
+    t2 = (w[:, 0] * d1[:, 1] - w[:, 1] * d1[:, 0]) / denom
+    return np.concatenate([q, s]), np.concatenate([t1, t2])
+
+
+def dangling_connectors(a, b, owner, index, ends, end_owner, max_distance):
+    """
+    Connections from line ends to the nearest point of another line.
+
+    Returns (end ids, segment ids, t, distance) for ends within max_distance
+    of a segment of a different polyline.
+    """
+    lo, hi = ends - max_distance, ends + max_distance
+    q, s = query_boxes(index, lo, hi)
+    keep = owner[s] != end_owner[q]
+    q, s = q[keep], s[keep]
+    if not len(q):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0), np.empty(0)
+    d, t, _ = point_segment_distance(ends[q], a[s], b[s])
+    ok = d <= max_distance
+    q, s, t, d = q[ok], s[ok], t[ok], d[ok]
+    order = np.lexsort((s, d, q))
+    q, s, t, d = q[order], s[order], t[order], d[order]
+    first = np.r_[True, q[1:] != q[:-1]] if len(q) else np.empty(0, dtype=bool)
+    return q[first], s[first], t[first], d[first]
+
+
+def build_graph(polylines, snap=SNAP_TOLERANCE, connect=CONNECT_DISTANCE):
+    """
+    Routable graph from polylines.
+
+    Returns dict with nodes (N, 2), edges (E, 2) node pairs (u < v, unique)
+    and length (E,).
+    """
+    a, b, owner = polyline_segments(polylines)
+    index = segment_index(a, b)
+
+    splits = {}
+
+    def add_split(seg, t):
+        if 0.0 < t < 1.0:
+            splits.setdefault(int(seg), []).append(float(t))
+
+    for seg, t in zip(*crossing_splits(a, b, owner, index)):
+        add_split(seg, t)
+
+    # Line ends that touch no other line
+    starts = np.r_[True, owner[1:] != owner[:-1]]
+    stops = np.r_[owner[1:] != owner[:-1], True]
+    ends = np.concatenate([a[starts], b[stops]])
+    end_owner = np.concatenate([owner[starts], owner[stops]])
+    _, node_of = snap_points(np.concatenate([a, b, ends]), snap)
+    degree = np.bincount(node_of[:2 * len(a)], minlength=node_of.max() + 1)
+    dangling = np.flatnonzero(degree[node_of[2 * len(a):]] == 1)
+
+    q, s, t, d = dangling_connectors(a, b, owner, index, ends[dangling],
+                                     end_owner[dangling], connect)
+    connectors = []
+    for e, seg, tt, dist in zip(dangling[q], s, t, d):
+        p = a[seg] + (b[seg] - a[seg]) * tt
+        add_split(seg, tt)
+        if dist > snap:
+            connectors.append((ends[e], p))
+
+    # Every segment as a chain through its split points
+    points, pairs = [], []
+    for i in range(len(a)):
+        ts = sorted(set(splits.get(i, ())))
+        chain = [a[i]] + [a[i] + (b[i] - a[i]) * t for t in ts] + [b[i]]
+        base = len(points)
+        points.extend(chain)
+        pairs.extend((base + k, base + k + 1) for k in range(len(chain) - 1))
+    for p, c in connectors:
+        points.extend((p, c))
+        pairs.append((len(points) - 2, len(points) - 1))
+
+    nodes, node_of = snap_points(np.asarray(points).reshape(-1, 2), snap)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    u, v = node_of[pairs[:, 0]], node_of[pairs[:, 1]]
+    keep = u != v
+    u, v = np.minimum(u[keep], v[keep]), np.maximum(u[keep], v[keep])
+    length = np.hypot(*(nodes[u] - nodes[v]).T)
+
+    # Parallel edges: keep the shortest
+    order = np.lexsort((length, v, u))
+    u, v, length = u[order], v[order], length[order]
+    first = np.r_[True, (u[1:] != u[:-1]) | (v[1:] != v[:-1])] if len(u) else np.empty(0, dtype=bool)
+    return {'nodes': nodes, 'edges': np.stack([u[first], v[first]], axis=1),
+            'length': length[first], 'connectors': len(connectors)}
+
+
+def csr_adjacency(graph):
+    """(indptr, neighbours, weights) of the undirected graph."""
+    n = len(graph['nodes'])
+    u, v = graph['edges'][:, 0], graph['edges'][:, 1]
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u])
+    w = np.concatenate([graph['length'], graph['length']])
+    order = np.argsort(src, kind='stable')
+    indptr = np.searchsorted(src[order], np.arange(n + 1))
+    return indptr, dst[order], w[order]
+
+
+def dijkstra(adjacency, sources):
+    """
+    Distances from the nearest of several seeded sources to every node.
+
+    sources is a list of (node, initial distance). Unreached nodes are inf.
+    """
+    indptr, nbr, w = (x.tolist() for x in adjacency)
+    dist = [math.inf] * (len(indptr) - 1)
+    heap = []
+    for node, d0 in sources:
+        if d0 < dist[node]:
+            dist[node] = d0
+            heap.append((d0, node))
+    heapq.heapify(heap)
+    while heap:
+        d, n = heapq.heappop(heap)
+        if d > dist[n]:
+            continue
+        for k in range(indptr[n], indptr[n + 1]):
+            nd = d + w[k]
+            m = nbr[k]
+            if nd < dist[m]:
+                dist[m] = nd
+                heapq.heappush(heap, (nd, m))
+    return np.array(dist)
+
+
+def attach_points(graph, points):
+    """
+    Attach points to their nearest graph edge.
+
+    Returns (edge (N,), offset (N,) distance to the edge, t (N,) along u -> v).
+    """
+    nodes, edges = graph['nodes'], graph['edges']
+    index = segment_index(nodes[edges[:, 0]], nodes[edges[:, 1]])
+    seg, dist, _ = nearest_segment(index, points)
+    _, t, _ = point_segment_distance(np.asarray(points, dtype=np.float64).reshape(-1, 2),
+                                     nodes[edges[seg, 0]], nodes[edges[seg, 1]])
+    return seg, dist, t
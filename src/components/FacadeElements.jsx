@@ -59,6 +59,7 @@ function loadModel(url) {
 // ── Geometry helpers ──
 
 function getFoundationHeight(building) {
+  if (building.render) return building.render.foundation_height
   const year = building.year_built
   if (!year) return 0
   if (year < 1900) return 1.2
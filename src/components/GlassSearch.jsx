@@ -1,8 +1,10 @@
-import { useState, useRef, useMemo, useCallback } from 'react'
+import { useState, useRef, useMemo, useCallback, useEffect } from 'react'
 import useListings from '../hooks/useListings'
 import useCamera from '../hooks/useCamera'
 import useSelectedBuilding from '../hooks/useSelectedBuilding'
 import CATEGORIES from '../tokens/categories'
+import { buildAddressIndex, lookupAddress } from '../lib/addressIndex'
+import { loadSearchIndex, searchIndex as queryPrebuilt } from '../lib/searchIndex'
 
 import { buildings, buildingMap as _buildingMap } from '../data/buildings'
 
@@ -82,6 +84,8 @@ function menuTypeLabel(key) {
   return MENU_TYPE_LABELS[key] || key.replace(/_/g, ' ').replace(/\b\w/g, c => c.toUpperCase())
 }
 
+// Place and building entries carry their id, so those the prebuilt index
+// covers can be skipped while it answers the query
 function buildSearchIndex(listings) {
   const idx = []
   const listingBuildingIds = new Set(listings.map(l => l.building_id).filter(Boolean))
@@ -89,13 +93,13 @@ function buildSearchIndex(listings) {
     if (listingBuildingIds.has(b.id) || !b.address) return
     const addr = b.address.toUpperCase()
     const name = (b.name || '').toUpperCase()
-    idx.push({ text: addr + ' ' + name, type: 'building', building: b })
+    idx.push({ text: addr + ' ' + name, type: 'building', building: b, id: b.id })
   })
 
   listings.forEach(listing => {
     const name = (listing.name || '').toUpperCase()
     const addr = (listing.address || '').toUpperCase()
-    idx.push({ text: name + ' ' + addr, type: 'place', listing })
+    idx.push({ text: name + ' ' + addr, type: 'place', listing, id: listing.id })
 
     const sections = listing.menu?.sections || []
     const seenTypes = new Set()
@@ -126,15 +130,36 @@ export function useGlassSearch() {
   const highlight = useSelectedBuilding(s => s.highlight)
   const selectBuilding = useSelectedBuilding(s => s.select)
 
+  const [prebuilt, setPrebuilt] = useState(null)
+  useEffect(() => { loadSearchIndex().then(setPrebuilt) }, [])
+  const indexedIds = useMemo(() => new Set(prebuilt ? prebuilt.docs.map(d => d[0]) : []), [prebuilt])
+  const listingById = useMemo(() => new Map(listings.map(l => [l.id, l])), [listings])
+
   const searchIndex = useMemo(() => buildSearchIndex(listings), [listings])
+  const addressIndex = useMemo(() => buildAddressIndex(buildings), [])
 
   const results = useMemo(() => {
     if (query.length < 2) return []
     const q = query.toUpperCase()
     const terms = q.split(/\s+/)
-    const matches = searchIndex.filter(entry => terms.every(t => entry.text.includes(t)))
+    // Ranked hits from the prebuilt index, resolved to current listings/buildings
+    const hits = !prebuilt ? [] : queryPrebuilt(prebuilt, query).map(({ id }) => {
+      const listing = listingById.get(id)
+      if (listing) return { type: 'place', listing }
+      const building = _buildingMap[id]
+      return building ? { type: 'building', building } : null
+    }).filter(Boolean)
+    // The prebuilt index answers for the places and buildings it covers; when
+    // it has nothing (no words it can look up, e.g. 'at'), everything is scanned
+    const skipIndexed = hits.length > 0
+    const matches = searchIndex.filter(entry =>
+      !(skipIndexed && indexedIds.has(entry.id)) && terms.every(t => entry.text.includes(t)))
+    matches.unshift(...hits)
     const places = matches.filter(m => m.type === 'place')
-    const bldgs = matches.filter(m => m.type === 'building')
+    // Exact address hits (any spelling) lead the building results
+    const exact = lookupAddress(addressIndex, query).map(b => ({ type: 'building', building: b }))
+    const exactIds = new Set(exact.map(m => m.building.id))
+    const bldgs = [...exact, ...matches.filter(m => m.type === 'building' && !exactIds.has(m.building.id))]
     const menuTypes = matches.filter(m => m.type === 'menu-type')
     const items = matches.filter(m => m.type === 'menu-item')
     const seenMenuListings = new Set()
@@ -151,7 +176,7 @@ export function useGlassSearch() {
       if (itemsByPlace[pid].length < 2) itemsByPlace[pid].push(m)
     })
     return [...places.slice(0, 4), ...bldgs.slice(0, 4), ...uniqueMenuTypes.slice(0, 4), ...Object.values(itemsByPlace).flat().slice(0, 6)].slice(0, 10)
-  }, [query, searchIndex])
+  }, [query, searchIndex, addressIndex, prebuilt, indexedIds, listingById])
 
   const selectPlace = useCallback((listing, building, resultType) => {
     const isMenuResult = resultType === 'menu-type' || resultType === 'menu-item'
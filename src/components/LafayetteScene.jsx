@@ -13,6 +13,7 @@ import usePlaceState from '../hooks/usePlaceState'
 import useLandmarkFilter from '../hooks/useLandmarkFilter'
 import useCamera from '../hooks/useCamera'
 import { CATEGORY_HEX } from '../tokens/categories'
+import { loadHoursIndex, hasHours, isOpenAt, openIdsAt } from '../lib/openHours'
 // import FacadeBillboards from './FacadeBillboards'  // shelved — future street-level facade rendering
 import FacadeElements from './FacadeElements'
 
@@ -59,6 +60,8 @@ import buildingOverridesData from '../data/buildingOverrides.json'
 // ============ PER-BUILDING OVERRIDES ============
 // Override lookup: individual buildings can have custom roof_shape, foundation_height, etc.
 // Add entries to src/data/buildingOverrides.json to refine beyond rule-based defaults.
+// scripts/classify_materials.py bakes them into each building's `render` hints, which
+// the helpers below prefer — re-run it after editing overrides.
 const _overrides = buildingOverridesData.overrides || {}
 
 function getOverride(buildingId, key) {
@@ -69,6 +72,7 @@ function getOverride(buildingId, key) {
 // ============ FOUNDATION & ROOF HELPERS ============
 
 function getFoundationHeight(building) {
+  if (building.render) return building.render.foundation_height
   const override = getOverride(building.id, 'foundation_height')
   if (override !== undefined) return override
 
@@ -80,6 +84,7 @@ function getFoundationHeight(building) {
 }
 
 function classifyRoof(building) {
+  if (building.render) return building.render.roof_shape
   const override = getOverride(building.id, 'roof_shape')
   if (override !== undefined) return override
 
@@ -94,7 +99,9 @@ function classifyRoof(building) {
   return 'flat'
 }
 
+// Local footprint; the baked one is already wound CCW (see ensureCCW)
 function getLocalPts(building) {
+  if (building.render) return building.render.local_pts
   const fp = building.footprint
   if (!fp || fp.length < 3) return null
   return fp.map(([x, z]) => [x - building.position[0], z - building.position[2]])
@@ -138,6 +145,17 @@ function centroid2D(pts) {
   return [cx / pts.length, cz / pts.length]
 }
 
+// Roof the renderer actually builds: mansard needs a convex footprint, hip <= 8 points
+function getBuiltRoof(building) {
+  if (building.render) return building.render.roof_built
+  const roofType = classifyRoof(building)
+  const localPts = getLocalPts(building)
+  if (!localPts) return 'flat'
+  if (roofType === 'mansard' && isConvex(localPts)) return 'mansard'
+  if (roofType === 'hip' && localPts.length <= 8) return 'hip'
+  return 'flat'
+}
+
 function footprintRatio(pts) {
   // Ratio of min to max extent — 1.0 = square, <0.5 = elongated
   let minX = Infinity, maxX = -Infinity, minZ = Infinity, maxZ = -Infinity
@@ -197,15 +215,13 @@ function buildMansardRoof(localPts, wallHeight, stories) {
   return { geos: [geo], peakHeight: mansardHeight }
 }
 
-function buildHipRoof(localPts, wallHeight, stories) {
+function buildHipRoof(localPts, wallHeight, stories, ratio = footprintRatio(localPts)) {
   localPts = ensureCCW(localPts)
   const peakH = stories === 1 ? 1.8 : 1.5
   const peakY = wallHeight + peakH
   const [cx, cz] = centroid2D(localPts)
   const n = localPts.length
 
-  const ratio = footprintRatio(localPts)
-
   const vertices = []
   const indices = []
 
@@ -280,6 +296,7 @@ function buildHipRoof(localPts, wallHeight, stories) {
 }
 
 function getRoofPeakHeight(building) {
+  if (building.render) return building.render.roof_peak
   const roofType = classifyRoof(building)
   if (roofType === 'flat') return 0
   if (roofType === 'mansard') {
@@ -389,7 +406,16 @@ function _isWithinHours(hours, time) {
   return mins >= oh * 60 + om && mins < ch * 60 + cm
 }
 
-function NeonBand({ building, categoryHex, hours, forceOn = false }) {
+// Prebuilt weekly masks make the per-frame check a bit test; listings the
+// index does not cover (or before it loads) parse their day objects
+let _hoursIndex = null
+const _hoursReady = loadHoursIndex().then(idx => { _hoursIndex = idx })
+function _isListingOpen(listingId, hours, time) {
+  if (_hoursIndex && listingId && hasHours(_hoursIndex, listingId)) return isOpenAt(_hoursIndex, listingId, time)
+  return _isWithinHours(hours, time)
+}
+
+function NeonBand({ building, categoryHex, hours, listingId, forceOn = false }) {
   const bandRef = useRef()
   const prevStateRef = useRef({ glowFactor: -1, isOpen: null })
   const getLightingPhase = useTimeOfDay((state) => state.getLightingPhase)
@@ -438,7 +464,7 @@ function NeonBand({ building, categoryHex, hours, forceOn = false }) {
     const mat = bandRef.current.material
     const { sunAltitude } = getLightingPhase()
     const currentTime = useTimeOfDay.getState().currentTime
-    const isOpen = forceOn || _isWithinHours(hours, currentTime)
+    const isOpen = forceOn || _isListingOpen(listingId, hours, currentTime)
 
     // Glow ramps from subtle daytime accent to full neon at dusk
     // sunAltitude ~0.2 = bright day, ~0.05 = dusk, < -0.12 = night
@@ -573,6 +599,7 @@ function Building({ building, neonInfo }) {
   const isSimOpen = usePlaceState((s) => s.openBuildings.has(building.id))
   const categoryHex = neonInfo?.hex
   const listingHours = neonInfo?.hours
+  const listingId = neonInfo?.listingId
   const neonForceOn = neonInfo?.forceOn || false
   const showNeon = !!categoryHex || isSimOpen
   const effectiveHex = categoryHex || simColor(building.id)
@@ -617,17 +644,18 @@ function Building({ building, neonInfo }) {
     }
 
     // Add roof geometry if applicable
-    const roofType = classifyRoof(building)
+    const builtRoof = getBuiltRoof(building)
     const localPts = getLocalPts(building)
 
-    if (roofType === 'mansard' && localPts && isConvex(localPts)) {
+    if (builtRoof === 'mansard') {
       const { geos: roofGeos } = buildMansardRoof(localPts, wallHeight, building.stories)
       const allGeos = [geo, ...roofGeos]
       const merged = mergeBufferGeometries(allGeos)
       allGeos.forEach(g => g.dispose())
       return merged
-    } else if (roofType === 'hip' && localPts && localPts.length <= 8) {
-      const { geos: roofGeos } = buildHipRoof(localPts, wallHeight, building.stories)
+    } else if (builtRoof === 'hip') {
+      const { geos: roofGeos } = buildHipRoof(localPts, wallHeight, building.stories,
+        building.render?.footprint_ratio)
       const allGeos = [geo, ...roofGeos]
       const merged = mergeBufferGeometries(allGeos)
       allGeos.forEach(g => g.dispose())
@@ -858,7 +886,7 @@ function Building({ building, neonInfo }) {
         onPointerOut={() => { clearHovered(); document.body.style.cursor = 'auto' }}
         onClick={(e) => { e.stopPropagation(); if (!isDrag(e)) select(building.id) }}
       />
-      {showNeon && <NeonBand building={building} categoryHex={effectiveHex} hours={listingHours} forceOn={isSimOpen || neonForceOn} />}
+      {showNeon && <NeonBand building={building} categoryHex={effectiveHex} hours={listingHours} listingId={listingId} forceOn={isSimOpen || neonForceOn} />}
       {isSelected && <SelectionRing building={building} />}
     </group>
   )
@@ -1187,15 +1215,20 @@ function LafayetteScene() {
 
   const activeTags = useLandmarkFilter((s) => s.activeTags)
 
+  const [hoursLoaded, setHoursLoaded] = useState(false)
+  useEffect(() => { _hoursReady.then(() => setHoursLoaded(true)) }, [])
+
   const neonLookup = useMemo(() => {
     const map = {}
     const time = useTimeOfDay.getState().currentTime
+    const openNow = _hoursIndex ? openIdsAt(_hoursIndex, time) : null
     listings.forEach(l => {
       const bid = l.building_id || l.id
       const hex = CATEGORY_HEX[l.category]
       // Hours-based glow (always-on for open businesses)
-      if (bid && hex && _isWithinHours(l.hours, time)) {
-        map[bid] = { hex, hours: l.hours }
+      const isOpen = openNow && hasHours(_hoursIndex, l.id) ? openNow.has(l.id) : _isWithinHours(l.hours, time)
+      if (bid && hex && isOpen) {
+        map[bid] = { hex, hours: l.hours, listingId: l.id }
       }
       // Filter-based glow (Society Pages category selection)
       if (bid && hex && activeTags.size > 0 && (activeTags.has(l.subcategory) || activeTags.has(l.category))) {
@@ -1203,7 +1236,7 @@ function LafayetteScene() {
       }
     })
     return map
-  }, [listings, neonTick, activeTags])
+  }, [listings, neonTick, activeTags, hoursLoaded])
 
   // Frustum-cull neon: only mount NeonBand for buildings the camera can actually see.
   // Checks every 30 frames (~0.5s) to avoid per-frame churn.
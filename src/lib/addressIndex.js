@@ -0,0 +1,91 @@
+/**
+ * Normalised address keys — mirror of scripts/addresses.py.
+ *
+ * '1732   CHOUTEAU AV', '1732 Chouteau Avenue' and '1732 Chouteau Ave, Suite 2'
+ * all reduce to '1732 CHOUTEAU AV', so an exact address lookup is one Map
+ * get instead of a substring scan over every building. House number ranges
+ * ('1801-1805') expand to one key per number on that side of the street.
+ */
+
+const STREET_TYPES = {
+  AV: 'AV', AVE: 'AV', AVENUE: 'AV',
+  ST: 'ST', STREET: 'ST',
+  PL: 'PL', PLACE: 'PL',
+  LN: 'LN', LANE: 'LN',
+  DR: 'DR', DRIVE: 'DR',
+  ALY: 'ALY', ALLEY: 'ALY',
+  PKWY: 'PKWY', PARKWAY: 'PKWY',
+  BLVD: 'BLVD', BOULEVARD: 'BLVD',
+  CT: 'CT', COURT: 'CT',
+  TER: 'TER', TERRACE: 'TER',
+  RD: 'RD', ROAD: 'RD',
+}
+const DIRECTIONS = new Set(['N', 'S', 'E', 'W', 'NORTH', 'SOUTH', 'EAST', 'WEST'])
+const MAX_RANGE_KEYS = 25 // larger house number ranges index their endpoints only
+const RANGE = /^(\d+)[A-Z]?(?:-(\d+)[A-Z]?)?$/
+
+export function streetKey(name) {
+  let tokens = (name || '').toUpperCase().replace(/[^A-Z0-9 ]/g, ' ').split(/\s+/).filter(Boolean)
+  const last = tokens.length - 1
+  if (last >= 0 && STREET_TYPES[tokens[last]]) tokens[last] = STREET_TYPES[tokens[last]]
+  while (tokens.length > 2 && DIRECTIONS.has(tokens[0])) tokens = tokens.slice(1)
+  return tokens.join(' ')
+}
+
+/** '1732' → [1732]; '1801-1805' → [1801, 1803, 1805]; '1801-05' → [1801, 1803, 1805]. */
+export function houseNumbers(token) {
+  const m = (token || '').match(RANGE)
+  if (!m) return []
+  let lo = parseInt(m[1], 10)
+  if (!m[2]) return [lo]
+  let hiS = m[2]
+  if (hiS.length < m[1].length) hiS = m[1].slice(0, m[1].length - hiS.length) + hiS
+  let hi = parseInt(hiS, 10)
+  if (hi < lo) [lo, hi] = [hi, lo]
+  const step = (hi - lo) % 2 === 0 ? 2 : 1
+  const nums = []
+  for (let n = lo; n <= hi; n += step) nums.push(n)
+  return nums.length <= MAX_RANGE_KEYS ? nums : [lo, hi]
+}
+
+/** Every normalised key an address answers to ('1801-1803 Park Ave' → 2 keys). */
+export function addressKeys(text) {
+  let head = (text || '').toUpperCase().split(',')[0]
+  head = head.replace(/\b(SUITE|STE|APT|UNIT)\b.*$|#.*$/, '')
+  let tokens = head.replace(/[^A-Z0-9 -]/g, ' ').split(/\s+/).filter(Boolean)
+  const nums = tokens.length ? houseNumbers(tokens[0]) : []
+  if (!nums.length) return []
+  tokens = tokens.slice(1)
+  // Unit letter between number and street ('2315 D  RUTGER ST')
+  if (tokens.length > 2 && tokens[0].length === 1 && !DIRECTIONS.has(tokens[0])) tokens = tokens.slice(1)
+  const street = streetKey(tokens.join(' '))
+  return street ? nums.map(n => `${n} ${street}`) : []
+}
+
+/** '1901 Park Avenue, Suite 1R' → '1901 PARK AV'; null without a house number or street. */
+export function normalizeAddress(text) {
+  const keys = addressKeys(text)
+  return keys.length ? keys[0] : null
+}
+
+/** Map of normalised address → buildings at it (ranged addresses under every number). */
+export function buildAddressIndex(buildings) {
+  const index = new Map()
+  buildings.forEach(b => {
+    addressKeys(b.address).forEach(key => {
+      if (!index.has(key)) index.set(key, [])
+      const list = index.get(key)
+      if (!list.includes(b)) list.push(b)
+    })
+  })
+  return index
+}
+
+/** Buildings at an address in any form (a range finds every number's), in index order. */
+export function lookupAddress(index, text) {
+  const found = []
+  addressKeys(text).forEach(key => {
+    (index.get(key) || []).forEach(b => { if (!found.includes(b)) found.push(b) })
+  })
+  return found
+}
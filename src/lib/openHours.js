@@ -0,0 +1,56 @@
+/**
+ * Prebuilt weekly opening hours (scripts/25-build-hours-index.py).
+ *
+ * Each listing's week is a 672-bit mask of quarter-hour slots, Sunday
+ * first, and `open_at[slot]` lists the listings open in that slot — so
+ * "open now" is one array lookup and "is this place open" is a bit test,
+ * with no hour-string parsing at check time.
+ */
+
+const INDEX_URL = `${import.meta.env.BASE_URL}hours_index.json`
+
+let loading = null
+
+/** Fetch the index once; resolves to null if it is missing or unreadable. */
+export function loadHoursIndex() {
+  if (!loading) {
+    loading = fetch(INDEX_URL)
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => data && { ...data, bits: new Map(), openSets: new Map() })
+      .catch(() => null)
+  }
+  return loading
+}
+
+/** Week slot (0 … 671) of a Date in local time. */
+export function weekSlot(index, time) {
+  const slot = Math.floor((time.getHours() * 60 + time.getMinutes()) / index.slot_minutes)
+  return time.getDay() * index.slots_per_day + slot
+}
+
+export function hasHours(index, id) {
+  return id in index.masks
+}
+
+/** Bit test: is listing id open at time? */
+export function isOpenAt(index, id, time) {
+  let bits = index.bits.get(id)
+  if (!bits) {
+    const raw = atob(index.masks[id] || '')
+    bits = Uint8Array.from(raw, c => c.charCodeAt(0))
+    index.bits.set(id, bits)
+  }
+  const s = weekSlot(index, time)
+  return ((bits[s >> 3] || 0) >> (s & 7) & 1) === 1
+}
+
+/** Set of listing ids open at time. */
+export function openIdsAt(index, time) {
+  const s = weekSlot(index, time)
+  let ids = index.openSets.get(s)
+  if (!ids) {
+    ids = new Set((index.open_at[s] || []).map(i => index.ids[i]))
+    index.openSets.set(s, ids)
+  }
+  return ids
+}
@@ -0,0 +1,116 @@
+/**
+ * Client for the prebuilt search index (scripts/24-build-search-index.py).
+ *
+ * The index is a sorted term dictionary with weighted posting lists, so
+ * every term starting with a typed prefix is one contiguous range found by
+ * binary search. Ranges are cached per prefix: each keystroke narrows the
+ * previous prefix's range instead of scanning records.
+ *
+ * Every query word must match, and each one matches as a prefix ('laf
+ * sq' finds Lafayette Square), as the runtime substring search does; a
+ * word that is a whole term scores above one that only starts terms
+ * (PREFIX_FACTOR). Results are ranked by summed posting weights times the
+ * document prior. Stopwords are dropped only as complete earlier words:
+ * the last word is still being typed ('co' may become 'coffee'), so it is
+ * always kept.
+ */
+
+const INDEX_URL = `${import.meta.env.BASE_URL}search_index.json`
+const PREFIX_FACTOR = 0.75 // a prefix-only term match counts for less than an exact one
+const MAX_CACHED_RANGES = 500
+
+let loading = null
+
+/** Fetch the index once; resolves to null if it is missing or unreadable. */
+export function loadSearchIndex() {
+  if (!loading) {
+    loading = fetch(INDEX_URL)
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => data && { ...data, stopwords: new Set(data.stopwords), ranges: new Map() })
+      .catch(() => null)
+  }
+  return loading
+}
+
+/** Same tokens as textindex.normalize_tokens on the pipeline side. */
+export function tokenize(text, stopwords) {
+  return splitWords(text).filter(t => !stopwords.has(t))
+}
+
+function splitWords(text) {
+  return (text || '')
+    .normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase().replace(/&/g, ' and ').replace(/'/g, '')
+    .split(/[^a-z0-9]+/)
+    .filter(Boolean)
+}
+
+/** Words of a query to look up: tokenize(), but the last (in-progress) word is never dropped. */
+export function queryWords(query, stopwords) {
+  const words = splitWords(query)
+  return words.filter((t, i) => i === words.length - 1 || !stopwords.has(t))
+}
+
+function lowerBound(terms, key, lo, hi) {
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (terms[mid] < key) lo = mid + 1
+    else hi = mid
+  }
+  return lo
+}
+
+/** [start, end) of the terms beginning with prefix, narrowed from the longest cached shorter prefix. */
+function prefixRange(index, prefix) {
+  const cached = index.ranges.get(prefix)
+  if (cached) return cached
+  let lo = 0, hi = index.terms.length
+  for (let k = prefix.length - 1; k > 0; k--) {
+    const outer = index.ranges.get(prefix.slice(0, k))
+    if (outer) { [lo, hi] = outer; break }
+  }
+  const start = lowerBound(index.terms, prefix, lo, hi)
+  const range = [start, lowerBound(index.terms, prefix + '\uffff', start, hi)]
+  if (index.ranges.size >= MAX_CACHED_RANGES) index.ranges.clear()
+  index.ranges.set(prefix, range)
+  return range
+}
+
+/** Best weight per document over all terms matching one query word. */
+function wordScores(index, word) {
+  const [start, end] = prefixRange(index, word)
+  const scores = new Map()
+  for (let t = start; t < end; t++) {
+    const factor = index.terms[t] === word ? 1 : PREFIX_FACTOR
+    const plist = index.postings[t]
+    for (let i = 0; i < plist.length; i += 2) {
+      const w = plist[i + 1] * factor
+      if (w > (scores.get(plist[i]) || 0)) scores.set(plist[i], w)
+    }
+  }
+  return scores
+}
+
+/** Ranked [{ id, score }] for a query; [] when the query has no indexable words. */
+export function searchIndex(index, query, limit = 20) {
+  const words = queryWords(query, index.stopwords)
+  if (!words.length) return []
+
+  let total = null
+  for (const word of words) {
+    const scores = wordScores(index, word)
+    if (total === null) {
+      total = scores
+    } else {
+      const next = new Map()
+      total.forEach((s, d) => { if (scores.has(d)) next.set(d, s + scores.get(d)) })
+      total = next
+    }
+    if (!total.size) return []
+  }
+
+  return [...total]
+    .map(([d, s]) => ({ doc: d, id: index.docs[d][0], score: s * index.docs[d][1] }))
+    .sort((a, b) => b.score - a.score || a.doc - b.doc)
+    .slice(0, limit)
+}